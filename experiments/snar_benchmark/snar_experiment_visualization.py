@@ -1,5 +1,9 @@
 from summit import Runner
-from summit.utils.multiobjective import pareto_efficient, hypervolume
+from summit.utils.multiobjective import (
+    pareto_efficient,
+    hypervolume,
+    HypervolumeTracker,
+)
 
 from neptune.sessions import Session, HostedNeptuneBackend
 import pandas as pd
@@ -333,9 +337,10 @@ class PlotExperiments:
                 r = self.runners[experiment_id]
                 data = r.experiment.data[["sty", "e_factor"]].to_numpy()
                 data[:, 0] *= -1  # make it a minimzation problem
-                for i in range(self.trajectory_length):
-                    y_front, _ = pareto_efficient(data[0 : i + 1, :], maximize=False)
-                    hv_trajectories[i, j] = hypervolume(y_front, ref=reference)
+                tracker = HypervolumeTracker(reference)
+                hv = tracker.trajectory(data[: self.trajectory_length])
+                hv_trajectories[: len(hv), j] = hv
+                hv_trajectories[len(hv) :, j] = hv[-1]
 
             # Mean and standard deviation
             hv_mean_trajectory = np.mean(hv_trajectories, axis=1)
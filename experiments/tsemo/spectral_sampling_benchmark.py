@@ -0,0 +1,66 @@
+"""
+Compare the speed of spectral sampling with pyrff and with summit.utils.rff.sample_rff
+
+Run with `python spectral_sampling_benchmark.py`. The data sizes are typical of TSEMO,
+which samples one function per objective at every iteration with 1500 spectral points
+and as many observations as experiments run so far.
+"""
+
+from summit.utils.rff import sample_rff
+import pyrff
+import numpy as np
+import time
+import warnings
+
+warnings.filterwarnings("ignore", category=RuntimeWarning)
+
+
+def time_sampler(sampler, n_observations, n_spectral_points, kernel_nu, repeats=3):
+    """Return the fastest time of several repeats or NaN if sampling fails"""
+    X = np.random.rand(n_observations, 6)
+    Y = np.sin(3 * X[:, 0]) + X[:, 1] ** 2
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            sampler(
+                lengthscales=np.ones(6),
+                scaling=1.0,
+                noise=1e-2,
+                kernel_nu=kernel_nu,
+                X=X,
+                Y=Y,
+                M=n_spectral_points,
+            )
+        except np.linalg.LinAlgError:
+            return np.nan
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    np.random.seed(0)
+    print(
+        f"{'n':>6} {'M':>6} {'nu':>5} {'pyrff (s)':>10} {'summit (s)':>11} {'speedup':>8}"
+    )
+    for n_spectral_points in [1500, 4000]:
+        for n_observations in [20, 100, 500, 2000]:
+            for kernel_nu in [1, np.inf]:
+                t_pyrff = time_sampler(
+                    pyrff.sample_rff,
+                    n_observations,
+                    n_spectral_points,
+                    kernel_nu,
+                    repeats=1,
+                )
+                t_summit = time_sampler(
+                    sample_rff, n_observations, n_spectral_points, kernel_nu
+                )
+                print(
+                    f"{n_observations:>6} {n_spectral_points:>6} {kernel_nu:>5} "
+                    f"{t_pyrff:>10.3f} {t_summit:>11.4f} {t_pyrff / t_summit:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,5 +13,7 @@ def clean_house(config_dir_name=".summit"):
 
 from summit.domain import *
 from summit.experiment import Experiment
-from summit.run import Runner, NeptuneRunner
+from summit.run import Runner, AsyncRunner, NeptuneRunner
 from summit.strategies import *
+from summit.suite import BenchmarkSuite
+from summit.metrics import MetricsSink, JSONLinesSink, SQLiteSink
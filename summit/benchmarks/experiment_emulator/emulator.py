@@ -189,10 +189,7 @@ class Emulator(ABC):
                                 tmp_cont_inp, _, _ = self._transform_data(data=tmp_cont_inp, reduce=self.data_transformation_dict[v.name][0], divide=self.data_transformation_dict[v.name][1])
                             self.input_data_continuous.append(tmp_cont_inp)
                         elif v.variable_type == "descriptors" or (v.variable_type == "categorical" and self._cat_to_descr == True):
-                            tmp_descr_inp = []
-                            for ent in np_dataset[:, i]:
-                                tmp_descr_inp.append(v.ds.loc[[ent], :].values[0].tolist())
-                            tmp_descr_inp = np.asarray(tmp_descr_inp)
+                            tmp_descr_inp = v.get_descriptors(np_dataset[:, i])
                             for i in range(len(tmp_descr_inp[0])):
                                 if not inference:
                                     tmp_descr_inp[:, i], _reduce, _divide = self._transform_data(data=tmp_descr_inp[:, i], transformation_type=transform_input)
@@ -107,21 +107,22 @@ class SnarBenchmark(Experiment):
 
     def _integrate_equations(self, tau, equiv_pldn, conc_dfnb, temperature):
         # Initial Concentrations in mM
-        self.C_i = np.zeros(5)
-        self.C_i[0] = conc_dfnb
-        self.C_i[1] = equiv_pldn * conc_dfnb
+        C_i = np.zeros(5)
+        C_i[0] = conc_dfnb
+        C_i[1] = equiv_pldn * conc_dfnb
 
         # Flowrate and residence time
         V = 3  # mL
         q_tot = V / tau
         C1_0 = 2.0  # reservoir concentration of 1 is 1 M = 1 mM
         C2_0 = 4.2  # reservoi concentration of  2 is 2 M = 2 mM
-        q_1 = self.C_i[0] / C1_0 * q_tot  # flowrate of 1 (dfnb)
-        q_2 = self.C_i[1] / C2_0 * q_tot  # flowrate of 2 (pldn)
+        q_1 = C_i[0] / C1_0 * q_tot  # flowrate of 1 (dfnb)
+        q_2 = C_i[1] / C2_0 * q_tot  # flowrate of 2 (pldn)
         q_eth = q_tot - q_1 - q_2  # flowrate of ethanol
 
         # Integrate
-        res = solve_ivp(self._integrand, [0, tau], self.C_i, args=(temperature,))
+        # Initial concentrations are passed through so that experiments can run in threads
+        res = solve_ivp(self._integrand, [0, tau], C_i, args=(temperature, C_i))
         C_final = res.y[:, -1]
 
         # Add measurment noise
@@ -149,7 +150,7 @@ class SnarBenchmark(Experiment):
 
         return sty, e_factor, {}
 
-    def _integrand(self, t, C, T):
+    def _integrand(self, t, C, T, C_i):
         # Kinetic Constants
         R = 8.314 / 1000  # kJ/K/mol
         T_ref = 90 + 273.71  # Convert to deg K
@@ -168,7 +169,7 @@ class SnarBenchmark(Experiment):
         # Reaction Rates
         r = np.zeros(5)
         for i in [0, 1]:  # Set to reactants when close
-            C[i] = 0 if C[i] < 1e-6 * self.C_i[i] else C[i]
+            C[i] = 0 if C[i] < 1e-6 * C_i[i] else C[i]
         r[0] = -(k_a + k_b) * C[0] * C[1]
         r[1] = -(k_a + k_b) * C[0] * C[1] - k_c * C[1] * C[2] - k_d * C[1] * C[3]
         r[2] = k_a * C[0] * C[1] - k_c * C[1] * C[2]
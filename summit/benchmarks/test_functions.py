@@ -86,6 +86,18 @@ class Himmelblau(Experiment):
 
         return conditions, None
 
+    def _run_batch(self, conditions, **kwargs):
+        x_1 = conditions["x_1"].to_numpy().astype(np.float64)
+        x_2 = conditions["x_2"].to_numpy().astype(np.float64)
+        y = eval(self.equation)
+        conditions = conditions.copy()
+        conditions[("y", "DATA")] = y
+
+        # save evaluated points for plotting
+        self.evaluated_points += np.column_stack([x_1, x_2]).tolist()
+
+        return conditions, None
+
     def plot(self, ax=None, **kwargs):
         """Make a plot of the experiments evaluated thus far
 
@@ -258,35 +270,35 @@ class Hartmann3D(Experiment):
 
         return domain
 
-    def _run(self, conditions, **kwargs):
-        def function_evaluation(x_1, x_2, x_3):
-            x_exp = np.asarray([x_1, x_2, x_3])
-            A = np.array([[3, 10, 30], [0.1, 10, 35], [3, 10, 30], [0.1, 10, 35]])
-            P = (
-                np.array(
-                    [
-                        [3689, 1170, 2673],
-                        [4699, 4387, 7470],
-                        [1091, 8732, 5547],
-                        [381, 5743, 8828],
-                    ]
-                )
-                * 10 ** (-4)
-            )
-            alpha = np.array([1, 1.2, 3.0, 3.2])
-            d = np.zeros((4, 1))
-            for k in range(4):
-                d[k] = np.sum(np.dot(A[k, :], (x_exp - P[k, :]) ** 2))
-            y = np.sum(np.dot(alpha, np.exp(-d))).T
-            if not self.maximize:
-                y = -y
-            return y
+    # Parameters of the Hartmann 3D function
+    A = np.array([[3, 10, 30], [0.1, 10, 35], [3, 10, 30], [0.1, 10, 35]])
+    P = (
+        np.array(
+            [
+                [3689, 1170, 2673],
+                [4699, 4387, 7470],
+                [1091, 8732, 5547],
+                [381, 5743, 8828],
+            ]
+        )
+        * 10 ** (-4)
+    )
+    alpha = np.array([1, 1.2, 3.0, 3.2])
+
+    def _evaluate(self, x):
+        """Evaluate the function at an (n, 3) array of points"""
+        d = np.sum(self.A * (x[:, np.newaxis, :] - self.P) ** 2, axis=2)
+        y = np.exp(-d) @ self.alpha
+        if not self.maximize:
+            y = -y
+        return y
 
+    def _run(self, conditions, **kwargs):
         x_1 = float(conditions["x_1"])
         x_2 = float(conditions["x_2"])
         x_3 = float(conditions["x_3"])
 
-        y = function_evaluation(x_1, x_2, x_3)
+        y = float(self._evaluate(np.array([[x_1, x_2, x_3]]))[0])
         conditions[("y", "DATA")] = y
 
         # save evaluated points for plotting
@@ -294,6 +306,17 @@ class Hartmann3D(Experiment):
 
         return conditions, None
 
+    def _run_batch(self, conditions, **kwargs):
+        x = conditions[["x_1", "x_2", "x_3"]].to_numpy().astype(np.float64)
+        y = self._evaluate(x)
+        conditions = conditions.copy()
+        conditions[("y", "DATA")] = y
+
+        # save evaluated points for plotting
+        self.evaluated_points += np.column_stack([x, y]).tolist()
+
+        return conditions, None
+
     def plot(self, ax=None, **kwargs):
         """Make a plot of the experiments evaluated thus far
 
@@ -476,6 +499,18 @@ class ThreeHumpCamel(Experiment):
 
         return conditions, None
 
+    def _run_batch(self, conditions, **kwargs):
+        x_1 = conditions["x_1"].to_numpy().astype(np.float64)
+        x_2 = conditions["x_2"].to_numpy().astype(np.float64)
+        y = eval(self.equation)
+        conditions = conditions.copy()
+        conditions[("y", "DATA")] = y
+
+        # save evaluated points for plotting
+        self.evaluated_points += np.column_stack([x_1, x_2]).tolist()
+
+        return conditions, None
+
     def plot(self, ax=None, **kwargs):
         """Make a plot of the experiments evaluated thus far
 
@@ -620,30 +655,47 @@ class DTLZ2(Experiment):
         ]
         return Domain(variables)
 
+    def _evaluate(self, x):
+        """Evaluate the objectives at an (n, nvars) array of points
+
+        Vectorized version of the DEAP implementation
+        https://github.com/DEAP/deap/blob/master/deap/benchmarks/__init__.py
+        """
+        nobjs = self.nobjs
+        xc = x[:, : nobjs - 1]
+        xm = x[:, nobjs - 1 :]
+        g = np.sum((xm - 0.5) ** 2, axis=1)
+        cos_xc = np.cos(0.5 * np.pi * xc)
+        f = np.empty((x.shape[0], nobjs))
+        f[:, 0] = (1.0 + g) * np.prod(cos_xc, axis=1)
+        for i, m in enumerate(range(nobjs - 2, -1, -1)):
+            f[:, i + 1] = (
+                (1.0 + g)
+                * np.prod(cos_xc[:, :m], axis=1)
+                * np.sin(0.5 * np.pi * xc[:, m])
+            )
+        return f
+
     def _run(self, conditions, **kwargs):
         # Convert from dataframe
         x = conditions[[f"x_{i}" for i in range(self.nvars)]]
         x = x.to_numpy().astype(np.float64)
         x = np.atleast_2d(x)
 
-        nobjs = self.nobjs
-        """Copied from DEAP"""
-        """https://github.com/DEAP/deap/blob/master/deap/benchmarks/__init__.py"""
-        for individual in x:
-            xc = individual[: nobjs - 1]
-            xm = individual[nobjs - 1 :]
-            g = sum((xi - 0.5) ** 2 for xi in xm)
-            f = [(1.0 + g) * reduce(mul, (cos(0.5 * xi * pi) for xi in xc), 1.0)]
-            f.extend(
-                (1.0 + g)
-                * reduce(mul, (cos(0.5 * xi * pi) for xi in xc[:m]), 1)
-                * sin(0.5 * xc[m] * pi)
-                for m in range(nobjs - 2, -1, -1)
-            )
+        f = self._evaluate(x)
 
         # Convert to dataset
-        for i in range(nobjs):
-            conditions[(f"y_{i}", "DATA")] = f[i]
+        for i in range(self.nobjs):
+            conditions[(f"y_{i}", "DATA")] = f[0, i]
+        return conditions, {}
+
+    def _run_batch(self, conditions, **kwargs):
+        x = conditions[[f"x_{i}" for i in range(self.nvars)]]
+        f = self._evaluate(x.to_numpy().astype(np.float64))
+
+        conditions = conditions.copy()
+        for i in range(self.nobjs):
+            conditions[(f"y_{i}", "DATA")] = f[:, i]
         return conditions, {}
 
 
@@ -671,20 +723,33 @@ class VLMOP2(Experiment):
         ]
         return Domain(variables)
 
+    def _evaluate(self, x):
+        """Evaluate the objectives at an (n, 2) array of points"""
+        transl = 1 / np.sqrt(2)
+        part1 = (x[:, [0]] - transl) ** 2 + (x[:, [1]] - transl) ** 2
+        part2 = (x[:, [0]] + transl) ** 2 + (x[:, [1]] + transl) ** 2
+        y1 = 1 - np.exp(-1 * part1)
+        y2 = 1 - np.exp(-1 * part2)
+        return np.hstack((y1, y2))
+
     def _run(self, conditions, **kwargs):
         # Convert from dataframe
         x = conditions[[f"x_{i}" for i in range(self.nvars)]]
         x = x.to_numpy().astype(np.float64)
         x = np.atleast_2d(x)
 
-        transl = 1 / np.sqrt(2)
-        part1 = (x[:, [0]] - transl) ** 2 + (x[:, [1]] - transl) ** 2
-        part2 = (x[:, [0]] + transl) ** 2 + (x[:, [1]] + transl) ** 2
-        y1 = 1 - np.exp(-1 * part1)
-        y2 = 1 - np.exp(-1 * part2)
-        f = np.hstack((y1, y2))
+        f = self._evaluate(x)
 
         # Convert to dataset
         for i in range(self.nobjs):
-            conditions[(f"y_{i}", "DATA")] = f[:, i][0]
+            conditions[(f"y_{i}", "DATA")] = f[0, i]
+        return conditions, {}
+
+    def _run_batch(self, conditions, **kwargs):
+        x = conditions[[f"x_{i}" for i in range(self.nvars)]]
+        f = self._evaluate(x.to_numpy().astype(np.float64))
+
+        conditions = conditions.copy()
+        for i in range(self.nobjs):
+            conditions[(f"y_{i}", "DATA")] = f[:, i]
         return conditions, {}
@@ -1,9 +1,13 @@
 from summit.utils.dataset import DataSet
 import numpy as np
 import pandas as pd
+from scipy.spatial import cKDTree
 from typing import List, Optional, Type, Dict
 from abc import ABC, abstractmethod
+import ast
 import json
+import operator
+import sys
 from copy import deepcopy
 
 __all__ = [
@@ -11,6 +15,7 @@ __all__ = [
     "ContinuousVariable",
     "CategoricalVariable",
     "Constraint",
+    "CompiledConstraints",
     "Domain",
     "DomainError",
 ]
@@ -291,6 +296,10 @@ class CategoricalVariable(Variable):
         if len(self._levels) != len(set(self._levels)):
             raise ValueError("Levels must have unique values.")
 
+        # Arrays derived from the levels and descriptors, built on demand
+        self._cache = {}
+        self._cache_ds = None
+
     @property
     def levels(self) -> np.ndarray:
         """`numpy.ndarray`: Potential values of the discrete variable"""
@@ -306,6 +315,192 @@ class CategoricalVariable(Variable):
         if self.ds is not None:
             return len(self.ds.data_columns)
 
+    @property
+    def level_index(self) -> dict:
+        """dict: The position of each level in `levels`"""
+        return self._cached(
+            "level_index", lambda: {level: i for i, level in enumerate(self._levels)}
+        )
+
+    @property
+    def one_hot_matrix(self) -> np.ndarray:
+        """`numpy.ndarray`: Read-only one-hot encoding of each level (num_levels, num_levels)"""
+        return self._cached(
+            "one_hot_matrix", lambda: _read_only(np.eye(self.num_levels))
+        )
+
+    @property
+    def descriptor_matrix(self) -> np.ndarray:
+        """`numpy.ndarray`: Read-only descriptors of each row of `ds` (rows, num_descriptors)
+
+        The matrix is built once and cached. Like the other cached arrays, it is
+        rebuilt when `ds` is replaced or levels are added or removed, but not when
+        `ds` is modified in place.
+        """
+        self._check_descriptors()
+        return self._cached(
+            "descriptor_matrix",
+            lambda: _read_only(
+                np.column_stack(
+                    [
+                        self.ds[name].to_numpy(dtype=float)
+                        for name in self.ds.data_columns
+                    ]
+                )
+            ),
+        )
+
+    @property
+    def descriptor_index(self) -> dict:
+        """dict: The row of `descriptor_matrix` of each label in the index of `ds`"""
+        self._check_descriptors()
+        return self._cached(
+            "descriptor_index", lambda: {l: i for i, l in enumerate(self.ds.index)}
+        )
+
+    @property
+    def descriptor_bounds(self):
+        """tuple of `numpy.ndarray`: The minimum and maximum of each descriptor"""
+        return self._cached(
+            "descriptor_bounds",
+            lambda: (
+                _read_only(self.descriptor_matrix.min(axis=0)),
+                _read_only(self.descriptor_matrix.max(axis=0)),
+            ),
+        )
+
+    def get_descriptors(self, levels) -> np.ndarray:
+        """Get the descriptors of levels
+
+        Parameters
+        ----------
+        levels : array-like
+            Labels in the index of `ds`.
+
+        Returns
+        -------
+        descriptors : numpy.ndarray
+            An (n, num_descriptors) array.
+
+        Raises
+        ------
+        ValueError
+            If the variable has no descriptors or a level is not in `ds`.
+
+        Examples
+        --------
+        >>> solvent_df = DataSet([[5, 81],[-93, 111]], index=['benzene', 'toluene'], columns=['melting_point', 'boiling_point'])
+        >>> solvent = CategoricalVariable('solvent', 'solvent descriptors', descriptors=solvent_df)
+        >>> solvent.get_descriptors(['toluene', 'toluene', 'benzene'])
+        array([[-93., 111.],
+               [-93., 111.],
+               [  5.,  81.]])
+
+        """
+        self._check_descriptors()
+        labels = self._cached("descriptor_labels", lambda: pd.Index(self.ds.index))
+        levels = np.asarray(levels, dtype=object).ravel()
+        rows = labels.get_indexer(levels)
+        if np.any(rows < 0):
+            unknown = np.unique(levels[rows < 0]).tolist()
+            raise ValueError(
+                f"Levels {unknown} of {self.name} are not in the descriptors."
+            )
+        return self.descriptor_matrix[rows]
+
+    def nearest_levels(self, descriptors, scaling=None):
+        """Find the levels whose descriptors are closest to given points
+
+        The descriptors of all rows of the descriptors DataSet are put in a KD-tree
+        the first time it is needed, so every batch of points is snapped with one
+        vectorized query. The tree is rebuilt if `ds` is replaced, but not if it is
+        modified in place. Ties, up to rounding errors, are broken in favour of the
+        first level.
+
+        Parameters
+        ----------
+        descriptors : array-like
+            An (n, num_descriptors) array of points in descriptor space.
+        scaling : str, optional
+            Divide each descriptor by its standard deviation ("standard") or range
+            ("range") before computing Euclidean distances, so descriptors with
+            large units do not dominate. Default is None (unscaled distances).
+
+        Returns
+        -------
+        levels : numpy.ndarray
+            The closest level to each point.
+
+        Raises
+        ------
+        ValueError
+            If the variable has no descriptors or the scaling is unknown.
+
+        Examples
+        --------
+        >>> solvent_df = DataSet([[5, 81],[-93, 111]], index=['benzene', 'toluene'], columns=['melting_point', 'boiling_point'])
+        >>> solvent = CategoricalVariable('solvent', 'solvent descriptors', descriptors=solvent_df)
+        >>> solvent.nearest_levels([[0, 90], [-80, 100]])
+        array(['benzene', 'toluene'], dtype=object)
+
+        """
+        self._check_descriptors()
+        tree, scale = self._descriptor_tree(scaling)
+        points = np.atleast_2d(np.asarray(descriptors, dtype=float)) / scale
+        index = self._cached(
+            "descriptor_labels_array", lambda: np.asarray(self.ds.index, dtype=object)
+        )
+        if points.shape[0] == 0:
+            return index[:0]
+        k = min(2, tree.n)
+        distances, indices = tree.query(points, k=k)
+        if k == 2:
+            # Points with several equally close levels (up to rounding) are resolved
+            # by brute force, so the first of them is chosen
+            ties = np.flatnonzero(distances[:, 1] <= distances[:, 0] * (1 + 1e-9))
+            indices = indices[:, 0]
+            if ties.shape[0] > 0:
+                squared_distances = (
+                    (points[ties, np.newaxis, :] - tree.data[np.newaxis, :, :]) ** 2
+                ).sum(axis=2)
+                closest = squared_distances.min(axis=1, keepdims=True)
+                indices[ties] = np.argmax(
+                    squared_distances <= closest * (1 + 1e-9), axis=1
+                )
+        return index[indices]
+
+    def _descriptor_tree(self, scaling):
+        def build():
+            X = self.descriptor_matrix
+            if scaling is None:
+                scale = np.ones(X.shape[1])
+            elif scaling == "standard":
+                scale = X.std(axis=0)
+            elif scaling == "range":
+                scale = X.max(axis=0) - X.min(axis=0)
+            else:
+                raise ValueError(
+                    f"Unknown scaling {scaling}. Use None, 'standard' or 'range'."
+                )
+            scale[scale == 0] = 1.0
+            return cKDTree(X / scale), scale
+
+        return self._cached(("descriptor_tree", scaling), build)
+
+    def _cached(self, key, build):
+        if self._cache_ds is not self.ds:
+            self._cache = {}
+            self._cache_ds = self.ds
+        value = self._cache.get(key)
+        if value is None:
+            value = build()
+            self._cache[key] = value
+        return value
+
+    def _check_descriptors(self):
+        if self.ds is None:
+            raise ValueError(f"Variable {self.name} does not have descriptors.")
+
     def add_level(self, level):
         """Add a level to the discrete variable
 
@@ -322,6 +517,7 @@ class CategoricalVariable(Variable):
         if level in self._levels:
             raise ValueError("Levels must have unique values.")
         self._levels.append(level)
+        self._cache = {}
 
     def remove_level(self, level):
         """Add a level to the discrete variable
@@ -340,9 +536,10 @@ class CategoricalVariable(Variable):
             self._levels.remove(level)
         except ValueError:
             raise ValueError(f"Level {level} is not in the list of levels.")
+        self._cache = {}
 
     def to_dict(self):
-        """ Return json encoding of the variable"""
+        """Return json encoding of the variable"""
         variable_dict = super().to_dict()
         ds = self.ds.to_dict() if self.ds is not None else None
         variable_dict.update(dict(levels=self.levels, ds=ds))
@@ -365,6 +562,11 @@ class CategoricalVariable(Variable):
         return self._make_html_table_rows(f"{self.num_levels} levels")
 
 
+def _read_only(a):
+    a.setflags(write=False)
+    return a
+
+
 class Constraint:
     """A constraint for an optimization domain
 
@@ -409,6 +611,65 @@ class Constraint:
     def constraint_type(self):
         return self._constraint_type
 
+    @property
+    def names(self):
+        """The variable names used in the left hand side"""
+        return self._parse()[1]
+
+    @property
+    def linear_terms(self):
+        """The coefficients and constant of a linear left hand side
+
+        Returns
+        -------
+        terms : tuple or None
+            A dictionary from variable names to coefficients and the constant
+            term, or None if the left hand side is not linear.
+
+        Examples
+        --------
+        >>> Constraint("2*x - (y - 3)/2").linear_terms
+        ({'x': 2.0, 'y': -0.5}, 1.5)
+        >>> Constraint("x*y").linear_terms is None
+        True
+
+        """
+        return self._parse()[2]
+
+    def _parse(self):
+        parsed = getattr(self, "_parsed", None)
+        if parsed is None:
+            try:
+                tree = ast.parse(self.lhs.strip(), mode="eval")
+            except SyntaxError as e:
+                raise ValueError(f"Cannot parse constraint {self.lhs}: {e}")
+            names = []
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Call):
+                    func = node.func
+                    if not (isinstance(func, ast.Name) and func.id in _FUNCTIONS):
+                        raise ValueError(
+                            f"Unsupported function in constraint {self.lhs}."
+                        )
+                elif isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+                    names.append(node)
+                elif not isinstance(node, _NODES):
+                    raise ValueError(
+                        f"Unsupported expression {type(node).__name__} in constraint {self.lhs}."
+                    )
+            # Names in the order they appear in the left hand side
+            names.sort(key=lambda node: node.col_offset)
+            names = list(dict.fromkeys(node.id for node in names))
+            code = compile(tree, "<constraint>", "eval")
+            parsed = self._parsed = (code, names, _linear_terms(tree.body))
+        return parsed
+
+    def __getstate__(self):
+        # Code objects cannot be pickled, so the left hand side is parsed again
+        state = self.__dict__.copy()
+        state.pop("_parsed", None)
+        return state
+
     def _html_table_rows(self):
         columns = []
         columns.append("")  # name column
@@ -419,6 +680,309 @@ class Constraint:
         return f"<tr>{html}</tr>"
 
 
+# Functions that can be used in nonlinear constraints (the same as in `pandas.eval`)
+_FUNCTIONS = {
+    name: getattr(np, name)
+    for name in [
+        "sin",
+        "cos",
+        "tan",
+        "exp",
+        "expm1",
+        "log",
+        "log10",
+        "log1p",
+        "sqrt",
+        "sinh",
+        "cosh",
+        "tanh",
+        "arcsin",
+        "arccos",
+        "arctan",
+        "arcsinh",
+        "arccosh",
+        "arctanh",
+        "arctan2",
+        "abs",
+    ]
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+
+# Numbers are parsed as ast.Num before Python 3.8
+_NUMBER = ast.Constant if sys.version_info >= (3, 8) else ast.Num
+
+# The syntax allowed in the left hand side of constraints
+_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Name,
+    ast.Load,
+    ast.operator,
+    ast.unaryop,
+    _NUMBER,
+)
+
+_COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _linear_terms(node):
+    """Return (coefficients, constant) of a linear expression or None"""
+    if isinstance(node, _NUMBER):
+        value = node.value if sys.version_info >= (3, 8) else node.n
+        return ({}, float(value)) if type(value) in (int, float) else None
+    elif isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+        return {node.id: 1.0}, 0.0
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        terms = _linear_terms(node.operand)
+        if terms is None or isinstance(node.op, ast.UAdd):
+            return terms
+        return _scale_terms(terms, -1.0)
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left, right = _linear_terms(node.left), _linear_terms(node.right)
+        if left is None or right is None:
+            return None
+        op = _BINARY_OPERATORS[type(node.op)]
+        if not left[0] and not right[0]:
+            try:
+                return {}, float(op(left[1], right[1]))
+            except (ZeroDivisionError, OverflowError):
+                return None
+        elif isinstance(node.op, (ast.Add, ast.Sub)):
+            sign = 1.0 if isinstance(node.op, ast.Add) else -1.0
+            coefficients = dict(left[0])
+            for name, coefficient in right[0].items():
+                coefficients[name] = coefficients.get(name, 0.0) + sign * coefficient
+            return coefficients, left[1] + sign * right[1]
+        elif isinstance(node.op, ast.Mult) and not left[0]:
+            return _scale_terms(right, left[1])
+        elif isinstance(node.op, ast.Mult) and not right[0]:
+            return _scale_terms(left, right[1])
+        elif isinstance(node.op, ast.Div) and not right[0] and right[1] != 0:
+            return _scale_terms(left, 1.0 / right[1])
+    return None
+
+
+def _scale_terms(terms, factor):
+    coefficients, constant = terms
+    return {k: factor * c for k, c in coefficients.items()}, factor * constant
+
+
+class CompiledConstraints:
+    """Constraints of a domain compiled for fast evaluation of many points
+
+    Linear constraints are stored in matrix form, so that the left hand sides
+    of all linear constraints for a batch of points are a single matrix product.
+    The left hand side of each nonlinear constraint is compiled once into a
+    vectorized NumPy function. Use :meth:`Domain.compile_constraints` to create
+    and cache compiled constraints.
+
+    The points can be in a transformed space with coordinates z, which are
+    related to the units of the variables by x = offset + scale * z. In this case,
+    the linear constraints are transformed, so that they apply to z directly.
+
+    Parameters
+    ----------
+    constraints : list of :class:`~summit.domain.Constraint`
+        The constraints to compile.
+    columns : list of str
+        The name of each column of the points.
+    offset : array-like, optional
+        The offset of each column. Default is zero.
+    scale : array-like, optional
+        The scale of each column. Default is one.
+
+    Attributes
+    ----------
+    A : np.ndarray
+        The coefficients of the linear constraints (n_linear, n_columns).
+    b : np.ndarray
+        The constant terms of the linear constraints (n_linear,).
+    sense : list of str
+        The type of each linear constraint, so that the i-th constraint is
+        `A[i] @ z + b[i] sense[i] 0`.
+    linear : list of int
+        The index of each linear constraint in `constraints`.
+    nonlinear : list of int
+        The index of each nonlinear constraint in `constraints`.
+
+    Raises
+    ------
+    DomainError
+        If a constraint uses a name that is not a column.
+
+    Examples
+    --------
+    >>> constraints = [Constraint("x + 2*y - 3"), Constraint("x*y - 1", ">=")]
+    >>> compiled = CompiledConstraints(constraints, columns=["x", "y"])
+    >>> compiled.A, compiled.b, compiled.sense
+    (array([[1., 2.]]), array([-3.]), ['<='])
+    >>> compiled.is_feasible(np.array([[1.0, 1.0], [2.0, 2.0]]))
+    array([ True, False])
+
+    """
+
+    def __init__(self, constraints, columns, offset=None, scale=None):
+        self.constraints = list(constraints)
+        self.columns = list(columns)
+        n = len(self.columns)
+        self.offset = np.zeros(n) if offset is None else np.asarray(offset, float)
+        self.scale = np.ones(n) if scale is None else np.asarray(scale, float)
+        column_index = {name: j for j, name in enumerate(self.columns)}
+
+        self.linear, self.nonlinear = [], []
+        A, b = [], []
+        for i, c in enumerate(self.constraints):
+            missing = [name for name in c.names if name not in column_index]
+            if missing:
+                raise DomainError(
+                    f"Constraint {c.lhs} uses {missing}, which are not in the columns {self.columns}."
+                )
+            terms = c.linear_terms
+            if terms is None:
+                self.nonlinear.append(i)
+                continue
+            coefficients, constant = terms
+            a = np.zeros(n)
+            for name, coefficient in coefficients.items():
+                a[column_index[name]] = coefficient
+            self.linear.append(i)
+            # a @ (offset + scale * z) + constant = (a * scale) @ z + a @ offset + constant
+            A.append(a * self.scale)
+            b.append(a @ self.offset + constant)
+        self.A = np.array(A, dtype=float).reshape(len(A), n)
+        self.b = np.array(b, dtype=float)
+        self._vectorize_nonlinear()
+        self.sense = [self.constraints[i].constraint_type for i in self.linear]
+        self._order = np.argsort(self.linear + self.nonlinear)
+
+        # Group the constraints by type, so each type is checked once
+        types = [c.constraint_type for c in self.constraints]
+        self._groups = [
+            (_COMPARISONS[t], np.where(np.array(types) == t)[0])
+            for t in _COMPARISONS
+            if t in types
+        ]
+
+    def __getstate__(self):
+        # The vectorized functions cannot be pickled, so they are built again
+        state = self.__dict__.copy()
+        state.pop("_functions", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._vectorize_nonlinear()
+
+    def _vectorize_nonlinear(self):
+        column_index = {name: j for j, name in enumerate(self.columns)}
+        self._functions = [
+            self._vectorize(self.constraints[i], column_index) for i in self.nonlinear
+        ]
+
+    def _vectorize(self, constraint, column_index):
+        code = constraint._parse()[0]
+        columns = [(name, column_index[name]) for name in constraint.names]
+        offset, scale = self.offset, self.scale
+
+        def function(Z):
+            namespace = dict(_FUNCTIONS)
+            for name, j in columns:
+                namespace[name] = offset[j] + scale[j] * Z[:, j]
+            return eval(code, {"__builtins__": {}}, namespace)
+
+        return function
+
+    def __len__(self):
+        return len(self.constraints)
+
+    def evaluate(self, Z):
+        """Evaluate the left hand sides of the constraints
+
+        Parameters
+        ----------
+        Z : array-like
+            An (n_points, n_columns) array of points.
+
+        Returns
+        -------
+        lhs : np.ndarray
+            An (n_points, n_constraints) array with the left hand sides in the
+            order of the constraints.
+
+        """
+        Z = np.atleast_2d(np.asarray(Z, dtype=float))
+        values = Z @ self.A.T
+        values += self.b
+        if self.nonlinear:
+            nonlinear = np.empty((Z.shape[0], len(self.nonlinear)))
+            for k, function in enumerate(self._functions):
+                nonlinear[:, k] = function(Z)
+            values = np.concatenate([values, nonlinear], axis=1)
+            values = values[:, self._order]
+        return values
+
+    def violation(self, Z):
+        """The amount by which each constraint is violated
+
+        The result is positive for violated constraints and zero or negative
+        otherwise, which is the convention of `pymoo`. Strict inequalities are
+        treated like non-strict inequalities.
+
+        Parameters
+        ----------
+        Z : array-like
+            An (n_points, n_columns) array of points.
+
+        Returns
+        -------
+        G : np.ndarray
+            An (n_points, n_constraints) array.
+
+        """
+        G = self.evaluate(Z)
+        for i, c in enumerate(self.constraints):
+            if c.constraint_type in (">", ">="):
+                G[:, i] *= -1
+            elif c.constraint_type == "==":
+                np.abs(G[:, i], out=G[:, i])
+        return G
+
+    def is_feasible(self, Z):
+        """Check which points satisfy all constraints
+
+        Parameters
+        ----------
+        Z : array-like
+            An (n_points, n_columns) array of points.
+
+        Returns
+        -------
+        mask : np.ndarray
+            A boolean array that is True for the points that satisfy all
+            constraints.
+
+        """
+        values = self.evaluate(Z)
+        mask = np.ones(values.shape[0], dtype=bool)
+        for compare, indices in self._groups:
+            mask &= compare(values[:, indices], 0).all(axis=1)
+        return mask
+
+
 class Domain:
     """Representation of the optimization domain
 
@@ -471,6 +1035,7 @@ class Domain:
 
         self._variables = variables
         self._constraints = constraints
+        self._compiled_constraints = {}
         # Check that all the output variables continuous
         # self._raise_noncontinuous_outputs()
         self._raise_names_not_unique()
@@ -580,6 +1145,85 @@ class Domain:
                     k += v.num_descriptors
         return k
 
+    def compile_constraints(self, columns=None, offset=None, scale=None):
+        """Compile the constraints into matrix form
+
+        Constraints in the units of the variables are cached, so they are only
+        built the first time they are requested for a set of columns. Constraints
+        with an offset or scale are not cached, since these usually change with
+        the data (e.g., at every iteration of a strategy).
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            The name of each column of the points that will be checked.
+            Defaults to the names of the input variables.
+        offset : array-like, optional
+            The offset of each column in the units of the variables.
+        scale : array-like, optional
+            The scale of each column, so that a point z in the space of a strategy
+            is `offset + scale * z` in the units of the variables.
+
+        Returns
+        -------
+        compiled : :class:`~summit.domain.CompiledConstraints`
+
+        Examples
+        --------
+        >>> domain = Domain()
+        >>> domain += ContinuousVariable("x", "", bounds=[0, 10])
+        >>> domain += ContinuousVariable("y", "", bounds=[0, 10])
+        >>> domain += Constraint("x + y - 10")
+        >>> compiled = domain.compile_constraints(offset=[0, 0], scale=[10, 10])
+        >>> compiled.A, compiled.b
+        (array([[10., 10.]]), array([-10.]))
+
+        """
+        if columns is None:
+            columns = [v.name for v in self.input_variables]
+        if offset is not None or scale is not None:
+            return CompiledConstraints(
+                self.constraints, columns, offset=offset, scale=scale
+            )
+        key = (
+            tuple(columns),
+            tuple((c.lhs, c.constraint_type) for c in self.constraints),
+        )
+        compiled = self._compiled_constraints.get(key)
+        if compiled is None:
+            compiled = CompiledConstraints(self.constraints, columns)
+            self._compiled_constraints[key] = compiled
+        return compiled
+
+    def check_constraints(self, ds):
+        """Check which experiments satisfy all constraints
+
+        Parameters
+        ----------
+        ds : :class:`~summit.utils.dataset.DataSet`
+            Experiments with a column for each variable used in the constraints.
+
+        Returns
+        -------
+        mask : np.ndarray
+            A boolean array that is True for the experiments that satisfy all
+            constraints.
+
+        """
+        if not self.constraints:
+            return np.ones(len(ds), dtype=bool)
+        names = []
+        for c in self.constraints:
+            names += [name for name in c.names if name not in names]
+        compiled = self.compile_constraints(names)
+        X = np.column_stack(
+            [
+                np.asarray(ds[name], dtype=float).reshape(len(ds), -1)[:, 0]
+                for name in names
+            ]
+        )
+        return compiled.is_feasible(X)
+
     def to_dict(self):
         """Return a dictionary representation of the domain"""
         return [variable.to_dict() for variable in self.variables]
@@ -660,6 +1304,12 @@ class Domain:
     def copy(self):
         return deepcopy(self)
 
+    def __getstate__(self):
+        # Compiled constraints are rebuilt when needed rather than pickled
+        state = self.__dict__.copy()
+        state["_compiled_constraints"] = {}
+        return state
+
 
 class DomainError(Exception):
     pass
@@ -9,6 +9,7 @@ from matplotlib.colors import ListedColormap, LinearSegmentedColormap
 import pandas as pd
 import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 COLORS = [
     (165, 0, 38),
@@ -39,7 +40,10 @@ class Experiment(ABC):
     -----
 
     Developers that subclass `Experiment` need to implement
-    `_run`, which runs the experiments.
+    `_run`, which runs the experiments. Subclasses that can evaluate
+    a whole batch of conditions at once (e.g., with vectorized NumPy code)
+    can also implement `_run_batch`, which will then be used instead of
+    calling `_run` once per row.
 
     """
 
@@ -55,10 +59,27 @@ class Experiment(ABC):
     @property
     def data(self):
         """Datast of all experiments run"""
-        self._data = self._data.reset_index(drop=True)
-        return self._data
+        if self._data_cache is None:
+            self._data_cache = self._log.to_dataset()
+        return self._data_cache
 
-    def run_experiments(self, conditions, computation_time=None, **kwargs):
+    @property
+    def _data(self):
+        return self.data
+
+    @_data.setter
+    def _data(self, ds):
+        self._log = _ColumnarLog.from_dataset(ds, self._column_dtypes())
+        self._data_cache = None
+
+    def run_experiments(
+        self,
+        conditions,
+        computation_time=None,
+        executor=None,
+        max_workers=None,
+        **kwargs,
+    ):
         """Run the experiment(s) at the given conditions
 
         Parameters
@@ -70,6 +91,24 @@ class Experiment(ABC):
         computation_time: float, optional
             The time used by the strategy in calculating the next experiments.
             By default, the time since the last call to run_experiment is used.
+        executor: str or concurrent.futures.Executor, optional
+            Run the experiments in parallel. Can be "thread" for a thread pool,
+            "process" for a process pool or an existing `concurrent.futures.Executor`.
+            Results are always returned in the same order as `conditions`. By default,
+            the experiments are run sequentially.
+        max_workers: int, optional
+            The number of workers used when `executor` is "thread" or "process".
+            Defaults to the `concurrent.futures` default.
+
+        Notes
+        -----
+        If the subclass implements `_run_batch`, the whole batch is run in one call
+        and `executor` is ignored. The experiment time of each row is then the
+        time of the batch divided by the number of rows.
+
+        With a process pool, each experiment is run on a copy of the experiment object,
+        so any state that `_run` changes on `self` (e.g., random number generators or
+        points stored for plotting) is not updated in the calling process.
 
         """
         # Bookeeping for time used by strategy when suggesting next experiment
@@ -81,20 +120,80 @@ class Experiment(ABC):
             diff = 0
 
         # Run experiments
-        # TODO: Add an option to run these in parallel
-        for i, condition in conditions.iterrows():
+        if self._implements_run_batch() and len(conditions) > 0:
             start = time.time()
-            res, extras = self._run(condition, **kwargs)
+            res, extras = self._run_batch(conditions, **kwargs)
+            experiment_time = (time.time() - start) / len(conditions)
+            experiment_times = len(conditions) * [experiment_time]
+            if not isinstance(extras, list):
+                extras = len(conditions) * [extras]
+        else:
+            rows = [condition for _, condition in conditions.iterrows()]
+            if executor is None:
+                results = [self._run_timed(condition, **kwargs) for condition in rows]
+            elif isinstance(executor, str):
+                with _make_executor(executor, max_workers) as pool:
+                    results = self._run_parallel(pool, rows, **kwargs)
+            else:
+                results = self._run_parallel(executor, rows, **kwargs)
+            res = [r[0] for r in results]
+            extras = [r[1] for r in results]
+            experiment_times = [r[2] for r in results]
             # res = add_metadata_columns(res, conditions[conditions.metadata_columns])
-            experiment_time = time.time() - start
-            self._data = self._data.append(res)
-            self._data["experiment_t"].iat[-1] = float(experiment_time)
-            self._data["computation_t"].iat[-1] = float(diff)
-            if condition.get("strategy") is not None:
-                self._data["strategy"].iat[-1] = condition.get("strategy").values[0]
-            self.extras.append(extras)
+
+        new_data = self._add_results(conditions, res, extras, experiment_times, diff)
         self.prev_itr_time = time.time()
-        return self._data.iloc[-len(conditions) :]
+        return new_data
+
+    def _add_results(self, conditions, res, extras, experiment_times, computation_time):
+        """Add results of experiments to the data
+
+        Parameters
+        ----------
+        conditions: summit.utils.dataset.DataSet
+            The conditions that were run
+        res: summit.utils.dataset.DataSet or list of pandas.Series
+            The results as a DataSet or a list of rows from `_run`
+        extras: list
+            Extra information about each experiment
+        experiment_times: float or list of float
+            The time taken by each experiment
+        computation_time: float
+            The time used by the strategy to suggest the conditions
+
+        Returns
+        -------
+        A DataSet with the newly added rows
+
+        """
+        n_prev = len(self._log)
+        if isinstance(res, DataSet):
+            self._log.append_dataset(res)
+        else:
+            self._log.append_rows(res)
+
+        # Bookkeeping columns for the new rows
+        self._log.set(("experiment_t", "METADATA"), n_prev, experiment_times)
+        self._log.set(("computation_t", "METADATA"), n_prev, float(computation_time))
+        if "strategy" in conditions.columns.get_level_values(0):
+            strategies = conditions["strategy"].to_numpy()
+            self._log.set(("strategy", "METADATA"), n_prev, strategies)
+        self.extras += extras
+        self._data_cache = None
+        return self._log.to_dataset(start=n_prev)
+
+    def _implements_run_batch(self):
+        return type(self)._run_batch is not Experiment._run_batch
+
+    def _run_timed(self, condition, **kwargs):
+        start = time.time()
+        res, extras = self._run(condition, **kwargs)
+        return res, extras, time.time() - start
+
+    def _run_parallel(self, executor, rows, **kwargs):
+        futures = [executor.submit(self._run_timed, row, **kwargs) for row in rows]
+        # Gather in submission order so results line up with the conditions
+        return [future.result() for future in futures]
 
     @abstractmethod
     def _run(self, conditions, **kwargs):
@@ -117,6 +216,30 @@ class Experiment(ABC):
 
         raise NotImplementedError("_run be implemented by subclasses of Experiment")
 
+    def _run_batch(self, conditions, **kwargs):
+        """Run a batch of experiments at the specified conditions.
+
+        This is optional. If implemented by a subclass, it is used by
+        `run_experiments` instead of calling `_run` for each row.
+
+        Arguments
+        ---------
+        conditions: summit.utils.dataset.Dataset
+            A dataset with columns matching the variables in the domain
+            of the experiments to run.
+
+        Returns
+        -------
+        res, extras
+            Should return a tuple where the first element is the
+            DataSet with the conditions and results for every row.  The second
+            element is either a list of dictionaries with extra parameters
+            to store about each run or a single dictionary used for all rows.
+        """
+        raise NotImplementedError(
+            "_run_batch is not implemented by this subclass of Experiment"
+        )
+
     def reset(self):
         """Reset the experiment
 
@@ -124,27 +247,28 @@ class Experiment(ABC):
 
         """
         self.prev_itr_time = None
-        columns = [var.name for var in self.domain.variables]
+        columns = [(var.name, "DATA") for var in self.domain.variables]
         md_columns = ["computation_t", "experiment_t", "strategy"]
-        columns += md_columns
-        self._data = DataSet(columns=columns, metadata_columns=md_columns)
+        columns += [(c, "METADATA") for c in md_columns]
+        self._log = _ColumnarLog(columns, self._column_dtypes())
+        self._data_cache = None
         self.extras = []
 
+    def _column_dtypes(self):
+        """Continuous variables are stored as floats and everything else as objects"""
+        return {
+            (v.name, "DATA"): np.float64
+            for v in self.domain.variables
+            if v.variable_type == "continuous"
+        }
+
     def to_dict(self, **experiment_params):
         """Serialize the class to a dictionary
 
         Subclasses can add a experiment_params dictionary
         key with custom parameters for the experiment
         """
-        extras = []
-
-        for e in self.extras:
-            if type(e) == dict:
-                extras.append(jsonify_dict(e))
-            if type(e) == np.ndarray:
-                extras.append(e.tolist())
-            else:
-                extras.append(e)
+        extras = _jsonify_extras(self.extras)
 
         return dict(
             domain=self.domain.to_dict(),
@@ -160,13 +284,7 @@ class Experiment(ABC):
         experiment_params = d.get("experiment_params", {})
         exp = cls(domain=domain, **experiment_params)
         exp._data = DataSet.from_dict(d["data"])
-        for e in d["extras"]:
-            if type(e) == dict:
-                exp.extras.append(unjsonify_dict(e))
-            elif type(e) == list:
-                exp.extras.append(np.array(e))
-            else:
-                exp.extras.append(e)
+        exp.extras += _unjsonify_extras(d["extras"])
         return exp
 
     def pareto_plot(self, objectives=None, colorbar=False, ax=None):
@@ -201,7 +319,7 @@ class Experiment(ABC):
         if len(objectives) != 2:
             raise ValueError("Can only plot 2 objectives")
 
-        data = self._data[objectives].copy()
+        data = self.data[objectives].copy()
 
         # Handle minimize objectives
         for objective in objectives:
@@ -263,6 +381,147 @@ class Experiment(ABC):
             return ax
 
 
+class _ColumnarLog:
+    """Append-only columnar storage for experiment data
+
+    Each column is kept in its own NumPy array, which is grown geometrically
+    so appending a batch of rows is amortized O(batch size) instead of
+    copying the whole history like `DataFrame.append`.
+
+    Parameters
+    ----------
+    columns: list of tuples
+        The (name, type) of each column in order.
+    dtypes: dict, optional
+        Mapping of column to NumPy dtype. Columns not in the dictionary
+        are stored in object arrays.
+    capacity: int, optional
+        The initial number of rows to allocate. Default is 16.
+
+    """
+
+    def __init__(self, columns, dtypes=None, capacity=16):
+        self.dtypes = dtypes if dtypes is not None else {}
+        self.columns = []
+        self._arrays = {}
+        self._n = 0
+        self._capacity = capacity
+        self._index = None
+        for column in columns:
+            self._add_column(column)
+
+    def __len__(self):
+        return self._n
+
+    def _add_column(self, column):
+        dtype = self.dtypes.get(column, object)
+        array = np.empty(self._capacity, dtype=dtype)
+        array.fill(np.nan)
+        self.columns.append(column)
+        self._arrays[column] = array
+        self._index = None
+
+    def _reserve(self, n_new):
+        required = self._n + n_new
+        if required <= self._capacity:
+            return
+        capacity = max(required, 2 * self._capacity)
+        for column, array in self._arrays.items():
+            new_array = np.empty(capacity, dtype=array.dtype)
+            new_array.fill(np.nan)
+            new_array[: self._n] = array[: self._n]
+            self._arrays[column] = new_array
+        self._capacity = capacity
+
+    def append(self, values, n_new):
+        """Append n_new rows given as a mapping of column to values"""
+        self._reserve(n_new)
+        for column in values:
+            if column not in self._arrays:
+                self._add_column(column)
+                self._reserve(n_new)
+        for column, array in self._arrays.items():
+            if column in values:
+                array[self._n : self._n + n_new] = values[column]
+        self._n += n_new
+
+    def append_rows(self, rows):
+        """Append a list of pandas Series, one per row"""
+        values = {}
+        for i, row in enumerate(rows):
+            for column, value in row.items():
+                values.setdefault(column, [np.nan] * len(rows))[i] = value
+        self.append(values, len(rows))
+
+    def append_dataset(self, ds):
+        """Append all the rows of a DataSet"""
+        values = {column: ds[column].to_numpy() for column in ds.columns}
+        self.append(values, len(ds))
+
+    def set(self, column, start, values):
+        """Set the values of a column from row `start` to the end"""
+        if column not in self._arrays:
+            self._add_column(column)
+        self._arrays[column][start : self._n] = values
+
+    def to_dataset(self, start=0):
+        """Build a DataSet from the stored rows, optionally starting at row `start`"""
+        if self._index is None:
+            self._index = pd.MultiIndex.from_tuples(
+                self.columns, names=["NAME", "TYPE"]
+            )
+        # Integer keys avoid pandas building an index from the column tuples.
+        # Columns are copied, so changing the DataSet cannot change the log.
+        data = {
+            i: self._arrays[c][start : self._n].copy()
+            for i, c in enumerate(self.columns)
+        }
+        ds = DataSet(data, index=pd.RangeIndex(start, self._n))
+        ds.columns = self._index
+        return ds
+
+    @classmethod
+    def from_dataset(cls, ds, dtypes=None):
+        log = cls([tuple(c) for c in ds.columns], dtypes, capacity=max(len(ds), 16))
+        log.append_dataset(ds)
+        return log
+
+
+def _jsonify_extras(extras):
+    jsonified = []
+    for e in extras:
+        if type(e) == dict:
+            jsonified.append(jsonify_dict(e))
+        elif type(e) == np.ndarray:
+            jsonified.append(e.tolist())
+        else:
+            jsonified.append(e)
+    return jsonified
+
+
+def _unjsonify_extras(extras):
+    unjsonified = []
+    for e in extras:
+        if type(e) == dict:
+            unjsonified.append(unjsonify_dict(e))
+        elif type(e) == list:
+            unjsonified.append(np.array(e))
+        else:
+            unjsonified.append(e)
+    return unjsonified
+
+
+def _make_executor(kind, max_workers=None):
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers)
+    elif kind == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(
+            f"Executor must be 'thread', 'process' or a concurrent.futures.Executor, not {kind}."
+        )
+
+
 def add_metadata_columns(df, metadata_df):
     for column in metadata_df.metadata_columns:
         df[(column, "METADATA")] = metadata_df[column]
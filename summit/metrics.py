@@ -0,0 +1,381 @@
+"""Local sinks for logging metrics from runners"""
+
+import pandas as pd
+import json
+import logging
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+
+__all__ = ["MetricsSink", "JSONLinesSink", "SQLiteSink"]
+
+logger = logging.getLogger(__name__)
+
+# Messages for the background writer
+_FLUSH = object()
+_CLOSE = object()
+
+
+class MetricsSink:
+    """Base class for metrics sinks
+
+    Records are put on a queue and written in batches by a background thread,
+    so logging a metric never waits on disk I/O. Batches are written when
+    `flush` is called (runners flush at the end of every iteration), when
+    `batch_size` records are pending or when the sink is closed.
+
+    Subclasses implement `_open`, `_write` and `_close`, which are only called from
+    the background thread, as well as `load` and `runs` for querying.
+
+    Parameters
+    ----------
+    batch_size : int, optional
+        The maximum number of records to hold before writing. Default is 1000.
+
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._error = None
+
+    def start_run(self, run_id, params=None):
+        """Record the start of a run
+
+        Parameters
+        ----------
+        run_id : str
+            A unique id for the run (e.g., the uuid of a `Runner`).
+        params : dict, optional
+            JSON serializable parameters of the run.
+
+        """
+        record = dict(run_id=str(run_id), time=time.time(), params=params or {})
+        self._put("run", [record])
+
+    def log_metrics(self, run_id, iteration, metrics):
+        """Log the metrics from an iteration
+
+        Parameters
+        ----------
+        run_id : str
+            The id of the run.
+        iteration : int
+            The iteration of the run.
+        metrics : dict
+            Metric names and values.
+
+        """
+        t = time.time()
+        records = [
+            dict(
+                run_id=str(run_id),
+                iteration=int(iteration),
+                name=name,
+                value=float(value),
+                time=t,
+            )
+            for name, value in metrics.items()
+        ]
+        self._put("metric", records)
+
+    def flush(self, block=False):
+        """Write all pending records
+
+        Parameters
+        ----------
+        block : bool, optional
+            Wait until the records have been written. Default is False.
+
+        Raises
+        ------
+        Exception
+            The error raised when opening the sink in the background thread
+            (e.g., if the path is not writable). Records are dropped after
+            such an error.
+
+        """
+        if self._thread is None:
+            return
+        self._raise_error()
+        self._queue.put(_FLUSH)
+        if block:
+            self._queue.join()
+            self._raise_error()
+
+    def close(self):
+        """Write all pending records and stop the background thread
+
+        Raises the error from opening the sink if there was one (see `flush`).
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def load(self, run_id=None, name=None):
+        """Load logged metrics
+
+        Parameters
+        ----------
+        run_id : str, optional
+            Only load metrics from this run.
+        name : str, optional
+            Only load metrics with this name.
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the columns run_id, iteration, name, value and time.
+
+        """
+        raise NotImplementedError()
+
+    def runs(self):
+        """Load the runs that have been started
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the columns run_id, time and params.
+
+        """
+        raise NotImplementedError()
+
+    def _put(self, kind, records):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name=type(self).__name__, daemon=True
+                )
+                self._thread.start()
+        self._queue.put((kind, records))
+
+    def _worker(self):
+        try:
+            self._open()
+        except Exception as e:
+            # Keep draining the queue, so flush and close do not wait forever
+            self._error = e
+        runs, metrics = [], []
+        while True:
+            item = self._queue.get()
+            try:
+                if self._error is not None:
+                    pass
+                elif item is not _FLUSH and item is not _CLOSE:
+                    kind, records = item
+                    (runs if kind == "run" else metrics).extend(records)
+                pending = len(runs) + len(metrics)
+                if pending > 0 and (
+                    item is _FLUSH or item is _CLOSE or pending >= self.batch_size
+                ):
+                    self._write(runs, metrics)
+                    runs, metrics = [], []
+            except Exception:
+                logger.exception(f"Could not write metrics with {type(self).__name__}.")
+                runs, metrics = [], []
+            finally:
+                self._queue.task_done()
+            if item is _CLOSE:
+                if self._error is None:
+                    self._close()
+                break
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _open(self):
+        pass
+
+    def _write(self, runs, metrics):
+        raise NotImplementedError()
+
+    def _close(self):
+        pass
+
+
+class JSONLinesSink(MetricsSink):
+    """Log metrics to a JSON-lines file
+
+    Each line is a record with "type" set to "run" or "metric".
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The file to append records to.
+    batch_size : int, optional
+        The maximum number of records to hold before writing. Default is 1000.
+
+    Examples
+    --------
+    >>> sink = JSONLinesSink("metrics.jsonl")
+    >>> sink.start_run("run_1", params=dict(strategy="SOBO"))
+    >>> sink.log_metrics("run_1", 0, {"yield_best": 0.5})
+    >>> sink.close()
+    >>> sink.load(name="yield_best")["value"].tolist()
+    [0.5]
+    >>> import os; os.remove("metrics.jsonl")
+
+    """
+
+    def __init__(self, path, batch_size=1000):
+        super().__init__(batch_size=batch_size)
+        self.path = pathlib.Path(path)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, runs, metrics):
+        with open(self.path, "a") as f:
+            for record in runs:
+                f.write(json.dumps(dict(type="run", **record)) + "\n")
+            for record in metrics:
+                f.write(json.dumps(dict(type="metric", **record)) + "\n")
+
+    def _read(self, kind):
+        records = []
+        if not self.path.exists():
+            return records
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partial line left by a crash
+                    continue
+                if record.pop("type") == kind:
+                    records.append(record)
+        return records
+
+    def load(self, run_id=None, name=None):
+        self.flush(block=True)
+        df = pd.DataFrame(
+            self._read("metric"),
+            columns=["run_id", "iteration", "name", "value", "time"],
+        )
+        if run_id is not None:
+            df = df[df["run_id"] == str(run_id)]
+        if name is not None:
+            df = df[df["name"] == name]
+        return df.reset_index(drop=True)
+
+    def runs(self):
+        self.flush(block=True)
+        return pd.DataFrame(self._read("run"), columns=["run_id", "time", "params"])
+
+
+class SQLiteSink(MetricsSink):
+    """Log metrics to an SQLite database
+
+    Metrics are stored in a table called metrics and runs in a table called runs,
+    so the database can also be queried directly with SQL. Several processes
+    can log to the same database.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The database file.
+    batch_size : int, optional
+        The maximum number of records to hold before writing. Default is 1000.
+    timeout : float, optional
+        How many seconds to wait for another process to release a lock on the
+        database. Default is 30.
+
+    Examples
+    --------
+    >>> sink = SQLiteSink("metrics.db")
+    >>> sink.start_run("run_1", params=dict(strategy="SOBO"))
+    >>> sink.log_metrics("run_1", 0, {"yield_best": 0.5})
+    >>> sink.close()
+    >>> sink.load(name="yield_best")["value"].tolist()
+    [0.5]
+    >>> import os; os.remove("metrics.db")
+
+    """
+
+    def __init__(self, path, batch_size=1000, timeout=30.0):
+        super().__init__(batch_size=batch_size)
+        self.path = pathlib.Path(path)
+        self.timeout = timeout
+        self._conn = None
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=self.timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, time REAL, params TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics "
+            "(run_id TEXT, iteration INTEGER, name TEXT, value REAL, time REAL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS metrics_run_name ON metrics (run_id, name)"
+        )
+        return conn
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = self._connect()
+
+    def _write(self, runs, metrics):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                [(r["run_id"], r["time"], json.dumps(r["params"])) for r in runs],
+            )
+            self._conn.executemany(
+                "INSERT INTO metrics VALUES (?, ?, ?, ?, ?)",
+                [
+                    (r["run_id"], r["iteration"], r["name"], r["value"], r["time"])
+                    for r in metrics
+                ],
+            )
+
+    def _close(self):
+        self._conn.close()
+        self._conn = None
+
+    def load(self, run_id=None, name=None):
+        self.flush(block=True)
+        query = "SELECT run_id, iteration, name, value, time FROM metrics"
+        conditions, args = [], []
+        if run_id is not None:
+            conditions.append("run_id = ?")
+            args.append(str(run_id))
+        if name is not None:
+            conditions.append("name = ?")
+            args.append(name)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY rowid"
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(query, conn, params=args)
+        finally:
+            conn.close()
+
+    def runs(self):
+        self.flush(block=True)
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query("SELECT run_id, time, params FROM runs", conn)
+        finally:
+            conn.close()
+        df["params"] = df["params"].apply(json.loads)
+        return df
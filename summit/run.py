@@ -1,18 +1,27 @@
 from summit.strategies import Strategy, strategy_from_dict
-from summit.experiment import Experiment
+from summit.experiment import Experiment, _jsonify_extras, _unjsonify_extras
 from summit.benchmarks import *
-from summit.utils.multiobjective import pareto_efficient, hypervolume
+from summit.utils.multiobjective import HypervolumeTracker
+from summit.utils.dataset import DataSet
+from summit.utils import json_diff, json_patch
+from summit.utils.profiling import Profiler
 from summit import get_summit_config_path
 import pkg_resources
 
 from fastprogress.fastprogress import progress_bar
 import numpy as np
+import pandas as pd
 import os
 import pathlib
 import uuid
 import json
 import pkg_resources
 import logging
+import asyncio
+import functools
+import time
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 
 installed = {pkg.key for pkg in pkg_resources.working_set}
 if "neptune-client" in installed:
@@ -86,6 +95,19 @@ class Runner:
         The number of allowed iterations where the objectives don't improve by more than f_tol. Default is None.
     max_restarts : int, optional
         Number of restarts if max_same where is violated. Default is 0.
+    metrics : `summit.metrics.MetricsSink`, optional
+        A sink for logging the best objective values, hypervolume, suggestion time
+        and experiment time at each iteration. Default is not to log metrics.
+    hypervolume_ref : array-like, optional
+        The reference for the hypervolume calculation if it is a multiobjective problem.
+        Should be an array of length the number of objectives. Default is at the origin.
+    profile : bool, optional
+        Record the time spent in the instrumented phases of the strategy (see
+        `summit.utils.profiling`). The times are added to the suggested experiments as
+        metadata columns named "<span>_t" and are also logged to `metrics`. Default is False.
+    profile_memory : bool, optional
+        Also record the peak memory of each phase in metadata columns named
+        "<span>_peak_memory". This slows down the strategy. Default is False.
     Examples
     --------
 
@@ -101,6 +123,10 @@ class Runner:
         f_tol=1e-5,
         max_same=None,
         max_restarts=0,
+        metrics=None,
+        hypervolume_ref=None,
+        profile=False,
+        profile_memory=False,
         **kwargs,
     ):
         self.strategy = strategy
@@ -111,6 +137,13 @@ class Runner:
         self.batch_size = batch_size
         self.max_same = max_same
         self.max_restarts = max_restarts
+        self.metrics = metrics
+        self.profile = profile or profile_memory
+        self.profile_memory = profile_memory
+
+        # Hypervolume reference for multiobjective experiments
+        n_objs = len(self.experiment.domain.output_variables)
+        self.ref = hypervolume_ref if hypervolume_ref is not None else n_objs * [0]
 
         # Set up logging
         self.logger = logging.getLogger(__name__)
@@ -126,7 +159,15 @@ class Runner:
             Save the state of the optimization at the end of a run, even if it is stopped early.
             Default is True.
         save_dir : str, optional
-            The directory to save checkpoints locally. Defaults to not saving locally.
+            The directory to save checkpoints locally. Defaults to `~/.summit`.
+
+        Notes
+        -----
+        Checkpoints are saved in `save_dir/runner/<uuid>`. This contains a header
+        with the initial state of the runner and a journal with the new data and
+        changes to the strategy at each checkpoint. Use `Runner.resume`
+        to continue a run from its last checkpoint.
+
         """
         save_freq = kwargs.get("save_freq")
         save_dir = kwargs.get("save_dir", str(get_summit_config_path()))
@@ -136,14 +177,85 @@ class Runner:
             os.makedirs(save_dir)
         save_at_end = kwargs.get("save_at_end", True)
 
+        checkpoint = None
+        if save_freq is not None or save_at_end:
+            checkpoint = CheckpointJournal.create(save_dir, self)
+
+        self.restarts = 0
+        self._run(checkpoint, save_freq=save_freq, save_at_end=save_at_end)
+
+    @classmethod
+    def resume(cls, path, **kwargs):
+        """Continue a run from its last complete checkpoint
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            The checkpoint directory of the run (i.e., `save_dir/runner/<uuid>`).
+        save_freq : int, optional
+            The frequency with which to checkpoint the state of the optimization. Defaults to None.
+        save_at_end : bool, optional
+            Save the state of the optimization at the end of a run. Default is True.
+        metrics : `summit.metrics.MetricsSink`, optional
+            A sink for logging metrics. Metrics are logged under the same run id.
+
+        Returns
+        -------
+        runner : Runner
+            The runner after it has finished running.
+
+        Notes
+        -----
+        Call `resume` on the class of the runner that wrote the checkpoints
+        (e.g., `AsyncRunner.resume`). A `NeptuneRunner` is resumed with the loop of
+        `Runner`, so the rest of the run is not logged to Neptune.
+
+        """
+        runner, checkpoint, state = CheckpointJournal.load(path, cls)
+        runner.uuid_val = uuid.UUID(pathlib.Path(path).name)
+        runner.metrics = kwargs.get("metrics")
+        runner._run(
+            checkpoint,
+            save_freq=kwargs.get("save_freq"),
+            save_at_end=kwargs.get("save_at_end", True),
+            state=state,
+        )
+        return runner
+
+    def _run(self, checkpoint, save_freq=None, save_at_end=True, state=None):
+        if self.metrics is not None:
+            self._start_metrics()
+        profiler = None
+        if self.profile:
+            profiler = Profiler(trace_memory=self.profile_memory)
+            profiler.start()
+        try:
+            self._loop(checkpoint, save_freq, save_at_end, state, profiler)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+        if self.metrics is not None:
+            self.metrics.flush(block=True)
+
+    def _loop(self, checkpoint, save_freq, save_at_end, state, profiler):
         n_objs = len(self.experiment.domain.output_variables)
         fbest_old = np.zeros(n_objs)
         fbest = np.zeros(n_objs)
         prev_res = None
-        self.restarts = 0
+        nstop = 0
+        start_iteration = 0
+        if state is not None:
+            start_iteration = state["iteration"] + 1
+            fbest = np.array(state["fbest"])
+            nstop = state["nstop"]
+            self.restarts = state["restarts"]
+            if state["n_prev_res"] > 0:
+                prev_res = self.experiment.data.iloc[-state["n_prev_res"] :]
 
-        for i in progress_bar(range(self.max_iterations)):
+        i = saved = start_iteration - 1
+        for i in progress_bar(range(start_iteration, self.max_iterations)):
             # Get experiment suggestions
+            start = time.time()
             if i == 0:
                 k = self.n_init if self.n_init is not None else self.batch_size
                 next_experiments = self.strategy.suggest_experiments(num_experiments=k)
@@ -151,7 +263,13 @@ class Runner:
                 next_experiments = self.strategy.suggest_experiments(
                     num_experiments=self.batch_size, prev_res=prev_res
                 )
+            suggest_time = time.time() - start
+            spans = {}
+            if profiler is not None:
+                spans = self._add_spans(next_experiments, profiler.collect())
+            start = time.time()
             prev_res = self.experiment.run_experiments(next_experiments)
+            experiment_time = time.time() - start
 
             for j, v in enumerate(self.experiment.domain.output_variables):
                 if i > 0:
@@ -161,11 +279,10 @@ class Runner:
                 elif not v.maximize:
                     fbest[j] = self.experiment.data[v.name].min()
 
-            # Save state
-            if save_freq is not None:
-                file = save_dir / f"iteration_{i}.json"
-                if i % save_freq == 0:
-                    self.save(file)
+            if self.metrics is not None:
+                self._log_metrics(
+                    i, fbest, prev_res, suggest_time, experiment_time, spans
+                )
 
             compare = np.abs(fbest - fbest_old) > self.f_tol
             if all(compare) or i <= 1:
@@ -173,22 +290,92 @@ class Runner:
             else:
                 nstop += 1
 
+            stop = False
             if self.max_same is not None:
                 if nstop >= self.max_same and self.restarts >= self.max_restarts:
                     self.logger.info(
                         f"{self.strategy.__class__.__name__} stopped after {i+1} iterations and {self.restarts} restarts."
                     )
-                    break
+                    stop = True
                 elif nstop >= self.max_same:
                     nstop = 0
                     prev_res = None
                     self.strategy.reset()
                     self.restarts += 1
 
+            # Save state
+            if save_freq is not None and i % save_freq == 0:
+                self._checkpoint(checkpoint, i, fbest, nstop, prev_res)
+                saved = i
+            if stop:
+                break
+
         # Save at end
-        if save_at_end:
-            file = save_dir / f"iteration_{i}.json"
-            self.save(file)
+        if save_at_end and i >= start_iteration and saved != i:
+            self._checkpoint(checkpoint, i, fbest, nstop, prev_res)
+
+    @staticmethod
+    def _add_spans(next_experiments, records):
+        """Add span records as metadata columns and return them as flat metrics"""
+        spans = {}
+        for name, record in records.items():
+            spans[f"{name}_t"] = record["time"]
+            if "peak_memory" in record:
+                spans[f"{name}_peak_memory"] = record["peak_memory"]
+        if next_experiments is not None:
+            for column, value in spans.items():
+                next_experiments[(column, "METADATA")] = value
+        return spans
+
+    def _start_metrics(self):
+        params = dict(
+            strategy=self.strategy.__class__.__name__,
+            experiment=self.experiment.__class__.__name__,
+            num_initial_experiments=self.n_init,
+            max_iterations=self.max_iterations,
+            batch_size=self.batch_size,
+        )
+        self.metrics.start_run(self.uuid_val, params)
+
+        # Hypervolume is tracked incrementally as a minimization problem
+        output_variables = self.experiment.domain.output_variables
+        self._hv_tracker = HypervolumeTracker(self.ref)
+        self._hv_signs = np.array(
+            [-1.0 if v.maximize else 1.0 for v in output_variables]
+        )
+        if len(output_variables) > 1 and self.experiment.data.shape[0] > 0:
+            self._update_hypervolume(self.experiment.data)
+
+    def _update_hypervolume(self, data):
+        output_names = [v.name for v in self.experiment.domain.output_variables]
+        y = data[output_names].to_numpy().astype(float)
+        return self._hv_tracker.update(y * self._hv_signs)
+
+    def _log_metrics(
+        self, i, fbest, new_data, suggest_time, experiment_time, spans=None
+    ):
+        output_variables = self.experiment.domain.output_variables
+        metrics = {v.name + "_best": fbest[j] for j, v in enumerate(output_variables)}
+        if len(output_variables) > 1:
+            metrics["hypervolume"] = self._update_hypervolume(new_data)
+        metrics.update(
+            suggest_time=suggest_time,
+            experiment_time=experiment_time,
+            num_experiments=self.experiment.data.shape[0],
+        )
+        if spans is not None:
+            metrics.update(spans)
+        self.metrics.log_metrics(self.uuid_val, i, metrics)
+        self.metrics.flush()
+
+    def _checkpoint(self, checkpoint, i, fbest, nstop, prev_res):
+        checkpoint.write(
+            iteration=i,
+            fbest=fbest.tolist(),
+            nstop=nstop,
+            restarts=self.restarts,
+            n_prev_res=len(prev_res) if prev_res is not None else 0,
+        )
 
     def reset(self):
         self.strategy.reset()
@@ -203,6 +390,7 @@ class Runner:
             batch_size=self.batch_size,
             f_tol=self.f_tol,
             max_restarts=self.max_restarts,
+            hypervolume_ref=[float(r) for r in self.ref],
         )
 
         return dict(
@@ -228,6 +416,411 @@ class Runner:
         return cls.from_dict(d)
 
 
+class CheckpointJournal:
+    """Append-only checkpoints for a `Runner`
+
+    The checkpoint directory contains `header.json`, which has the
+    serialized runner when the run started, and `journal.jsonl`, which has one line
+    per checkpoint with the data and experiment extras added since the previous checkpoint,
+    the changes to the serialized strategy (see `summit.utils.json_diff`) and the
+    state of the runner loop. This means each checkpoint only writes what has changed.
+
+    Use `CheckpointJournal.create` to start a new journal and `CheckpointJournal.load`
+    to restore a runner from an existing one.
+
+    """
+
+    header_file = "header.json"
+    journal_file = "journal.jsonl"
+
+    def __init__(self, path, runner, strategy_dict, n_rows=0, n_extras=0):
+        self.path = pathlib.Path(path)
+        self.runner = runner
+        self._strategy_dict = strategy_dict
+        self._n_rows = n_rows
+        self._n_extras = n_extras
+
+    @classmethod
+    def create(cls, path, runner):
+        """Start a new journal by writing the header"""
+        path = pathlib.Path(path)
+        os.makedirs(path, exist_ok=True)
+        header = runner.to_dict()
+        with open(path / cls.header_file, "w") as f:
+            json.dump(header, f)
+        open(path / cls.journal_file, "w").close()
+        return cls(
+            path,
+            runner,
+            strategy_dict=header["strategy"],
+            n_rows=runner.experiment.data.shape[0],
+            n_extras=len(runner.experiment.extras),
+        )
+
+    def write(self, iteration, **state):
+        """Append the changes since the last checkpoint to the journal"""
+        experiment = self.runner.experiment
+        strategy_dict = json.loads(json.dumps(self.runner.strategy.to_dict()))
+        entry = dict(
+            iteration=iteration,
+            data=experiment.data.iloc[self._n_rows :].to_dict(),
+            extras=_jsonify_extras(experiment.extras[self._n_extras :]),
+            strategy=json_diff(self._strategy_dict, strategy_dict),
+            state=state,
+        )
+        with open(self.path / self.journal_file, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._strategy_dict = strategy_dict
+        self._n_rows = experiment.data.shape[0]
+        self._n_extras = len(experiment.extras)
+
+    @classmethod
+    def load(cls, path, runner_cls=None):
+        """Restore a runner from the last complete entry in the journal
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            The checkpoint directory
+        runner_cls : class, optional
+            The runner class to create. Defaults to `Runner`.
+
+        Returns
+        -------
+        runner, journal, state
+            The restored runner, the journal to continue writing to and the state
+            of the runner loop at the last checkpoint (None if there are no checkpoints).
+
+        """
+        runner_cls = runner_cls if runner_cls is not None else Runner
+        path = pathlib.Path(path)
+        with open(path / cls.header_file, "r") as f:
+            header = json.load(f)
+
+        strategy_dict = header["strategy"]
+        data = [DataSet.from_dict(header["experiment"]["data"])]
+        extras = []
+        state = None
+        end = 0
+        with open(path / cls.journal_file, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError
+                    entry = json.loads(line)
+                except ValueError:
+                    # Incomplete entry from a crash while writing
+                    break
+                strategy_dict = json_patch(strategy_dict, entry["strategy"])
+                data.append(DataSet.from_dict(entry["data"]))
+                extras += entry["extras"]
+                state = dict(iteration=entry["iteration"], **entry["state"])
+                end += len(line)
+        # Drop any incomplete entry so new entries can be appended
+        with open(path / cls.journal_file, "r+b") as f:
+            f.truncate(end)
+
+        d = dict(header, strategy=strategy_dict)
+        runner = runner_cls.from_dict(deepcopy(d))
+        runner.experiment._data = pd.concat(data, ignore_index=True)
+        runner.experiment.extras += _unjsonify_extras(extras)
+        journal = cls(
+            path,
+            runner,
+            strategy_dict=strategy_dict,
+            n_rows=runner.experiment.data.shape[0],
+            n_extras=len(runner.experiment.extras),
+        )
+        return runner, journal, state
+
+
+class AsyncRunner(Runner):
+    """Run a closed-loop cycle where the strategy and experiments overlap
+
+    A fixed number of experiment slots (e.g., reactors) are kept busy. As soon as
+    an experiment finishes, the strategy is asked for new conditions using the
+    results that have come back so far, while the other experiments are still running.
+    Strategy suggestions run in a background thread so they do not block experiments.
+
+    Parameters
+    ----------
+    strategy: `summit.strategies.Strategy`
+        The summit strategy to be used. Note this should be an object
+        (i.e., you need to call the strategy and then pass it). This allows
+        you to add any transforms, options in advance.
+    experiment: `summit.experiment.Experiment`
+        The experiment class to use for running experiments. If the experiment's
+        `_run` method is a coroutine function, it is awaited directly. Otherwise,
+        it is run in a thread pool with one thread per slot.
+    num_slots: int, optional
+        The number of experiments that can run at the same time. Default is 2.
+    max_iterations: int, optional
+        The maximum number of calls to `strategy.suggest_experiments`. Default is 100.
+    num_initial_experiments : int, optional
+        Number of initial experiments to run. Default is to fill all the slots.
+
+    Notes
+    -----
+    Stopping based on `f_tol` and `max_same` is not supported since results arrive
+    one at a time rather than in iterations.
+
+    Other keyword arguments such as `metrics`, `hypervolume_ref` and `profile` are
+    passed to `Runner`. Metrics are logged each time an experiment finishes, with
+    the number of finished experiments minus one as the iteration.
+
+    After a run, `stats` contains the wall time, the utilisation of the slots
+    (fraction of the wall time they were busy) and how long suggested experiments
+    waited in the queue for a free slot.
+
+    Examples
+    --------
+    >>> from summit.benchmarks import SnarBenchmark
+    >>> from summit.strategies import Random
+    >>> from summit.run import AsyncRunner
+    >>> exp = SnarBenchmark()
+    >>> strategy = Random(exp.domain)
+    >>> r = AsyncRunner(strategy=strategy, experiment=exp, num_slots=2, max_iterations=3)
+    >>> r.run(save_at_end=False)
+    >>> r.stats["num_experiments"]
+    4
+
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy,
+        experiment: Experiment,
+        num_slots=2,
+        num_initial_experiments=None,
+        max_iterations=100,
+        **kwargs,
+    ):
+        super().__init__(
+            strategy,
+            experiment,
+            num_initial_experiments=num_initial_experiments,
+            max_iterations=max_iterations,
+            batch_size=num_slots,
+            **kwargs,
+        )
+        self.num_slots = num_slots
+        self.restarts = 0
+        self.stats = {}
+
+    def run(self, **kwargs):
+        """Run the closed loop experiment cycle
+
+        This starts an asyncio event loop, so it cannot be called from a running
+        event loop (e.g., inside a coroutine). Use `run_async` there instead.
+
+        Parameters
+        ----------
+        save_at_end : bool, optional
+            Save the state of the optimization at the end of a run. Default is True.
+        save_dir : str, optional
+            The directory to save checkpoints locally. Defaults to `~/.summit`.
+
+        Notes
+        -----
+        Checkpoints are saved in `save_dir/runner/<uuid>` in the same format as
+        `Runner`. Use `AsyncRunner.resume` to continue a run from its last checkpoint.
+
+        """
+        asyncio.run(self.run_async(**kwargs))
+
+    async def run_async(self, **kwargs):
+        """Coroutine version of `run`"""
+        save_dir = kwargs.get("save_dir", str(get_summit_config_path()))
+        self.uuid_val = uuid.uuid4()
+        save_dir = pathlib.Path(save_dir) / "runner" / str(self.uuid_val)
+        save_at_end = kwargs.get("save_at_end", True)
+
+        checkpoint = None
+        if save_at_end:
+            checkpoint = CheckpointJournal.create(save_dir, self)
+        await self._run_async(checkpoint, save_at_end)
+
+    def _run(self, checkpoint, save_freq=None, save_at_end=True, state=None):
+        # Used by `resume`
+        asyncio.run(self._run_async(checkpoint, save_at_end, state))
+
+    async def _run_async(self, checkpoint, save_at_end=True, state=None):
+        if self.metrics is not None:
+            self._start_metrics()
+        profiler = None
+        if self.profile:
+            profiler = Profiler(trace_memory=self.profile_memory)
+            profiler.start()
+        loop = asyncio.get_running_loop()
+        experiment_pool = ThreadPoolExecutor(max_workers=self.num_slots)
+        strategy_pool = ThreadPoolExecutor(max_workers=1)
+
+        queue = []  # (conditions, time queued, computation time, spans) to run
+        running = {}  # task -> (conditions, computation time, spans)
+        new_results = []  # results not yet passed to the strategy
+        suggest_task = None
+        n_suggestions = 0
+        if state is not None:
+            n_suggestions = state["iteration"] + 1
+            if state["n_prev_res"] > 0:
+                new_results.append(self.experiment.data.iloc[-state["n_prev_res"] :])
+        start_suggestions = n_suggestions
+        busy_time = 0.0
+        queue_waits = []
+        suggest_times = []
+
+        def free_slots():
+            return self.num_slots - len(running) - len(queue)
+
+        start = time.time()
+        try:
+            while True:
+                # Ask the strategy for more experiments if a slot is free
+                can_suggest = n_suggestions < self.max_iterations
+                if suggest_task is None and can_suggest and free_slots() > 0:
+                    if n_suggestions == 0:
+                        k = self.n_init if self.n_init is not None else self.num_slots
+                        prev_res = None
+                    else:
+                        k = free_slots()
+                        prev_res = _concat_results(new_results)
+                        new_results = []
+                    suggest = functools.partial(
+                        _timed_call,
+                        self.strategy.suggest_experiments,
+                        num_experiments=k,
+                        prev_res=prev_res,
+                    )
+                    suggest_task = loop.run_in_executor(strategy_pool, suggest)
+                    n_suggestions += 1
+
+                # Start queued experiments in free slots
+                while queue and len(running) < self.num_slots:
+                    conditions, queued_at, computation_time, spans = queue.pop(0)
+                    queue_waits.append(time.time() - queued_at)
+                    task = asyncio.ensure_future(
+                        self._run_slot(conditions, experiment_pool)
+                    )
+                    running[task] = (conditions, computation_time, spans)
+
+                waiting = set(running)
+                if suggest_task is not None:
+                    waiting.add(suggest_task)
+                if not waiting:
+                    break
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task is suggest_task:
+                        next_experiments, computation_time = task.result()
+                        suggest_times.append(computation_time)
+                        spans = {}
+                        if profiler is not None:
+                            spans = self._add_spans(
+                                next_experiments, profiler.collect()
+                            )
+                        now = time.time()
+                        for i in range(len(next_experiments)):
+                            row = next_experiments.iloc[[i]]
+                            queue.append((row, now, computation_time, spans))
+                        suggest_task = None
+                    else:
+                        conditions, computation_time, spans = running.pop(task)
+                        res, extras, experiment_time = task.result()
+                        busy_time += experiment_time
+                        new_data = self.experiment._add_results(
+                            conditions,
+                            [res],
+                            [extras],
+                            [experiment_time],
+                            computation_time,
+                        )
+                        new_results.append(new_data)
+                        if self.metrics is not None:
+                            self._log_metrics(
+                                self.experiment.data.shape[0] - 1,
+                                self._fbest(),
+                                new_data,
+                                computation_time,
+                                experiment_time,
+                                spans,
+                            )
+        finally:
+            experiment_pool.shutdown(wait=True)
+            strategy_pool.shutdown(wait=True)
+            if profiler is not None:
+                profiler.stop()
+        if self.metrics is not None:
+            self.metrics.flush(block=True)
+
+        wall_time = time.time() - start
+        self.stats = dict(
+            wall_time=wall_time,
+            num_experiments=len(queue_waits),
+            num_suggestions=n_suggestions,
+            utilisation=busy_time / (self.num_slots * wall_time) if wall_time else 0.0,
+            mean_queue_wait=float(np.mean(queue_waits)) if queue_waits else 0.0,
+            max_queue_wait=float(np.max(queue_waits)) if queue_waits else 0.0,
+            mean_suggest_time=float(np.mean(suggest_times)) if suggest_times else 0.0,
+        )
+        self.logger.info(f"Finished asynchronous run: {self.stats}")
+
+        # Save at end, keeping the results the strategy has not seen yet
+        if save_at_end and n_suggestions > start_suggestions:
+            self._checkpoint(
+                checkpoint,
+                n_suggestions - 1,
+                self._fbest(),
+                nstop=0,
+                prev_res=_concat_results(new_results),
+            )
+
+    def _fbest(self):
+        data = self.experiment.data
+        return np.array(
+            [
+                data[v.name].max() if v.maximize else data[v.name].min()
+                for v in self.experiment.domain.output_variables
+            ],
+            dtype=float,
+        )
+
+    async def _run_slot(self, conditions, executor):
+        """Run one experiment in a slot"""
+        condition = next(conditions.iterrows())[1]
+        if asyncio.iscoroutinefunction(self.experiment._run):
+            start = time.time()
+            res, extras = await self.experiment._run(condition)
+            return res, extras, time.time() - start
+        else:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, self.experiment._run_timed, condition
+            )
+
+    def to_dict(self):
+        d = super().to_dict()
+        d["runner"].pop("batch_size")
+        d["runner"]["num_slots"] = self.num_slots
+        return d
+
+
+def _timed_call(f, *args, **kwargs):
+    start = time.time()
+    res = f(*args, **kwargs)
+    return res, time.time() - start
+
+
+def _concat_results(results):
+    if len(results) == 0:
+        return None
+    return results[0].append(results[1:])
+
+
 class NeptuneRunner(Runner):
     """Run a closed-loop strategy and experiment cycle
 
@@ -282,11 +875,9 @@ class NeptuneRunner(Runner):
         **kwargs,
     ):
 
-        super().__init__(strategy, experiment, **kwargs)
-
-        # Hypervolume reference for multiobjective experiments
-        n_objs = len(self.experiment.domain.output_variables)
-        self.ref = hypervolume_ref if hypervolume_ref is not None else n_objs * [0]
+        super().__init__(
+            strategy, experiment, hypervolume_ref=hypervolume_ref, **kwargs
+        )
 
         # Check that Neptune-client is installed
         installed = {pkg.key for pkg in pkg_resources.working_set}
@@ -317,7 +908,13 @@ class NeptuneRunner(Runner):
             Save the state of the optimization at the end of a run, even if it is stopped early.
             Default is True.
         save_dir : str, optional
-            The directory to save checkpoints locally. Defaults to `~/.summit/runner`.
+            The directory to save checkpoints locally. Defaults to `~/.summit`.
+
+        Notes
+        -----
+        Checkpoints are saved in `save_dir/runner/<uuid>` in the same format as
+        `Runner`, and the header and journal are sent to Neptune as artifacts.
+
         """
         # Set parameters
         prev_res = None
@@ -325,6 +922,20 @@ class NeptuneRunner(Runner):
         n_objs = len(self.experiment.domain.output_variables)
         fbest_old = np.zeros(n_objs)
         fbest = np.zeros(n_objs)
+        nstop = 0
+
+        # Hypervolume is tracked incrementally as a minimization problem
+        output_names = [v.name for v in self.experiment.domain.output_variables]
+        signs = np.array(
+            [
+                -1.0 if v.maximize else 1.0
+                for v in self.experiment.domain.output_variables
+            ]
+        )
+        hv_tracker = HypervolumeTracker(self.ref)
+        if n_objs > 1 and self.experiment.data.shape[0] > 0:
+            y = self.experiment.data[output_names].to_numpy().astype(float)
+            hv_tracker.update(y * signs)
 
         # Serialization
         save_freq = kwargs.get("save_freq")
@@ -334,6 +945,9 @@ class NeptuneRunner(Runner):
         if not os.path.isdir(save_dir):
             os.makedirs(save_dir)
         save_at_end = kwargs.get("save_at_end", True)
+        checkpoint = None
+        if save_freq is not None or save_at_end:
+            checkpoint = CheckpointJournal.create(save_dir, self)
 
         # Create neptune experiment
 
@@ -349,8 +963,11 @@ class NeptuneRunner(Runner):
             )
         else:
             neptune_exp = self.neptune_exp
+        if checkpoint is not None:
+            neptune_exp.send_artifact(str(save_dir / checkpoint.header_file))
 
         # Run optimization loop
+        saved = -1
         for i in progress_bar(range(self.max_iterations)):
             # Get experiment suggestions
             if i == 0:
@@ -375,24 +992,10 @@ class NeptuneRunner(Runner):
 
             # Send hypervolume for multiobjective experiments
             if n_objs > 1:
-                output_names = [v.name for v in self.experiment.domain.output_variables]
-                data = self.experiment.data[output_names].copy()
-                for v in self.experiment.domain.output_variables:
-                    if v.maximize:
-                        data[(v.name, "DATA")] = -1.0 * data[v.name]
-                y_pareto, _ = pareto_efficient(data.to_numpy(), maximize=False)
-                hv = hypervolume(y_pareto, self.ref)
+                y = prev_res[output_names].to_numpy().astype(float)
+                hv = hv_tracker.update(y * signs)
                 neptune_exp.send_metric("hypervolume", hv)
 
-            # Save state
-            if save_freq is not None:
-                file = save_dir / f"iteration_{i}.json"
-                if i % save_freq == 0:
-                    self.save(file)
-                    neptune_exp.send_artifact(str(file))
-                if not save_dir:
-                    os.remove(file)
-
             # Stop if no improvement
             compare = np.abs(fbest - fbest_old) > self.f_tol
             if all(compare) or i <= 1:
@@ -400,25 +1003,31 @@ class NeptuneRunner(Runner):
             else:
                 nstop += 1
 
+            stop = False
             if self.max_same is not None:
                 if nstop >= self.max_same and self.restarts >= self.max_restarts:
                     self.logger.info(
                         f"{self.strategy.__class__.__name__} stopped after {i+1} iterations and {self.restarts} restarts."
                     )
-                    break
+                    stop = True
                 elif nstop >= self.max_same:
                     nstop = 0
                     prev_res = None
                     self.strategy.reset()
                     self.restarts += 1
 
+            # Save state
+            if save_freq is not None and i % save_freq == 0:
+                self._checkpoint(checkpoint, i, fbest, nstop, prev_res)
+                neptune_exp.send_artifact(str(save_dir / checkpoint.journal_file))
+                saved = i
+            if stop:
+                break
+
         # Save at end
-        if save_at_end:
-            file = save_dir / f"iteration_{i}.json"
-            self.save(file)
-            neptune_exp.send_artifact(str(file))
-            if not save_dir:
-                os.remove(file)
+        if save_at_end and saved != i:
+            self._checkpoint(checkpoint, i, fbest, nstop, prev_res)
+            neptune_exp.send_artifact(str(save_dir / checkpoint.journal_file))
 
         # Stop the neptune experiment
         neptune_exp.stop()
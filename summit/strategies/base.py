@@ -1,5 +1,6 @@
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 
 import numpy as np
 import pandas as pd
@@ -11,6 +12,7 @@ import json
 
 __all__ = [
     "Transform",
+    "TransformPlan",
     "Strategy",
     "Design",
     "MultitoSingleObjective",
@@ -39,7 +41,9 @@ class Transform:
     def __init__(self, domain, **kwargs):
         self.transform_domain = domain.copy()
         self.domain = domain
+        self._plans = {}
 
+    @span("Transform.transform_inputs_outputs")
     def transform_inputs_outputs(self, ds: DataSet, **kwargs):
         """Transform of data into inputs and outptus for a strategy
 
@@ -57,6 +61,10 @@ class Transform:
             The method for transforming categorical variables. Either
             "one-hot" or "descriptors". Descriptors must be included in the
             categorical variables for the later.
+        incremental : bool, optional
+            Use a compiled :class:`TransformPlan` that caches the transformed rows and
+            only transforms rows appended since the last call. Use this when `ds` is a
+            history that only grows. Default is False.
 
         Returns
         -------
@@ -67,6 +75,10 @@ class Transform:
         categorical_method = kwargs.get("categorical_method", "one-hot")
         standardize_inputs = kwargs.get("standardize_inputs", False)
         standardize_outputs = kwargs.get("standardize_outputs", False)
+        if kwargs.get("incremental", False):
+            return self._transform_incremental(
+                ds, categorical_method, standardize_inputs, standardize_outputs
+            )
 
         data_columns = ds.data_columns
         new_ds = ds.copy() if copy else ds
@@ -174,6 +186,7 @@ class Transform:
         # Return the inputs and outputs as separate datasets
         return new_ds[input_columns].copy(), new_ds[output_columns].copy()
 
+    @span("Transform.un_transform")
     def un_transform(self, ds, **kwargs):
         """Transform data back into its original represetnation
             after strategy is finished
@@ -192,6 +205,10 @@ class Transform:
             The method for transforming categorical variables. Either
             "one-hot", "descriptors" or None. Descriptors must be included in the
             categorical variables for the later. Default is None.
+        descriptor_scaling : str or None, optional
+            How descriptors are scaled when choosing the closest level with the
+            "descriptors" method. See :meth:`~summit.domain.CategoricalVariable.nearest_levels`.
+            Default is None (unscaled Euclidean distance).
 
         Notes
         -----
@@ -201,6 +218,7 @@ class Transform:
         categorical_method = kwargs.get("categorical_method")
         standardize_inputs = kwargs.get("standardize_inputs", False)
         standardize_outputs = kwargs.get("standardize_outputs", False)
+        descriptor_scaling = kwargs.get("descriptor_scaling")
 
         data_columns = ds.data_columns
 
@@ -214,25 +232,12 @@ class Transform:
             ):
                 # Add original categorical variable to the dataset
                 var_descriptor_names = variable.ds.data_columns
-                var_descriptor_conditions = ds[var_descriptor_names]
-                var_descriptor_orig_data = np.asarray(
-                    [
-                        variable.ds.loc[[level], :].values[0].tolist()
-                        for level in variable.ds.index
-                    ]
+                var_descriptor_conditions = np.column_stack(
+                    [ds[name].to_numpy(dtype=float) for name in var_descriptor_names]
+                )
+                var_categorical_transformed = variable.nearest_levels(
+                    var_descriptor_conditions, scaling=descriptor_scaling
                 )
-                var_categorical_transformed = []
-                for _, dc in var_descriptor_conditions.iterrows():
-                    eucl_distance_squ = np.sum(
-                        np.square(np.subtract(var_descriptor_orig_data, dc.to_numpy())),
-                        axis=1,
-                    )
-                    cat_level_index = np.where(
-                        eucl_distance_squ == np.min(eucl_distance_squ)
-                    )[0][0]
-                    cat_level = variable.ds.index[cat_level_index]
-                    var_categorical_transformed.append(cat_level)
-                dt = {variable.name: var_categorical_transformed}
                 new_ds.insert(
                     loc=i, column=variable.name, value=var_categorical_transformed
                 )
@@ -295,6 +300,56 @@ class Transform:
 
         return new_ds
 
+    def _transform_incremental(
+        self, ds, categorical_method, standardize_inputs, standardize_outputs
+    ):
+        plan = self.plan(categorical_method)
+        X, Y = plan.update(ds)
+        X, Y = X.copy(), Y.copy()
+        self.input_means, self.input_stds = {}, {}
+        self.output_means, self.output_stds = {}, {}
+        if standardize_inputs:
+            for variable in self.domain.input_variables:
+                if isinstance(variable, ContinuousVariable):
+                    j = plan.input_columns.index(variable.name)
+                    X[:, j], mean, std = self._standardize_array(X[:, j])
+                    self.input_means[variable.name] = mean
+                    self.input_stds[variable.name] = std
+        if standardize_outputs:
+            for j, name in enumerate(plan.output_columns):
+                Y[:, j], mean, std = self._standardize_array(Y[:, j])
+                self.output_means[name] = mean
+                self.output_stds[name] = std
+        inputs = DataSet(X, index=ds.index, columns=plan._input_multiindex)
+        outputs = DataSet(Y, index=ds.index, columns=plan._output_multiindex)
+        return inputs, outputs
+
+    def plan(self, categorical_method="one-hot"):
+        """Get the compiled transform plan for a categorical method
+
+        The plan is compiled on the first call and reused afterwards.
+
+        Parameters
+        ----------
+        categorical_method : str, optional
+            Either "one-hot" or "descriptors". Default is "one-hot".
+
+        Returns
+        -------
+        plan : :class:`TransformPlan`
+
+        """
+        plan = self._plans.get(categorical_method)
+        if plan is None:
+            plan = TransformPlan(self.domain, categorical_method)
+            self._plans[categorical_method] = plan
+        return plan
+
+    def reset(self):
+        """Clear the rows cached by incremental transforms"""
+        for plan in self._plans.values():
+            plan.reset()
+
     def to_dict(self, **kwargs):
         """ Output a dictionary representation of the transform"""
         return dict(
@@ -318,6 +373,219 @@ class Transform:
         scaled = (X - mean) / std
         return scaled, mean, std
 
+    @staticmethod
+    def _standardize_array(X):
+        mean, std = X.mean(), X.std()
+        std = std if std > 1e-5 else 1e-5
+        scaled = (X - mean) / std
+        return scaled, mean, std
+
+
+class TransformPlan:
+    """Compiled transformation of experiments into arrays of inputs and outputs
+
+    :meth:`Transform.transform_inputs_outputs` copies the dataset, joins descriptors
+    and refits a one-hot encoder on every call. A plan does this work once for a domain
+    and categorical method and uses the cached descriptor matrices and one-hot
+    encodings of the categorical variables, so that rows are mapped straight to dense
+    float arrays.
+
+    In incremental mode (`update`), the transformed rows are cached, and only rows
+    appended to the dataset since the last call are transformed. A dataset is treated
+    as an extension of the cached rows if its index starts with their index, so rows
+    that were already transformed must not be changed in place.
+
+    Parameters
+    ----------
+    domain : :class:`~summit.domain.Domain`
+        The domain of the experiments.
+    categorical_method : str, optional
+        Either "one-hot" or "descriptors". Default is "one-hot".
+
+    Attributes
+    ----------
+    input_columns : list of str
+        The names of the columns of the inputs, in the same order as returned by
+        :meth:`Transform.transform_inputs_outputs`.
+    output_columns : list of str
+        The names of the columns of the outputs.
+
+    Examples
+    --------
+    >>> from summit.domain import Domain, ContinuousVariable, CategoricalVariable
+    >>> domain = Domain()
+    >>> domain += ContinuousVariable("temperature", "", bounds=[50, 100])
+    >>> domain += CategoricalVariable("solvent", "", levels=["water", "ethanol"])
+    >>> domain += ContinuousVariable("yld", "", bounds=[0, 100], is_objective=True)
+    >>> ds = DataSet([[60, "ethanol", 20.0]], columns=["temperature", "solvent", "yld"])
+    >>> plan = TransformPlan(domain)
+    >>> plan.input_columns
+    ['temperature', 'solvent_water', 'solvent_ethanol']
+    >>> X, Y = plan.update(ds)
+    >>> X
+    array([[60.,  0.,  1.]])
+
+    """
+
+    def __init__(self, domain: Domain, categorical_method="one-hot"):
+        self.domain = domain
+        self.categorical_method = categorical_method
+        self.input_columns = []
+        self.output_columns = []
+        self._steps = []
+        for variable in domain.input_variables:
+            if (
+                isinstance(variable, CategoricalVariable)
+                and categorical_method == "descriptors"
+            ):
+                self._steps.append(("descriptors", variable, None))
+                self.input_columns.extend(variable.ds.data_columns)
+            elif (
+                isinstance(variable, CategoricalVariable)
+                and categorical_method == "one-hot"
+            ):
+                # The encoder is used by Transform.un_transform
+                enc = OneHotEncoder(categories=[variable.levels])
+                enc.fit(np.atleast_2d(variable.levels).T)
+                variable.enc = enc
+                self._steps.append(("one-hot", variable, pd.Index(variable.levels)))
+                self.input_columns.extend(
+                    [f"{variable.name}_{l}" for l in variable.levels]
+                )
+            elif isinstance(variable, ContinuousVariable):
+                self._steps.append(("continuous", variable, None))
+                self.input_columns.append(variable.name)
+            else:
+                raise DomainError(
+                    f"Variable {variable.name} is not a continuous or categorical variable."
+                )
+        for variable in domain.output_variables:
+            if isinstance(variable, CategoricalVariable):
+                raise DomainError(
+                    "Output variables cannot be categorical variables currently."
+                )
+            if not variable.is_objective:
+                raise DomainError(f"Variable {variable.name} is not in the dataset.")
+            self.output_columns.append(variable.name)
+        if len(self.output_columns) == 0:
+            raise DomainError(
+                "No output columns in the domain.  Add at least one output column for optimisation."
+            )
+        # Column indices of datasets of the transformed rows
+        self._input_multiindex = DataSet(columns=self.input_columns).columns
+        self._output_multiindex = DataSet(columns=self.output_columns).columns
+        self.reset()
+
+    def reset(self):
+        """Clear the cached rows"""
+        self._inputs = np.empty((0, len(self.input_columns)))
+        self._outputs = np.empty((0, len(self.output_columns)))
+        self._index = np.empty(0, dtype=object)
+        self._n_rows = 0
+
+    def transform(self, ds):
+        """Transform all rows of a dataset
+
+        Parameters
+        ----------
+        ds : :class:`~summit.utils.dataset.DataSet`
+            Dataset with columns corresponding to the inputs and objectives of the domain.
+
+        Returns
+        -------
+        inputs, outputs : np.ndarray
+            Arrays with the columns in `input_columns` and `output_columns`.
+
+        """
+        inputs = np.empty((len(ds), len(self.input_columns)))
+        outputs = np.empty((len(ds), len(self.output_columns)))
+        self._fill(ds, inputs, outputs)
+        return inputs, outputs
+
+    def update(self, ds):
+        """Transform the rows of a dataset that are not cached yet
+
+        Parameters
+        ----------
+        ds : :class:`~summit.utils.dataset.DataSet`
+            Dataset with columns corresponding to the inputs and objectives of the
+            domain. If its index does not start with the index of the cached rows,
+            the cache is discarded and all rows are transformed.
+
+        Returns
+        -------
+        inputs, outputs : np.ndarray
+            Views of the cached arrays of all rows of `ds`, which must not be modified.
+
+        """
+        n = len(ds)
+        index = ds.index.to_numpy()
+        cached = self._n_rows
+        if cached > n or not np.array_equal(index[:cached], self._index[:cached]):
+            cached = 0
+        if n > self._inputs.shape[0]:
+            # Grow the buffers geometrically so appending is amortized O(batch)
+            size = max(n, 2 * self._inputs.shape[0])
+            self._inputs = _resize_rows(self._inputs, size, cached)
+            self._outputs = _resize_rows(self._outputs, size, cached)
+        if cached < n:
+            self._fill(
+                ds.iloc[cached:], self._inputs[cached:n], self._outputs[cached:n]
+            )
+        self._index = index
+        self._n_rows = n
+        return self._inputs[:n], self._outputs[:n]
+
+    def _fill(self, ds, inputs, outputs):
+        data_columns = set(ds.data_columns)
+        j = 0
+        for kind, variable, levels in self._steps:
+            if kind == "continuous":
+                inputs[:, j] = self._column(ds, variable.name, data_columns)
+                j += 1
+            elif kind == "one-hot":
+                codes = self._codes(ds, variable, levels, data_columns)
+                inputs[:, j : j + len(levels)] = variable.one_hot_matrix[codes]
+                j += len(levels)
+            else:
+                names = variable.ds.data_columns
+                if all(name in data_columns for name in names):
+                    # Use the descriptors in the dataset
+                    for k, name in enumerate(names):
+                        inputs[:, j + k] = self._column(ds, name, data_columns)
+                elif variable.name in data_columns:
+                    values = ds[variable.name].to_numpy()
+                    inputs[:, j : j + len(names)] = variable.get_descriptors(values)
+                else:
+                    raise DomainError(f"Variable {variable.name} is not in the dataset.")
+                j += len(names)
+        for j, name in enumerate(self.output_columns):
+            outputs[:, j] = self._column(ds, name, data_columns)
+
+    @staticmethod
+    def _column(ds, name, data_columns):
+        if name not in data_columns:
+            raise DomainError(f"Variable {name} is not in the dataset.")
+        return ds[name].to_numpy(dtype=float)
+
+    @staticmethod
+    def _codes(ds, variable, levels, data_columns):
+        if variable.name not in data_columns:
+            raise DomainError(f"Variable {variable.name} is not in the dataset.")
+        values = ds[variable.name].to_numpy()
+        codes = levels.get_indexer(values)
+        if np.any(codes < 0):
+            unknown = np.unique(values[codes < 0]).tolist()
+            raise ValueError(f"Unknown levels {unknown} of variable {variable.name}.")
+        return codes
+
+
+def _resize_rows(a, size, n):
+    """Copy the first n rows of a into a new array with size rows"""
+    resized = np.empty((size,) + a.shape[1:], dtype=a.dtype)
+    resized[:n] = a[:n]
+    return resized
+
 
 def transform_from_dict(d):
     if d["name"] == "MultitoSingleObjective":
@@ -168,15 +168,10 @@ class DRO(Strategy):
             if isinstance(v, ContinuousVariable):
                 bounds.append(v.bounds)
             elif isinstance(v, CategoricalVariable):
-                if v.ds is not None:
-                    descriptor_names = v.ds.data_columns
-                    descriptors = np.asarray(
-                        [v.ds.loc[:, [l]].values.tolist() for l in v.ds.data_columns]
-                    )
-                else:
+                if v.ds is None:
                     raise ValueError("No descriptors given for {}".format(v.name))
-                for d in descriptors:
-                    bounds.append([np.min(np.asarray(d)), np.max(np.asarray(d))])
+                for lower, upper in zip(*v.descriptor_bounds):
+                    bounds.append([lower, upper])
 
         # Get bounds of objective
         obj_maximize = False
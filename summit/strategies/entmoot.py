@@ -2,6 +2,7 @@ from summit.strategies.base import Strategy
 from summit.strategies.random import LHS
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 
 
 import pkg_resources
@@ -15,8 +16,6 @@ if not missing:
     from entmoot.space.space import Space
     from entmoot.optimizer.gurobi_utils import get_core_gurobi_model
 
-import string
-
 import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
@@ -144,21 +143,12 @@ class ENTMOOT(Strategy):
                                 )
                             )
                         descriptor_names = v.ds.data_columns
-                        descriptors = np.asarray(
-                            [
-                                v.ds.loc[:, [l]].values.tolist()
-                                for l in v.ds.data_columns
-                            ]
-                        )
-                        for j, d in enumerate(descriptors):
+                        for j, (lower, upper) in enumerate(zip(*v.descriptor_bounds)):
                             self.input_domain.append(
                                 {
                                     "name": descriptor_names[j],
                                     "type": "continuous",
-                                    "domain": (
-                                        np.min(np.asarray(d)),
-                                        np.max(np.asarray(d)),
-                                    ),
+                                    "domain": (lower, upper),
                                 }
                             )
                     elif v.ds is None and self.use_descriptors:
@@ -251,6 +241,7 @@ class ENTMOOT(Strategy):
         self.min_child_samples = min_child_samples
         self.prev_param = None
 
+    @span("ENTMOOT.suggest_experiments")
     def suggest_experiments(
         self, num_experiments=1, prev_res: DataSet = None, **kwargs
     ):
@@ -280,34 +271,35 @@ class ENTMOOT(Strategy):
 
         bounds = [k["domain"] for k in self.input_domain]
 
-        space = Space(bounds)
-        core_model = get_core_gurobi_model(space)
-        gvars = core_model.getVars()
-
-        for c in self.constraints:
-            left = LinExpr()
-            left.addTerms(c[0], gvars)
-            left.addConstant(c[1])
-            core_model.addLConstr(left, c[2], 0)
-
-        core_model.update()
-
-        entmoot_model = Optimizer(
-            dimensions=bounds,
-            base_estimator=self.estimator_type,
-            std_estimator=self.std_estimator_type,
-            n_initial_points=self.initial_points,
-            initial_point_generator=self.generator_type,
-            acq_func=self.acquisition_type,
-            acq_optimizer=self.optimizer_type,
-            random_state=None,
-            acq_func_kwargs=None,
-            acq_optimizer_kwargs={"add_model_core": core_model},
-            base_estimator_kwargs={"min_child_samples": self.min_child_samples},
-            std_estimator_kwargs=None,
-            model_queue_size=None,
-            verbose=False,
-        )
+        with span("ENTMOOT.build_model"):
+            space = Space(bounds)
+            core_model = get_core_gurobi_model(space)
+            gvars = core_model.getVars()
+
+            for c in self.constraints:
+                left = LinExpr()
+                left.addTerms(c[0], gvars)
+                left.addConstant(c[1])
+                core_model.addLConstr(left, c[2], 0)
+
+            core_model.update()
+
+            entmoot_model = Optimizer(
+                dimensions=bounds,
+                base_estimator=self.estimator_type,
+                std_estimator=self.std_estimator_type,
+                n_initial_points=self.initial_points,
+                initial_point_generator=self.generator_type,
+                acq_func=self.acquisition_type,
+                acq_optimizer=self.optimizer_type,
+                random_state=None,
+                acq_func_kwargs=None,
+                acq_optimizer_kwargs={"add_model_core": core_model},
+                base_estimator_kwargs={"min_child_samples": self.min_child_samples},
+                std_estimator_kwargs=None,
+                model_queue_size=None,
+                verbose=False,
+            )
 
         # If we have previous results:
         if prev_res is not None:
@@ -344,16 +336,18 @@ class ENTMOOT(Strategy):
             prev_y = [y for x in Y_step for y in x]
 
             # Train entmoot model
-            entmoot_model.tell(prev_X, prev_y, fit=True)
+            with span("ENTMOOT.fit_model"):
+                entmoot_model.tell(prev_X, prev_y, fit=True)
 
             # Store parameters (history of suggested points and function evaluations)
             param = [X_step, Y_step]
             fbest = np.min(Y_step)
             xbest = X_step[np.argmin(Y_step)]
 
-        request = np.array(
-            entmoot_model.ask(n_points=num_experiments, strategy="cl_mean")
-        )
+        with span("ENTMOOT.ask"):
+            request = np.array(
+                entmoot_model.ask(n_points=num_experiments, strategy="cl_mean")
+            )
         # Generate DataSet object with variable values of next
         next_experiments = None
         transform_descriptors = False
@@ -400,52 +394,14 @@ class ENTMOOT(Strategy):
 
     def constr_wrapper(self, summit_domain):
         v_input_names = [v.name for v in summit_domain.variables if not v.is_objective]
-        constraints = []
-        for c in summit_domain.constraints:
-            tmp_c = c.lhs
-            # Split LHS on + signs into fragments
-            tmp_p = str.split(tmp_c, "+")
-
-            tmp_a = []
-            for t in tmp_p:
-                # For each of the fragments, split on -
-                terms = str.split(t, "-")
-                for i in range(len(terms)):
-                    if i == 0:
-                        # If the first part in the fragment is not empty, that
-                        # means the first term was positive.
-                        if terms[0] != "":
-                            tmp_a.append(terms[0])
-                    # All of the terms in the split will have
-                    # negative coefficients.
-                    else:
-                        tmp_a.append("-" + terms[i])
-            # Split the terms into coefficients and variables:
-            constraint_dict = dict()
-            for term in tmp_a:
-                for i, char in enumerate(term):
-                    if char in string.ascii_letters:
-                        index = i
-                        c_variable = term[index:]
-                        if term[:index] == "":
-                            c_coeff = 1.0
-                        elif term[:index] == "-":
-                            c_coeff = -1.0
-                        else:
-                            c_coeff = float(term[:index])
-                        break
-                    else:
-                        c_variable = "constant"
-                        c_coeff = term
-                constraint_dict[c_variable] = c_coeff
-            # Place coefficients in the variable order the model expects.
-            constraints_ordered = []
-            for v_input_index, v_input_name in enumerate(v_input_names):
-                constraints_ordered.append(constraint_dict.get(v_input_name, 0))
-            constraints.append(
-                [constraints_ordered, constraint_dict["constant"], c.constraint_type]
-            )
-        return constraints
+        compiled = summit_domain.compile_constraints(v_input_names)
+        if compiled.nonlinear:
+            raise DomainError("ENTMOOT only supports linear constraints.")
+        # Coefficients are in the variable order the model expects.
+        return [
+            [a.tolist(), float(b), sense]
+            for a, b, sense in zip(compiled.A, compiled.b, compiled.sense)
+        ]
 
     def to_dict(self):
         if self.prev_param is not None:
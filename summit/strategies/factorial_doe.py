@@ -61,23 +61,69 @@ class FullFactorial(Strategy):
         ds
             A `Dataset` object with the random design
         """
-        num_experiments = np.prod([len(level) for level in levels_dict.values()])
-        design = Design(self.domain, num_experiments, "random")
+        levels = self._levels(levels_dict)
+
+        # Create full factorial design
+        doe = fullfact(levels)
+        return self._to_dataset(doe, levels_dict)
+
+    def iter_experiments(self, levels_dict, chunk_size=10000, start=0, stop=None):
+        """Generate a full factorial design in chunks of experiments
+
+        Only one chunk is held in memory at a time, so this can be used to screen
+        designs that are too large for `suggest_experiments`.
+
+        Parameters
+        ----------
+        levels_dict : dict
+            A dictionary with the number of levels for each variable. Keys are
+            the variable names and values are arrays with the values of each level.
+        chunk_size : int, optional
+            The maximum number of experiments in each chunk. Default is 10000.
+        start, stop : int, optional
+            Only generate experiments `start` to `stop` of the design, so several
+            workers can each take a disjoint slice. See `factorial_rank` and
+            `factorial_unrank` to convert between experiments and their positions.
+            Default is all experiments.
+
+        Yields
+        ------
+        ds
+            `Dataset` objects with consecutive experiments of the design
+
+        """
+        levels = self._levels(levels_dict)
+        for doe in fullfact_chunks(levels, chunk_size, start, stop):
+            ds = self._to_dataset(doe, levels_dict)
+            ds.index = ds.index + start
+            start += len(ds)
+            yield ds
+
+    def _levels(self, levels_dict):
         levels = []
         for v in self.domain.input_variables:
             # Set number of levels per variable
             var_levels = levels_dict.get(v.name)
             num_levels = len(var_levels) if var_levels is not None else 2
             levels.append(num_levels)
+        return levels
 
-        # Create full factorial design
-        doe = fullfact(levels)
+    def _to_dataset(self, doe, levels_dict):
+        design = Design(self.domain, doe.shape[0], "random")
         for i, v in enumerate(self.domain.input_variables):
             indices = doe[:, i]
-            indices = indices.astype(np.int)
-            values = np.array([levels_dict[v.name][i] for i in indices])
+            indices = indices.astype(int)
+            values = np.asarray(levels_dict[v.name])[indices]
             values = np.atleast_2d(values)
-            design.add_variable(v.name, values)
+            if isinstance(v, CategoricalVariable):
+                level_indices = np.array(
+                    [v.levels.index(l) for l in levels_dict[v.name]]
+                )
+                design.add_variable(
+                    v.name, values, indices=np.atleast_2d(level_indices[indices]).T
+                )
+            else:
+                design.add_variable(v.name, values)
 
         ds = design.to_dataset()
         ds[("strategy", "METADATA")] = "FullFactorial"
@@ -105,22 +151,118 @@ def fullfact(levels):
 
     Notes
     ------
-    This code is copied from pydoe2: https://github.com/clicumu/pyDOE2/blob/master/pyDOE2/doe_factorial.py
+    This code is adapted from pydoe2: https://github.com/clicumu/pyDOE2/blob/master/pyDOE2/doe_factorial.py
+    The first factor changes fastest.
+
+    """
+    return factorial_unrank(np.arange(np.prod(levels, dtype=np.int64)), levels).astype(
+        float
+    )
+
+
+def fullfact_chunks(levels, chunk_size=10000, start=0, stop=None):
+    """
+    Generate a general full-factorial design in chunks of rows
+
+    The rows are in the same order as in `fullfact`, but only one chunk is held
+    in memory at a time. Use `start` and `stop` to let several workers each
+    generate a disjoint slice of the design.
+
+    Parameters
+    ----------
+    levels : array-like
+        An array of integers that indicate the number of levels of each input
+        design factor.
+    chunk_size : int, optional
+        The maximum number of rows in each chunk. Default is 10000.
+    start, stop : int, optional
+        Only generate rows `start` to `stop` of the design. Default is all rows.
+
+    Yields
+    ------
+    mat : 2d-array
+        Chunks of the design matrix with integer coded levels 0 to k-1 for a
+        k-level factor.
 
+    Examples
+    --------
+    >>> [chunk.tolist() for chunk in fullfact_chunks([2, 3], chunk_size=4, start=1)]
+    [[[1, 0], [0, 1], [1, 1], [0, 2]], [[1, 2]]]
+
+    """
+    size = int(np.prod(levels, dtype=np.int64))
+    stop = size if stop is None else min(stop, size)
+    for chunk_start in range(start, stop, chunk_size):
+        ranks = np.arange(chunk_start, min(chunk_start + chunk_size, stop))
+        yield factorial_unrank(ranks, levels)
+
+
+def factorial_rank(design, levels):
     """
-    n = len(levels)  # number of factors
-    nb_lines = np.prod(levels)  # number of trial conditions
-    H = np.zeros((nb_lines, n))
-
-    level_repeat = 1
-    range_repeat = np.prod(levels)
-    for i in range(n):
-        range_repeat //= levels[i]
-        lvl = []
-        for j in range(levels[i]):
-            lvl += [j] * level_repeat
-        rng = lvl * range_repeat
-        level_repeat *= levels[i]
-        H[:, i] = rng
-
-    return H
+    Get the row numbers of points in a full-factorial design
+
+    Parameters
+    ----------
+    design : array-like
+        An (n, k) array of integer coded levels.
+    levels : array-like
+        The number of levels of each of the k factors.
+
+    Returns
+    -------
+    ranks : 1d-array
+        The row of each point in `fullfact(levels)`.
+
+    Examples
+    --------
+    >>> factorial_rank([[1, 0], [1, 2]], [2, 3])
+    array([1, 5])
+
+    """
+    design = np.atleast_2d(np.asarray(design, dtype=np.int64))
+    levels = np.asarray(levels, dtype=np.int64)
+    if design.shape[1] != levels.shape[0]:
+        raise ValueError(
+            f"Expected {levels.shape[0]} factors, but the design has {design.shape[1]}."
+        )
+    if np.any(design < 0) or np.any(design >= levels):
+        raise ValueError("Coded levels must be between 0 and the number of levels.")
+    return np.dot(design, _strides(levels))
+
+
+def factorial_unrank(ranks, levels):
+    """
+    Get the points at given rows of a full-factorial design
+
+    This is the inverse of `factorial_rank`. It computes any rows of
+    `fullfact(levels)` without generating the others.
+
+    Parameters
+    ----------
+    ranks : array-like
+        The row numbers.
+    levels : array-like
+        The number of levels of each factor.
+
+    Returns
+    -------
+    design : 2d-array
+        An (n, k) array of integer coded levels.
+
+    Examples
+    --------
+    >>> factorial_unrank([1, 5], [2, 3])
+    array([[1, 0],
+           [1, 2]])
+
+    """
+    ranks = np.atleast_1d(np.asarray(ranks, dtype=np.int64))
+    levels = np.asarray(levels, dtype=np.int64)
+    if np.any(ranks < 0) or np.any(ranks >= np.prod(levels)):
+        raise ValueError("Ranks must be between 0 and the size of the design.")
+    return (ranks[:, np.newaxis] // _strides(levels)) % levels
+
+
+def _strides(levels):
+    """The change in row number for a change of one level of each factor"""
+    return np.cumprod(np.concatenate([[1], levels]), dtype=np.int64)[:-1]
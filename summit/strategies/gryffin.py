@@ -263,9 +263,7 @@ class GRYFFIN(Strategy):
                     )
                 elif v.variable_type == "categorical":
                     if v.ds is not None and self.use_descriptors:
-                        descriptors = [
-                            v.ds.loc[[l], :].values[0].tolist() for l in v.ds.index
-                        ]
+                        descriptors = v.descriptor_matrix.tolist()
                     else:
                         descriptors = None
                     self.domain_inputs.append(
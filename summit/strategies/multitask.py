@@ -2,6 +2,7 @@ from .base import Strategy, Transform
 from .random import LHS
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 
 import botorch
 from botorch.models.model import Model
@@ -86,6 +87,7 @@ class MTBO(Strategy):
             )
         self.reset()
 
+    @span("MTBO.suggest_experiments")
     def suggest_experiments(self, num_experiments, prev_res: DataSet = None, **kwargs):
         # Suggest lhs initial design or append new experiments to previous experiments
         if prev_res is None:
@@ -127,7 +129,8 @@ class MTBO(Strategy):
             output_tasks=[self.task],
         )
         mll = ExactMarginalLogLikelihood(model.likelihood, model)
-        botorch.fit.fit_gpytorch_model(mll)
+        with span("MTBO.fit_model"):
+            botorch.fit.fit_gpytorch_model(mll)
 
         # Create acquisition function
         objective = self.domain.output_variables[0]
@@ -140,13 +143,14 @@ class MTBO(Strategy):
         ei = CategoricalEI(self.domain, model, best_f=fbest_scaled, maximize=maximize)
 
         # Optimize acquisitio function
-        results, acq_values = botorch.optim.optimize_acqf(
-            acq_function=ei,
-            bounds=self._get_bounds(),
-            num_restarts=20,
-            q=num_experiments,
-            raw_samples=100,
-        )
+        with span("MTBO.optimize_acqf"):
+            results, acq_values = botorch.optim.optimize_acqf(
+                acq_function=ei,
+                bounds=self._get_bounds(),
+                num_restarts=20,
+                q=num_experiments,
+                raw_samples=100,
+            )
 
         # Convert result to datset
         result = DataSet(
@@ -308,6 +312,7 @@ class STBO(Strategy):
             )
         self.reset()
 
+    @span("STBO.suggest_experiments")
     def suggest_experiments(self, num_experiments, prev_res: DataSet = None, **kwargs):
         # Suggest lhs initial design or append new experiments to previous experiments
         if prev_res is None:
@@ -329,6 +334,7 @@ class STBO(Strategy):
             categorical_method=self.categorical_method,
             standardize_inputs=True,
             standardize_outputs=True,
+            incremental=True,
         )
 
         # Train model
@@ -337,7 +343,8 @@ class STBO(Strategy):
             torch.tensor(output.data_to_numpy()).float(),
         )
         mll = ExactMarginalLogLikelihood(model.likelihood, model)
-        botorch.fit.fit_gpytorch_model(mll)
+        with span("STBO.fit_model"):
+            botorch.fit.fit_gpytorch_model(mll)
 
         # Create acquisition function
         objective = self.domain.output_variables[0]
@@ -350,13 +357,14 @@ class STBO(Strategy):
         ei = CategoricalEI(self.domain, model, best_f=fbest_scaled, maximize=maximize)
 
         # Optimize acquisition function
-        results, acq_values = botorch.optim.optimize_acqf(
-            acq_function=ei,
-            bounds=self._get_bounds(),
-            num_restarts=20,
-            q=num_experiments,
-            raw_samples=100,
-        )
+        with span("STBO.optimize_acqf"):
+            results, acq_values = botorch.optim.optimize_acqf(
+                acq_function=ei,
+                bounds=self._get_bounds(),
+                num_restarts=20,
+                q=num_experiments,
+                raw_samples=100,
+            )
 
         # Convert result to datset
         result = DataSet(
@@ -392,6 +400,7 @@ class STBO(Strategy):
     def reset(self):
         """Reset MTBO state"""
         self.all_experiments = None
+        self.transform.reset()
         self.iterations = 0
         self.fbest = (
             float("inf") if self.domain.output_variables[0].maximize else -float("inf")
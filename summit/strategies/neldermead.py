@@ -2,6 +2,7 @@ from .base import Strategy, Transform
 from summit.domain import *
 from summit.domain import Domain
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 from summit.utils import jsonify_dict, unjsonify_dict
 
 import numpy as np
@@ -91,6 +92,7 @@ class NelderMead(Strategy):
         self._adaptive = kwargs.get("adaptive", False)
         self.prev_param = None
 
+    @span("NelderMead.suggest_experiments")
     def suggest_experiments(self, prev_res: DataSet = None, **kwargs):
         """Suggest experiments using Nelder-Mead Simplex method
 
@@ -267,16 +269,10 @@ class NelderMead(Strategy):
                 elif isinstance(v, CategoricalVariable):
                     if v.ds is not None:
                         descriptor_names = v.ds.data_columns
-                        descriptors = np.asarray(
-                            [
-                                v.ds.loc[:, [l]].values.tolist()
-                                for l in v.ds.data_columns
-                            ]
-                        )
                     else:
                         raise ValueError("No descriptors given for {}".format(v.name))
-                    for d in descriptors:
-                        bounds.append([np.min(np.asarray(d)), np.max(np.asarray(d))])
+                    for lower, upper in zip(*v.descriptor_bounds):
+                        bounds.append([lower, upper])
                     input_var_names.extend(descriptor_names)
                 else:
                     raise TypeError(
@@ -573,6 +569,7 @@ class NelderMead(Strategy):
         return next_experiments, x_best, f_best, param
 
     # implementation partly follows: https://github.com/scipy/scipy/blob/master/scipy/optimize/optimize.py
+    @span("NelderMead.minimize_neldermead")
     def _minimize_neldermead(
         self,
         x0,
@@ -873,17 +870,9 @@ class NelderMead(Strategy):
         return True, None, None
 
     # Function to check whether a point meets the constraints of the domain
+    @span("NelderMead.check_constraints")
     def check_constraints(self, tmp_next_experiments):
-        constr_mask = np.asarray([True] * len(tmp_next_experiments)).T
-        if len(self.domain.constraints) > 0:
-            constr = [c.constraint_type + "0" for c in self.domain.constraints]
-            constr_mask = [
-                pd.eval(c.lhs + constr[i], resolvers=[tmp_next_experiments])
-                for i, c in enumerate(self.domain.constraints)
-            ]
-            constr_mask = np.asarray([c.tolist() for c in constr_mask]).T
-            constr_mask = constr_mask.all(1)
-        return constr_mask
+        return self.domain.check_constraints(tmp_next_experiments)
 
     # Function to check whether a simplex contains only points that are identical in one dimension and the
     # the variable value fo this dimension corresponds to the bound value
@@ -960,6 +949,7 @@ class NelderMead(Strategy):
 
     ## Reflect and translate simplex from iteration before dimension with respect to the point that was found in the
     #  reduced dimension problem.
+    @span("NelderMead.recover_simplex_dim")
     def recover_simplex_dim(
         self, tmp_sim, tmp_red_sim, tmp_red_fsim, overfull_dim, bounds, memory, dx
     ):
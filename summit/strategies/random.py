@@ -1,7 +1,11 @@
 from .base import Strategy, Design, _closest_point_indices, Transform
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.lhs import lhs, lhs_chunks
+from summit.utils.design_cache import DesignCache, get_design_cache
+from summit.utils.sampling import ConstrainedSampler
 import numpy as np
+import warnings
 import pandas as pd
 from typing import Type, Tuple
 
@@ -15,6 +19,12 @@ class Random(Strategy):
         A summit domain object
     random_state: `np.random.RandomState``
         A random state object to seed the random generator
+    constraint_sampling : str, optional
+        How continuous variables are sampled when the domain has constraints:
+        "rejection", "hit-and-run" or "auto" to choose between them based on the
+        fraction of the domain that is feasible
+        (see :class:`~summit.utils.sampling.ConstrainedSampler`). If None, the
+        constraints are ignored. Default is "auto".
 
     Attributes
     ----------
@@ -51,10 +61,13 @@ class Random(Strategy):
         domain: Domain,
         transform: Transform = None,
         random_state: np.random.RandomState = None,
+        constraint_sampling: str = "auto",
         **kwargs,
     ):
         super().__init__(domain, transform, **kwargs)
         self._rstate = random_state if random_state else np.random.RandomState()
+        self.constraint_sampling = constraint_sampling
+        self._samplers = {}
 
     def suggest_experiments(self, num_experiments: int, **kwargs) -> DataSet:
         """Suggest experiments for a random experimental design
@@ -71,10 +84,30 @@ class Random(Strategy):
         """
         design = Design(self.domain, num_experiments, "random")
 
+        # Sample all continuous variables together if they are constrained
+        continuous = [
+            v for v in self.domain.input_variables if isinstance(v, ContinuousVariable)
+        ]
+        sampler = _get_sampler(
+            self,
+            [v.name for v in continuous],
+            [v.lower_bound for v in continuous],
+            [v.upper_bound for v in continuous],
+        )
+        if sampler is not None:
+            samples = sampler.sample(num_experiments)
+
         for variable in self.domain.variables:
             if variable.is_objective:
                 continue
-            if isinstance(variable, ContinuousVariable):
+            if isinstance(variable, ContinuousVariable) and sampler is not None:
+                j = continuous.index(variable)
+                values = variable.lower_bound + samples[:, j] * (
+                    variable.upper_bound - variable.lower_bound
+                )
+                values = np.atleast_2d(values)
+                indices = None
+            elif isinstance(variable, ContinuousVariable):
                 values = self._random_continuous(variable, num_experiments)
                 indices = None
             elif isinstance(variable, CategoricalVariable):
@@ -91,6 +124,29 @@ class Random(Strategy):
 
         return self.transform.un_transform(ds, categorical_method=None)
 
+    def iter_experiments(self, num_experiments: int, chunk_size: int = 10000):
+        """Generate a random experimental design in chunks of experiments
+
+        Only one chunk is held in memory at a time, so this can be used to screen
+        designs that are too large for `suggest_experiments`.
+
+        Parameters
+        ----------
+        num_experiments: int
+            The total number of experiments (i.e., samples) to generate
+        chunk_size: int, optional
+            The maximum number of experiments in each chunk. Default is 10000.
+
+        Yields
+        ------
+        next_experiments : :class:`~summit.utils.data.DataSet`
+            Dataset objects with consecutive experiments of the design
+        """
+        for start in range(0, num_experiments, chunk_size):
+            ds = self.suggest_experiments(min(chunk_size, num_experiments - start))
+            ds.index = ds.index + start
+            yield ds
+
     def _random_continuous(
         self, variable: ContinuousVariable, num_samples: int
     ) -> np.ndarray:
@@ -130,6 +186,20 @@ class LHS(Strategy):
         The method for transforming categorical variables. Either
         "one-hot" or "descriptors". Descriptors must be included in the
         categorical variables for the later.
+    design_cache : bool or :class:`~summit.utils.design_cache.DesignCache`, optional
+        Reuse designs in the unit hypercube from a design cache instead of generating
+        them again. If True, the default cache in `~/.summit/designs` is used. The seed
+        of each design is drawn from the random state, so a seeded strategy gets the
+        same designs from the cache in every run. Without a random state, a fixed seed
+        is used, so every run shares the same cached design. Default is None (no cache).
+    constraint_sampling : str, optional
+        How designs are sampled when the domain has constraints. With "rejection",
+        infeasible points are removed from a larger latin hypercube design, which
+        keeps the design space-filling. With "hit-and-run", points are sampled
+        uniformly from the feasible region, which is not a latin hypercube design.
+        "auto" uses rejection unless only a small fraction of the domain is
+        feasible (see :class:`~summit.utils.sampling.ConstrainedSampler`). If None,
+        the constraints are ignored. Default is "auto".
 
     Examples
     --------
@@ -173,13 +243,24 @@ class LHS(Strategy):
         transform: Transform = None,
         random_state: np.random.RandomState = None,
         categorical_method: str = None,
+        design_cache=None,
+        constraint_sampling: str = "auto",
     ):
         super().__init__(domain, transform)
         self._rstate = random_state if random_state else np.random.RandomState()
+        self._seeded = random_state is not None
         self.categorical_method = categorical_method
+        self.constraint_sampling = constraint_sampling
+        self._samplers = {}
+        if design_cache is True:
+            design_cache = get_design_cache()
+        elif design_cache is not None and design_cache is not False:
+            if not isinstance(design_cache, DesignCache):
+                raise TypeError("design_cache must be a bool or a DesignCache.")
+        self.design_cache = design_cache or None
 
     def suggest_experiments(
-        self, num_experiments, criterion="center", exclude=[], **kwargs
+        self, num_experiments, criterion="center", exclude=[], optimizer=None, **kwargs
     ) -> DataSet:
         """Generate latin hypercube intial design
 
@@ -193,34 +274,151 @@ class LHS(Strategy):
 
         exclude: array like, optional
             List of variable names that should be excluded from the design. Default is None.
+        optimizer: str, optional
+            Set to "swap" to improve maximin designs by swapping values within columns
+            (see :func:`~summit.utils.lhs.lhs`). Default is None.
 
         Returns
         -------
         next_experiments : :class:`~summit.utils.data.DataSet`
             A Dataset object with the suggested experiments
         """
-        # design = Design(self.domain, num_experiments, "Latin design", exclude=exclude)
-        design = pd.DataFrame()
+        # Sampling
+        n = self.domain.num_continuous_dimensions(include_descriptors=True)
+        sample_lhs = len(self._categoricals()) < n
+
+        def design(num_samples):
+            if self.design_cache is not None:
+                return self.design_cache.lhs(
+                    n,
+                    samples=num_samples,
+                    criterion=criterion,
+                    seed=self._cache_seed(),
+                    optimizer=optimizer,
+                )
+            return lhs(
+                n,
+                samples=num_samples,
+                criterion=criterion,
+                random_state=self._rstate,
+                optimizer=optimizer,
+            )
 
-        # Instantiate the random design class to be used with categorical variables with no descriptors
-        rdesigner = Random(self.domain, random_state=self._rstate)
+        samples = None
+        sampler = (
+            _get_sampler(self, *self._sample_columns(exclude)) if sample_lhs else None
+        )
+        if sampler is not None:
+            samples = sampler.sample(num_experiments, design=design)
+        elif sample_lhs:
+            samples = design(num_experiments)
+        return self._to_dataset(samples, num_experiments, exclude)
 
-        # Get categorical variables without descriptors
-        categoricals = []
-        for v in self.domain.input_variables:
-            if isinstance(v, CategoricalVariable):
-                if v.ds is None:
-                    categoricals.append(v.name)
+    def iter_experiments(
+        self,
+        num_experiments,
+        chunk_size=10000,
+        criterion="center",
+        exclude=[],
+        start=0,
+        stop=None,
+    ):
+        """Generate a latin hypercube design in chunks of experiments
 
-        # Sampling
+        Only one chunk is held in memory at a time, so this can be used to screen
+        designs that are too large for `suggest_experiments`. Any slice of the design
+        can be generated on its own, so several workers with identically seeded
+        random states can each take a disjoint slice using `start` and `stop`.
+        Categorical variables without descriptors are chosen randomly in each chunk.
+        Constraints are not applied, but the chunks can be filtered with
+        :meth:`~summit.domain.Domain.check_constraints`.
+
+        Parameters
+        ----------
+        num_experiments: int
+            The total number of experiments (i.e., samples) in the design
+        chunk_size: int, optional
+            The maximum number of experiments in each chunk. Default is 10000.
+        criterion: str, optional
+            Either "center" or "c" for points in the centres of the intervals or None
+            for random points within the intervals. Optimized criteria need the
+            whole design and are not supported. Default is center.
+        exclude: array like, optional
+            List of variable names that should be excluded from the design. Default is None.
+        start, stop : int, optional
+            Only generate experiments `start` to `stop` of the design. Default is all
+            experiments.
+
+        Yields
+        ------
+        next_experiments : :class:`~summit.utils.data.DataSet`
+            Dataset objects with consecutive experiments of the design
+        """
         n = self.domain.num_continuous_dimensions(include_descriptors=True)
-        if len(categoricals) < n:
-            samples = lhs(
+        stop = num_experiments if stop is None else min(stop, num_experiments)
+        if len(self._categoricals()) < n:
+            chunks = lhs_chunks(
                 n,
-                samples=num_experiments,
+                num_experiments,
+                chunk_size=chunk_size,
                 criterion=criterion,
                 random_state=self._rstate,
+                start=start,
+                stop=stop,
             )
+        else:
+            chunks = (None for _ in range(start, stop, chunk_size))
+        for chunk_start, samples in zip(range(start, stop, chunk_size), chunks):
+            size = min(chunk_size, stop - chunk_start)
+            ds = self._to_dataset(samples, size, exclude)
+            ds.index = ds.index + chunk_start
+            yield ds
+
+    def _cache_seed(self):
+        """Seed of the next design from the design cache"""
+        # An unseeded random state would give a new seed, and a new design in the
+        # cache, in every run
+        return self._rstate.randint(2**31 - 1) if self._seeded else 0
+
+    def _categoricals(self):
+        """Names of the categorical variables without descriptors"""
+        return [
+            v.name
+            for v in self.domain.input_variables
+            if isinstance(v, CategoricalVariable) and v.ds is None
+        ]
+
+    def _sample_columns(self, exclude):
+        """Names and bounds of the columns of the samples used by `_to_dataset`"""
+        categoricals = self._categoricals()
+        columns, lower, upper = [], [], []
+        for variable in self.domain.input_variables:
+            if variable.name in exclude:
+                continue
+            if isinstance(variable, ContinuousVariable):
+                columns.append(variable.name)
+                lower.append(variable.lower_bound)
+                upper.append(variable.upper_bound)
+            elif (
+                variable.name not in categoricals
+                and self.categorical_method is not None
+            ):
+                columns += variable.ds.data_columns
+                lower += variable.descriptor_bounds[0].tolist()
+                upper += variable.descriptor_bounds[1].tolist()
+        # Any remaining columns are not used
+        n = self.domain.num_continuous_dimensions(include_descriptors=True)
+        unused = n - len(columns)
+        return columns + [""] * unused, lower + [0.0] * unused, upper + [1.0] * unused
+
+    def _to_dataset(self, samples, num_experiments, exclude):
+        """Scale samples in the unit hypercube to the domain"""
+        # design = Design(self.domain, num_experiments, "Latin design", exclude=exclude)
+        design = pd.DataFrame()
+
+        # Instantiate the random design class to be used with categorical variables with no descriptors
+        rdesigner = Random(self.domain, random_state=self._rstate)
+        categoricals = self._categoricals()
 
         k = 0
         columns = []
@@ -257,14 +455,8 @@ class LHS(Strategy):
                 values = samples[:, k : k + num_descriptors]
 
                 # Scaling
-                var_min = (
-                    variable.ds.loc[:, variable.ds.data_columns].min(axis=0).to_numpy()
-                )
-                var_min = np.atleast_2d(var_min)
-                var_max = (
-                    variable.ds.loc[:, variable.ds.data_columns].max(axis=0).to_numpy()
-                )
-                var_max = np.atleast_2d(var_max)
+                var_min = np.atleast_2d(variable.descriptor_bounds[0])
+                var_max = np.atleast_2d(variable.descriptor_bounds[1])
                 var_range = var_max - var_min
 
                 # Rescale
@@ -293,253 +485,38 @@ class LHS(Strategy):
         pass
 
 
-"""
-The lhs code was copied from pyDoE and was originally published by 
-the following individuals for use with Scilab:
-    Copyright (C) 2012 - 2013 - Michael Baudin
-    Copyright (C) 2012 - Maria Christopoulou
-    Copyright (C) 2010 - 2011 - INRIA - Michael Baudin
-    Copyright (C) 2009 - Yann Collette
-    Copyright (C) 2009 - CEA - Jean-Marc Martinez
-    
-    website: forge.scilab.org/index.php/p/scidoe/sourcetree/master/macros
-Much thanks goes to these individuals. It has been converted to Python by 
-Abraham Lee.
-
-"""
-
+def _get_sampler(strategy, columns, lower, upper):
+    """Get a cached sampler for constrained columns or None if there are no constraints
 
-def lhs(n, samples=None, criterion=None, iterations=None, random_state=None):
+    Constraints that use variables which are not sampled (e.g., outputs or
+    categorical variables) cannot be applied and are skipped with a warning.
     """
-    Generate a latin-hypercube design
-
-    Parameters
-    ----------
-    n : int
-        The number of factors to generate samples for
-
-    Optional
-    --------
-    samples : int
-        The number of samples to generate for each factor (Default: n)
-    criterion : str
-        Allowable values are "center" or "c", "maximin" or "m",
-        "centermaximin" or "cm", and "correlation" or "corr". If no value
-        given, the design is simply randomized.
-    iterations : int
-        The number of iterations in the maximin and correlations algorithms
-        (Default: 5).
-
-    Returns
-    -------
-    H : 2d-array
-        An n-by-samples design matrix that has been normalized so factor values
-        are uniformly spaced between zero and one.
-
-    Example
-    -------
-    >>> import numpy as np
-
-    A 3-factor design (defaults to 3 samples)::
-
-        >>> lhs(3, random_state=np.random.RandomState(3))
-        array([[0.5036092 , 0.73574763, 0.6320977 ],
-               [0.70852844, 0.63098232, 0.09696825],
-               [0.1835993 , 0.23604927, 0.6838224 ]])
-
-    A 4-factor design with 6 samples::
-
-        >>> lhs(4, samples=6, random_state=np.random.RandomState(3))
-        array([[0.3419112 , 0.54641455, 0.3383127 , 0.59847714],
-               [0.88058751, 0.11802464, 0.61270915, 0.4094722 ],
-               [0.09179965, 0.40680164, 0.18759755, 0.20120715],
-               [0.67066365, 0.94885632, 0.90674229, 0.85947796],
-               [0.60819067, 0.31604885, 0.04848412, 0.08513793],
-               [0.31549116, 0.75980901, 0.70987541, 0.7358502 ]])
-
-    A 2-factor design with 5 centered samples::
-
-        >>> lhs(2, samples=5, criterion='center', random_state=np.random.RandomState(3))
-        array([[0.7, 0.7],
-               [0.1, 0.1],
-               [0.5, 0.9],
-               [0.3, 0.3],
-               [0.9, 0.5]])
-
-    A 3-factor design with 4 samples where the minimum distance between
-    all samples has been maximized::
-
-        >>> lhs(3, samples=4, criterion='maximin', random_state=np.random.RandomState(3))
-        array([[0.07987376, 0.37639351, 0.92316265],
-               [0.25650657, 0.7314332 , 0.12061145],
-               [0.55174153, 0.00530644, 0.56933076],
-               [0.79401553, 0.9975753 , 0.47950751]])
-
-    A 4-factor design with 5 samples where the samples are as uncorrelated
-    as possible (within 10 iterations)::
-
-        >>> lhs(4, samples=5, criterion='correlation', iterations=10, random_state=np.random.RandomState(3))
-        array([[0.72982881, 0.91177082, 0.73525098, 0.71817256],
-               [0.37858939, 0.48816197, 0.40597524, 0.10216552],
-               [0.80479638, 0.37925862, 0.85185049, 0.49136664],
-               [0.11015958, 0.65569746, 0.22511706, 0.88302024],
-               [0.41029344, 0.14162956, 0.05818095, 0.24144858]])
-    """
-    H = None
-    random_state = random_state if random_state else np.random.RandomState()
-
-    if samples is None:
-        samples = n
-
-    if criterion is not None:
-        assert criterion.lower() in (
-            "center",
-            "c",
-            "maximin",
-            "m",
-            "centermaximin",
-            "cm",
-            "correlation",
-            "corr",
-        ), 'Invalid value for "criterion": {}'.format(criterion)
-    else:
-        H = _lhsclassic(n, samples, random_state)
-
-    if criterion is None:
-        criterion = "center"
-
-    if iterations is None:
-        iterations = 5
-
-    if H is None:
-        if criterion.lower() in ("center", "c"):
-            H = _lhscentered(n, samples, random_state)
-        elif criterion.lower() in ("maximin", "m"):
-            H = _lhsmaximin(n, samples, iterations, "maximin", random_state)
-        elif criterion.lower() in ("centermaximin", "cm"):
-            H = _lhsmaximin(n, samples, iterations, "centermaximin", random_state)
-        elif criterion.lower() in ("correlation", "corr"):
-            H = _lhscorrelate(n, samples, iterations, random_state)
-
-    return H
-
-
-################################################################################
-
-
-def _lhsclassic(n, samples, random_state):
-    # Generate the intervals
-    cut = np.linspace(0, 1, samples + 1)
-
-    # Fill points uniformly in each interval
-    u = random_state.rand(samples, n)
-    a = cut[:samples]
-    b = cut[1 : samples + 1]
-    rdpoints = np.zeros_like(u)
-    for j in range(n):
-        rdpoints[:, j] = u[:, j] * (b - a) + a
-
-    # Make the random pairings
-    H = np.zeros_like(rdpoints)
-    for j in range(n):
-        order = random_state.permutation(range(samples))
-        H[:, j] = rdpoints[order, j]
-
-    return H
-
-
-################################################################################
-
-
-def _lhscentered(n, samples, random_state):
-    # Generate the intervals
-    cut = np.linspace(0, 1, samples + 1)
-
-    # Fill points uniformly in each interval
-    u = random_state.rand(samples, n)
-    a = cut[:samples]
-    b = cut[1 : samples + 1]
-    _center = (a + b) / 2
-
-    # Make the random pairings
-    H = np.zeros_like(u)
-    for j in range(n):
-        H[:, j] = random_state.permutation(_center)
-
-    return H
-
-
-################################################################################
-
-
-def _lhsmaximin(n, samples, iterations, lhstype, random_state):
-    maxdist = 0
-
-    # Maximize the minimum distance between points
-    for i in range(iterations):
-        if lhstype == "maximin":
-            Hcandidate = _lhsclassic(n, samples, random_state)
+    if not strategy.domain.constraints or strategy.constraint_sampling is None:
+        return None
+    key = tuple(columns)
+    if key in strategy._samplers:
+        return strategy._samplers[key]
+
+    constraints, skipped = [], []
+    for c in strategy.domain.constraints:
+        if all(name in columns for name in c.names):
+            constraints.append(c)
         else:
-            Hcandidate = _lhscentered(n, samples, random_state)
-
-        d = _pdist(Hcandidate)
-        if maxdist < np.min(d):
-            maxdist = np.min(d)
-            H = Hcandidate.copy()
-
-    return H
-
-
-################################################################################
-
-
-def _lhscorrelate(n, samples, iterations, random_state):
-    mincorr = np.inf
-
-    # Minimize the components correlation coefficients
-    for i in range(iterations):
-        # Generate a random LHS
-        Hcandidate = _lhsclassic(n, samples, random_state)
-        R = np.corrcoef(Hcandidate)
-        if np.max(np.abs(R[R != 1])) < mincorr:
-            mincorr = np.max(np.abs(R - np.eye(R.shape[0])))
-            # print('new candidate solution found with max,abs corrcoef = {}'.format(mincorr))
-            H = Hcandidate.copy()
-
-    return H
-
-
-################################################################################
-
-
-def _pdist(x):
-    """
-    Calculate the pair-wise point distances of a matrix
-
-    Parameters
-    ----------
-    x : 2d-array
-        An m-by-n array of scalars, where there are m points in n dimensions.
-
-    Returns
-    -------
-    d : array
-        A 1-by-b array of scalars, where b = m*(m - 1)/2. This array contains
-        all the pair-wise point distances, arranged in the order (1, 0),
-        (2, 0), ..., (m-1, 0), (2, 1), ..., (m-1, 1), ..., (m-1, m-2).
-
-
-    """
-
-    x = np.atleast_2d(x)
-    assert len(x.shape) == 2, "Input array must be 2d-dimensional"
-
-    m, n = x.shape
-    if m < 2:
-        return []
-
-    d = []
-    for i in range(m - 1):
-        for j in range(i + 1, m):
-            d.append((sum((x[j, :] - x[i, :]) ** 2)) ** 0.5)
-    return np.array(d)
+            skipped.append(c.lhs)
+    if skipped:
+        warnings.warn(
+            f"Constraints {skipped} use variables that are not sampled by {type(strategy).__name__} and are ignored."
+        )
+    sampler = None
+    if constraints:
+        lower, upper = np.array(lower, dtype=float), np.array(upper, dtype=float)
+        compiled = CompiledConstraints(
+            constraints, columns, offset=lower, scale=upper - lower
+        )
+        sampler = ConstrainedSampler(
+            compiled,
+            method=strategy.constraint_sampling,
+            random_state=strategy._rstate,
+        )
+    strategy._samplers[key] = sampler
+    return sampler
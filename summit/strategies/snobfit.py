@@ -1,6 +1,7 @@
 from .base import Strategy, Transform
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 
 from SQSnobFit._gen_utils import diag, max_, min_, find, extend, rand, sort
 from SQSnobFit._snobinput import snobinput
@@ -94,6 +95,7 @@ class SNOBFIT(Strategy):
         self._dx_dim = kwargs.get("dx_dim", 1e-5)
         self.prev_param = None
 
+    @span("SNOBFIT.suggest_experiments")
     def suggest_experiments(
         self, num_experiments=1, prev_res: DataSet = None, **kwargs
     ):
@@ -265,16 +267,10 @@ class SNOBFIT(Strategy):
                 elif isinstance(v, CategoricalVariable):
                     if v.ds is not None:
                         descriptor_names = v.ds.data_columns
-                        descriptors = np.asarray(
-                            [
-                                v.ds.loc[:, [l]].values.tolist()
-                                for l in v.ds.data_columns
-                            ]
-                        )
                     else:
                         raise ValueError("No descriptors given for {}".format(v.name))
-                    for d in descriptors:
-                        bounds.append([np.min(np.asarray(d)), np.max(np.asarray(d))])
+                    for lower, upper in zip(*v.descriptor_bounds):
+                        bounds.append([lower, upper])
                     input_var_names.extend(descriptor_names)
                 else:
                     raise TypeError(
@@ -434,6 +430,7 @@ class SNOBFIT(Strategy):
       res          current results (this iteration) including results from previous iterations
     """
 
+    @span("SNOBFIT.snobfit")
     def snobfit(self, x, f, config, dx=None, prev_param=None):
         ind = find(f[:, 1] <= 0)
         if not (ind.size <= 0 or numpy.all(ind == 0)):
@@ -981,14 +978,6 @@ class SNOBFIT(Strategy):
         return request, xbest, fbest, im_storage
 
     # Function to check whether a point meets the constraints of the domain
+    @span("SNOBFIT.check_constraints")
     def check_constraints(self, tmp_next_experiments):
-        constr_mask = np.asarray([True] * len(tmp_next_experiments)).T
-        if len(self.domain.constraints) > 0:
-            constr = [c.constraint_type + "0" for c in self.domain.constraints]
-            constr_mask = [
-                pd.eval(c.lhs + constr[i], resolvers=[tmp_next_experiments])
-                for i, c in enumerate(self.domain.constraints)
-            ]
-            constr_mask = np.asarray([c.tolist() for c in constr_mask]).T
-            constr_mask = constr_mask.all(1)
-        return constr_mask
+        return self.domain.check_constraints(tmp_next_experiments)
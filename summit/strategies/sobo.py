@@ -2,11 +2,13 @@ from .base import Strategy
 from .random import LHS
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 
 import GPy
 import GPyOpt
 
 import numpy as np
+import re
 import pandas as pd
 from abc import ABC, abstractmethod
 
@@ -146,21 +148,12 @@ class SOBO(Strategy):
                                 )
                             )
                         descriptor_names = v.ds.data_columns
-                        descriptors = np.asarray(
-                            [
-                                v.ds.loc[:, [l]].values.tolist()
-                                for l in v.ds.data_columns
-                            ]
-                        )
-                        for j, d in enumerate(descriptors):
+                        for j, (lower, upper) in enumerate(zip(*v.descriptor_bounds)):
                             self.input_domain.append(
                                 {
                                     "name": descriptor_names[j],
                                     "type": "continuous",
-                                    "domain": (
-                                        np.min(np.asarray(d)),
-                                        np.max(np.asarray(d)),
-                                    ),
+                                    "domain": (lower, upper),
                                 }
                             )
                     elif v.ds is None and self.use_descriptors:
@@ -249,6 +242,7 @@ class SOBO(Strategy):
         self.standardize_outputs = kwargs.get("standardize_outputs", True)
         self.prev_param = None
 
+    @span("SOBO.suggest_experiments")
     def suggest_experiments(
         self, num_experiments=1, prev_res: DataSet = None, **kwargs
     ):
@@ -283,12 +277,13 @@ class SOBO(Strategy):
             next_experiments = lhs.suggest_experiments((num_experiments))
             return next_experiments, None, float("inf"), None
             """
-            feasible_region = GPyOpt.Design_space(
-                space=self.input_domain, constraints=self.constraints
-            )
-            request = GPyOpt.experiment_design.initial_design(
-                "random", feasible_region, num_experiments
-            )
+            with span("SOBO.initial_design"):
+                feasible_region = GPyOpt.Design_space(
+                    space=self.input_domain, constraints=self.constraints
+                )
+                request = GPyOpt.experiment_design.initial_design(
+                    "random", feasible_region, num_experiments
+                )
         else:
             # Get inputs and outputs
             inputs, outputs = self.transform.transform_inputs_outputs(
@@ -320,24 +315,26 @@ class SOBO(Strategy):
                 X_step = inputs
                 Y_step = outputs
 
-            sobo_model = GPyOpt.methods.BayesianOptimization(
-                f=None,
-                domain=self.input_domain,
-                constraints=self.constraints,
-                model_type=self.gp_model_type,
-                kernel=self.kernel,
-                acquisition_type=self.acquisition_type,
-                acquisition_optimizer_type=self.optimizer_type,
-                normalize_Y=self.standardize_outputs,
-                batch_size=num_experiments,
-                evaluator_type=self.evaluator_type,
-                maximize=False,
-                ARD=self.ARD,
-                exact_feval=self.exact_feval,
-                X=X_step,
-                Y=Y_step,
-            )
-            request = sobo_model.suggest_next_locations()
+            with span("SOBO.build_model"):
+                sobo_model = GPyOpt.methods.BayesianOptimization(
+                    f=None,
+                    domain=self.input_domain,
+                    constraints=self.constraints,
+                    model_type=self.gp_model_type,
+                    kernel=self.kernel,
+                    acquisition_type=self.acquisition_type,
+                    acquisition_optimizer_type=self.optimizer_type,
+                    normalize_Y=self.standardize_outputs,
+                    batch_size=num_experiments,
+                    evaluator_type=self.evaluator_type,
+                    maximize=False,
+                    ARD=self.ARD,
+                    exact_feval=self.exact_feval,
+                    X=X_step,
+                    Y=Y_step,
+                )
+            with span("SOBO.suggest_next_locations"):
+                request = sobo_model.suggest_next_locations()
 
             # Store parameters (history of suggested points and function evaluations)
             param = [X_step, Y_step]
@@ -429,12 +426,25 @@ class SOBO(Strategy):
 
     def constr_wrapper(self, summit_domain):
         v_input_names = [v.name for v in summit_domain.variables if not v.is_objective]
+        compiled = summit_domain.compile_constraints(v_input_names)
         gpyopt_constraints = []
-        for c in summit_domain.constraints:
-            tmp_c = c.lhs
-            for v_input_index, v_input_name in enumerate(v_input_names):
-                v_gpyopt_name = "x[:," + str(v_input_index) + "]"
-                tmp_c = tmp_c.replace(v_input_name, v_gpyopt_name)
+        for i, c in enumerate(summit_domain.constraints):
+            if i in compiled.linear:
+                # Write out linear constraints from the compiled coefficients
+                k = compiled.linear.index(i)
+                terms = [
+                    f"{float(a)!r}*x[:,{j}]"
+                    for j, a in enumerate(compiled.A[k])
+                    if a != 0
+                ]
+                tmp_c = " + ".join(terms + [repr(float(compiled.b[k]))])
+            else:
+                tmp_c = c.lhs
+                for v_input_index, v_input_name in enumerate(v_input_names):
+                    v_gpyopt_name = "x[:," + str(v_input_index) + "]"
+                    tmp_c = re.sub(
+                        rf"\b{re.escape(v_input_name)}\b", v_gpyopt_name, tmp_c
+                    )
             gpyopt_constraints.append([tmp_c, c.constraint_type])
         return gpyopt_constraints
 
@@ -1,8 +1,15 @@
 from .base import Strategy, Transform
 from .random import LHS
 from summit.domain import *
-from summit.utils.multiobjective import pareto_efficient, hypervolume
+from summit.utils.multiobjective import (
+    pareto_efficient,
+    hypervolume,
+    hypervolume_improvement,
+    ParetoArchive,
+)
 from summit.utils.dataset import DataSet
+from summit.utils.rff import StackedRFF, sample_rff
+from summit.utils.profiling import span
 from summit import get_summit_config_path
 
 from GPy.models import GPRegression as gpr
@@ -50,12 +57,51 @@ class TSEMO(Strategy):
         Number of retries to use for spectral sampling iF the singular value decomposition
         fails. Retrying chooses a new Monte Carlo sampling which usually fixes the problem.
         Defualt is 10.
+    adaptive_spectral_points : bool, optional
+        Choose the number of spectral points of each objective adaptively, with
+        `n_spectral_points` as the maximum. Sampling starts with `min_spectral_points`
+        and the number is doubled until the RMSE between the sample and the GP posterior
+        mean on the training inputs is below `spectral_rmse_target` plus the average
+        posterior standard deviation. The number is kept for the next iteration,
+        so it only grows when the target is missed. Default is False.
+    spectral_rmse_target : float, optional
+        The target RMSE of adaptive spectral sampling, in units of the standard
+        deviation of the objective. Default is 0.05.
+    min_spectral_points : int, optional
+        The initial number of spectral points of adaptive spectral sampling.
+        Default is 100.
     generations : int, optional
         Number of generations used in the internal optimisation with NSGAII.
         Default is 100.
     pop_size : int, optional
         Population size used in the internal optimisation with NSGAII.
         Default is 100.
+    save_rffs : bool, optional
+        Save the spectral samples of each iteration to
+        `~/.summit/tsemo/<uuid>/models.h5` for debugging. Default is False.
+    rff_float32 : bool, optional
+        Evaluate the spectral samples in single precision during the internal
+        optimisation, which is roughly twice as fast. Default is False.
+    design_cache : bool or :class:`~summit.utils.design_cache.DesignCache`, optional
+        Take the initial latin hypercube design from the design cache in
+        `~/.summit/designs` (or the given cache) instead of optimising it again in
+        every run. Default is False.
+    random_state : `np.random.RandomState`, optional
+        Random state of the initial latin hypercube design. Without it, runs with a
+        design cache share the same initial design.
+    warm_start : bool, optional
+        Start fitting the GP hyperparameters from the values of the previous iteration
+        instead of running all restarts from random values. Default is False.
+    warm_start_restarts : int, optional
+        The number of extra random restarts when warm starting and the log likelihood
+        per data point changes by `likelihood_tol`. The number of restarts grows
+        with the size of the change up to the full number of restarts. Default is 5.
+    likelihood_tol : float, optional
+        The change in log likelihood per data point since the previous iteration that
+        triggers extra random restarts. Default is 0.1.
+    full_restart_period : int, optional
+        When warm starting, run the full number of random restarts every this many
+        iterations. Default is 10.
 
     Examples
     --------
@@ -80,7 +126,7 @@ class TSEMO(Strategy):
     `GPy <https://github.com/SheffieldML/GPy>`_ for GPs, and we accept any kernel in the Matérn family, including the
     exponential and squared exponential kernel. See [Rasmussen]_ for more information about GPs.
 
-    A deterministic function is sampled from each of the trained GPs. We use spectral sampling available in `pyrff <https://github.com/michaelosthege/pyrff>`_.
+    A deterministic function is sampled from each of the trained GPs using spectral sampling (see :func:`~summit.utils.rff.sample_rff`). The samples are stored in the format of `pyrff <https://github.com/michaelosthege/pyrff>`_.
     These sampled functions are optimised using NSGAII (via `pymoo <https://pymoo.org/>`_) to find a selection of potential conditions.
     Each of these conditions are evaluated using the hypervolume improvement (HVI) criterion, and the one(s) that offer the best
     HVI are suggested as the next experiments. More details about TSEMO can be found in the original paper [Bradford]_.
@@ -110,8 +156,8 @@ class TSEMO(Strategy):
                 uppers.append(v.bounds[1])
                 self.columns.append(v.name)
             elif type(v) == CategoricalVariable and v.ds is not None:
-                lowers += v.ds.min().to_list()
-                uppers += v.ds.max().to_list()
+                lowers += v.descriptor_bounds[0].tolist()
+                uppers += v.descriptor_bounds[1].tolist()
                 self.columns += [c[0] for c in v.ds.columns]
             elif type(v) == CategoricalVariable and v.ds is None:
                 raise DomainError(
@@ -127,14 +173,29 @@ class TSEMO(Strategy):
         # Spectral sampling settings
         self.n_spectral_points = kwargs.get("n_spectral_points", 1500)
         self.n_retries = kwargs.get("n_retries", 10)
+        self.adaptive_spectral_points = kwargs.get("adaptive_spectral_points", False)
+        self.spectral_rmse_target = kwargs.get("spectral_rmse_target", 0.05)
+        self.min_spectral_points = kwargs.get("min_spectral_points", 100)
 
         # NSGA-II tsemo_settings
         self.generations = kwargs.get("generations", 100)
         self.pop_size = kwargs.get("pop_size", 100)
 
+        self.save_rffs = kwargs.get("save_rffs", False)
+        self.rff_float32 = kwargs.get("rff_float32", False)
+        self.design_cache = kwargs.get("design_cache", False)
+        self._rstate = kwargs.get("random_state")
+
+        # Warm starting of GP hyperparameters
+        self.warm_start = kwargs.get("warm_start", False)
+        self.warm_start_restarts = kwargs.get("warm_start_restarts", 5)
+        self.likelihood_tol = kwargs.get("likelihood_tol", 0.1)
+        self.full_restart_period = kwargs.get("full_restart_period", 10)
+
         self.logger = kwargs.get("logger", logging.getLogger(__name__))
         self.reset()
 
+    @span("TSEMO.suggest_experiments")
     def suggest_experiments(self, num_experiments, prev_res: DataSet = None, **kwargs):
         """Suggest experiments using TSEMO
 
@@ -154,12 +215,20 @@ class TSEMO(Strategy):
         """
         # Suggest lhs initial design or append new experiments to previous experiments
         if prev_res is None:
-            lhs = LHS(self.domain)
+            lhs = LHS(
+                self.domain,
+                random_state=self._rstate,
+                design_cache=self.design_cache,
+            )
             self.iterations += 1
             k = num_experiments if num_experiments > 1 else 2
             return lhs.suggest_experiments(k, criterion="maximin")
         elif self.iterations == 1 and len(prev_res) == 1:
-            lhs = LHS(self.domain)
+            lhs = LHS(
+                self.domain,
+                random_state=self._rstate,
+                design_cache=self.design_cache,
+            )
             self.iterations += 1
             self.all_experiments = prev_res
             return lhs.suggest_experiments(num_experiments)
@@ -170,7 +239,7 @@ class TSEMO(Strategy):
 
         # Get inputs (decision variables) and outputs (objectives)
         inputs, outputs = self.transform.transform_inputs_outputs(
-            self.all_experiments, categorical_method="descriptors"
+            self.all_experiments, categorical_method="descriptors", incremental=True
         )
         if inputs.shape[0] < self.domain.num_continuous_dimensions():
             self.logger.warning(
@@ -231,9 +300,8 @@ class TSEMO(Strategy):
             model.Gaussian_noise.constrain_bounded(np.exp(-6), 1, warning=False)
 
             # Train model
-            model.optimize_restarts(
-                num_restarts=num_restarts, max_iters=10000, parallel=True, verbose=False
-            )
+            with span("TSEMO.fit_models"):
+                self._fit_model(name, model, num_restarts)
 
             # self.logger.info model hyperparameters
             lengthscales[i] = model.kern.lengthscale.values
@@ -253,9 +321,6 @@ class TSEMO(Strategy):
             self.logger.debug(f"RMSE train {name} = {rmse_train[i].round(2)}")
 
             # Spectral sampling
-            self.logger.debug(
-                f"Spectral sampling {name} with {self.n_spectral_points} spectral points."
-            )
             if type(model.kern) == GPy.kern.Exponential:
                 matern_nu = 1
             elif type(model.kern) == GPy.kern.Matern32:
@@ -269,26 +334,50 @@ class TSEMO(Strategy):
                     "Spectral sample currently only works with Matern type kernels, including RBF."
                 )
 
-            for _ in range(self.n_retries):
-                try:
-                    rffs[i] = pyrff.sample_rff(
-                        lengthscales=lengthscales[i],
-                        scaling=np.sqrt(variances[i]),
-                        noise=noises[i],
-                        kernel_nu=matern_nu,
-                        X=inputs_scaled.to_numpy(),
-                        Y=outputs_scaled[[name]].to_numpy()[:, 0],
-                        M=self.n_spectral_points,
-                    )
-                    break
-                except np.linalg.LinAlgError as e:
-                    self.logger.error(e)
-                except ValueError as e:
-                    self.logger.error(e)
-            if rffs[i] is None:
-                raise RuntimeError(
-                    f"Spectral sampling failed after {self.n_retries} retries."
+            X_train = inputs_scaled.to_numpy()
+            Y_train = outputs_scaled[[name]].to_numpy()[:, 0]
+            if self.adaptive_spectral_points:
+                n_spectral_points = self.spectral_points.get(
+                    name, min(self.min_spectral_points, self.n_spectral_points)
                 )
+                gp_mean, gp_var = model.predict_noiseless(X_train)
+                # A sample deviates from the posterior mean by about the
+                # posterior standard deviation, so only the excess is approximation error
+                target = self.spectral_rmse_target + np.sqrt(np.mean(gp_var))
+            else:
+                n_spectral_points = self.n_spectral_points
+            with span("TSEMO.spectral_sampling"):
+                while True:
+                    self.logger.debug(
+                        f"Spectral sampling {name} with {n_spectral_points} spectral points."
+                    )
+                    rffs[i] = self._sample_rff(
+                        lengthscales[i],
+                        variances[i],
+                        noises[i],
+                        matern_nu,
+                        X_train,
+                        Y_train,
+                        n_spectral_points,
+                    )
+                    if (
+                        not self.adaptive_spectral_points
+                        or n_spectral_points >= self.n_spectral_points
+                    ):
+                        break
+                    # Compare the sample to the exact GP posterior on the training inputs
+                    error = rmse(
+                        np.atleast_2d(rffs[i](X_train)).T, gp_mean, mean=0.0, std=1.0
+                    )
+                    if error <= target:
+                        break
+                    self.logger.debug(
+                        f"Spectral sample RMSE {error:.3f} of {name} is above the target {target:.3f}."
+                    )
+                    n_spectral_points = min(
+                        2 * n_spectral_points, self.n_spectral_points
+                    )
+            self.spectral_points[name] = n_spectral_points
             sample_f = lambda x: np.atleast_2d(rffs[i](x)).T
 
             rmse_train_spectral[i] = rmse(
@@ -304,20 +393,36 @@ class TSEMO(Strategy):
             i += 1
 
         # Save spectral samples
-        dp_results = get_summit_config_path() / "tsemo" / str(self.uuid_val)
-        os.makedirs(dp_results, exist_ok=True)
-        pyrff.save_rffs(rffs, pathlib.Path(dp_results, "models.h5"))
+        if self.save_rffs:
+            dp_results = get_summit_config_path() / "tsemo" / str(self.uuid_val)
+            os.makedirs(dp_results, exist_ok=True)
+            with span("TSEMO.save_rffs"):
+                pyrff.save_rffs(rffs, pathlib.Path(dp_results, "models.h5"))
+
+        # Constraints on the scaled decision variables
+        constraints = None
+        if self.domain.constraints:
+            inputs_min = self.inputs_min.to_numpy()[0]
+            inputs_max = self.inputs_max.to_numpy()[0]
+            constraints = self.domain.compile_constraints(
+                self.columns, offset=inputs_min, scale=inputs_max - inputs_min
+            )
 
         # NSGAII internal optimisation
         self.logger.info("Optimizing models using NSGAII.")
         optimizer = NSGA2(pop_size=self.pop_size)
         problem = TSEMOInternalWrapper(
-            pathlib.Path(dp_results, "models.h5"), self.domain, n_var=self.kern_dim
+            rffs,
+            self.domain,
+            n_var=self.kern_dim,
+            dtype=np.float32 if self.rff_float32 else np.float64,
+            constraints=constraints,
         )
         termination = get_termination("n_gen", self.generations)
-        self.internal_res = minimize(
-            problem, optimizer, termination, seed=1, verbose=False
-        )
+        with span("TSEMO.nsga2"):
+            self.internal_res = minimize(
+                problem, optimizer, termination, seed=1, verbose=False
+            )
         X = DataSet(self.internal_res.X, columns=self.columns)
         y = DataSet(
             self.internal_res.F, columns=[v.name for v in self.domain.output_variables]
@@ -362,10 +467,70 @@ class TSEMO(Strategy):
             self.iterations += 1
             return None
 
+    def _fit_model(self, name, model, num_restarts):
+        """Optimize the hyperparameters of a GP, warm starting if possible"""
+        n = model.num_data
+        prev = self.gp_params.get(name)
+        full = (
+            not self.warm_start
+            or prev is None
+            or self.iterations % self.full_restart_period == 0
+        )
+        if full:
+            model.optimize_restarts(
+                num_restarts=num_restarts, max_iters=10000, parallel=True, verbose=False
+            )
+        else:
+            # Start from the previous optimum and only add random restarts
+            # if the fit has changed a lot since the previous iteration
+            model[:] = prev["param_array"]
+            model.optimize(max_iters=10000)
+            change = abs(model.log_likelihood() / n - prev["log_likelihood"])
+            if change > self.likelihood_tol:
+                extra = int(
+                    np.ceil(self.warm_start_restarts * change / self.likelihood_tol)
+                )
+                extra = min(extra, num_restarts)
+                self.logger.debug(
+                    f"Log likelihood of {name} changed by {change:.3f}, running {extra} restarts."
+                )
+                model.optimize_restarts(
+                    num_restarts=extra + 1,
+                    max_iters=10000,
+                    parallel=True,
+                    verbose=False,
+                )
+        self.gp_params[name] = dict(
+            param_array=model.param_array.tolist(),
+            log_likelihood=float(model.log_likelihood() / n),
+        )
+
+    def _sample_rff(self, lengthscales, variance, noise, matern_nu, X, Y, M):
+        """Spectral sampling with retries if the factorization fails"""
+        for _ in range(self.n_retries):
+            try:
+                return sample_rff(
+                    lengthscales=lengthscales,
+                    scaling=np.sqrt(variance),
+                    noise=noise,
+                    kernel_nu=matern_nu,
+                    X=X,
+                    Y=Y,
+                    M=M,
+                )
+            except np.linalg.LinAlgError as e:
+                self.logger.error(e)
+            except ValueError as e:
+                self.logger.error(e)
+        raise RuntimeError(f"Spectral sampling failed after {self.n_retries} retries.")
+
     def reset(self):
         """Reset TSEMO state"""
         self.all_experiments = None
+        self.transform.reset()
         self.iterations = 0
+        self.gp_params = {}
+        self.spectral_points = {}
         self.samples = []  # Samples drawn using NSGA-II
         self.sample_fs = [0 for i in range(len(self.domain.output_variables))]
         self.uuid_val = uuid.uuid4()
@@ -380,6 +545,18 @@ class TSEMO(Strategy):
             n_retries=self.n_retries,
             pop_size=self.pop_size,
             generation=self.generations,
+            save_rffs=self.save_rffs,
+            rff_float32=self.rff_float32,
+            design_cache=self.design_cache,
+            warm_start=self.warm_start,
+            warm_start_restarts=self.warm_start_restarts,
+            likelihood_tol=self.likelihood_tol,
+            full_restart_period=self.full_restart_period,
+            gp_params=self.gp_params,
+            adaptive_spectral_points=self.adaptive_spectral_points,
+            spectral_rmse_target=self.spectral_rmse_target,
+            min_spectral_points=self.min_spectral_points,
+            spectral_points=self.spectral_points,
         )
         return super().to_dict(**strategy_params)
 
@@ -390,8 +567,11 @@ class TSEMO(Strategy):
         ae = d["strategy_params"]["all_experiments"]
         if ae is not None:
             tsemo.all_experiments = DataSet.from_dict(ae)
+        tsemo.gp_params = d["strategy_params"].get("gp_params", {})
+        tsemo.spectral_points = d["strategy_params"].get("spectral_points", {})
         return tsemo
 
+    @span("TSEMO.select_max_hvi")
     def _select_max_hvi(self, y, samples, num_evals=1):
         """Returns the point(s) that maximimize hypervolume improvement
 
@@ -429,55 +609,41 @@ class TSEMO(Strategy):
             np.max(Yfront, axis=0) - np.min(Yfront, axis=0)
         )
 
-        indices = []
-        n = samples.shape[1]
-        mask = np.ones(samples.shape[0], dtype=bool)
-        samples_indices = np.arange(0, samples.shape[0])
+        if len(Yfront) == 0:
+            raise ValueError("Pareto front length too short")
 
+        # Hypervolume improvement of every sample against the current front.
+        # After each greedy pick p, the improvement of a sample c drops by the
+        # improvement of max(c, p), the region c and p both dominate.
+        hv_improvement = hypervolume_improvement(samples, Yfront, r)
+        archive = ParetoArchive(Yfront.shape[1])
+        archive.insert(Yfront)
+        available = np.ones(samples.shape[0], dtype=bool)
+        indices = []
+        hv_imp = 0
         for i in range(num_evals):
-            masked_samples = samples[mask, :]
-            Yfront, _ = pareto_efficient(Ynew, maximize=False)
-            if len(Yfront) == 0:
-                raise ValueError("Pareto front length too short")
-
-            hv_improvement = []
-            hvY = hypervolume(Yfront, r)
-            # Determine hypervolume improvement by including
-            # each point from samples (masking previously selected poonts)
-            for sample in masked_samples:
-                sample = sample.reshape(1, n)
-                A = np.append(Ynew, sample, axis=0)
-                Afront, _ = pareto_efficient(A, maximize=False)
-                hv = hypervolume(Afront, r)
-                hv_improvement.append(hv - hvY)
-
-            hvY0 = hvY if i == 0 else hvY0
-            hv_improvement = np.array(hv_improvement)
-            masked_index = np.argmax(hv_improvement)
-
-            # Housekeeping: find the max HvI point and mask out for next round
-            original_index = samples_indices[mask][masked_index]
-            new_point = samples[original_index, :].reshape(1, n)
-            Ynew = np.append(Ynew, new_point, axis=0)
-            mask[original_index] = False
-            indices.append(original_index)
+            if not np.any(available):
+                break
+            index = int(np.argmax(np.where(available, hv_improvement, -np.inf)))
+            hv_imp += hv_improvement[index]
 
             # Append current estimate of the pareto front to sample_paretos
             samples_copy = samples_original.copy()
             samples_copy = samples_copy * self.output_std + self.output_mean
-            samples_copy[("hvi", "DATA")] = hv_improvement
+            samples_copy[("hvi", "DATA")] = np.where(available, hv_improvement, np.nan)
             self.samples.append(samples_copy)
 
-        if len(hv_improvement) == 0:
-            hv_imp = 0
-        elif len(indices) == 0:
-            indices = []
-            hv_imp = 0
-        else:
-            # Total hypervolume improvement
-            # Includes all points added to batch (hvY + last hv_improvement)
-            # Subtracts hypervolume without any points added (hvY0)
-            hv_imp = hv_improvement[masked_index] + hvY - hvY0
+            available[index] = False
+            indices.append(index)
+            new_point = samples[index]
+            update = available & (hv_improvement > 0)
+            hv_improvement[update] -= hypervolume_improvement(
+                np.maximum(samples[update], new_point), Yfront, r
+            )
+            hv_improvement = np.clip(hv_improvement, 0, None)
+            archive.insert(new_point)
+            Yfront = archive.front
+
         return hv_imp, indices
 
 
@@ -493,18 +659,37 @@ class TSEMOInternalWrapper(Problem):
 
     Parameters
     ----------
-    fp : os.PathLike
-        Path to a folder containing the rffs
+    rffs : list of callable or os.PathLike
+        The sampled functions for each objective (e.g., from `summit.utils.rff.sample_rff`)
+        or the path to an HDF5 file saved with `pyrff.save_rffs`.
     domain : :class:`~summit.domain.Domain`
         Domain used for optimisation.
+    n_var : int, optional
+        The number of decision variables. Defaults to the number of
+        continuous dimensions of the domain.
+    dtype : numpy.dtype, optional
+        The precision used to evaluate `pyrff` spectral samples, which are
+        evaluated together with :class:`~summit.utils.rff.StackedRFF`.
+        Default is `np.float64`.
+    constraints : :class:`~summit.domain.CompiledConstraints`, optional
+        The constraints of the domain compiled for the scaled inputs (see
+        :meth:`~summit.domain.Domain.compile_constraints`). Defaults to the
+        constraints compiled for the input variables of the domain.
+
     Notes
     -----
     It is assumed that the inputs are scaled between 0 and 1.
 
     """
 
-    def __init__(self, fp: os.PathLike, domain, n_var=None):
-        self.rffs = pyrff.load_rffs(fp)
+    def __init__(self, rffs, domain, n_var=None, dtype=np.float64, constraints=None):
+        if isinstance(rffs, (str, os.PathLike)):
+            rffs = pyrff.load_rffs(rffs)
+        self.rffs = rffs
+        if all(hasattr(rff, "sample_of_theta") for rff in rffs):
+            self.stacked_rffs = StackedRFF(rffs, dtype=dtype)
+        else:
+            self.stacked_rffs = None
         self.domain = domain
         # Number of decision variables
         if n_var is None:
@@ -513,6 +698,9 @@ class TSEMOInternalWrapper(Problem):
         # Number of objectives
         n_obj = len(domain.output_variables)
         # Number of constraints
+        if constraints is None and domain.constraints:
+            constraints = domain.compile_constraints()
+        self.constraints = constraints
         n_constr = len(domain.constraints)
 
         super().__init__(n_var=n_var, n_obj=n_obj, n_constr=n_constr, xl=0, xu=1)
@@ -520,9 +708,12 @@ class TSEMOInternalWrapper(Problem):
     def _evaluate(self, X, out, *args, **kwargs):
         # input_columns = [v.name for v in self.domain.input_variables]
         # X = DataSet(np.atleast_2d(X), columns=input_columns)
-        F = np.zeros([X.shape[0], self.n_obj])
-        for i in range(self.n_obj):
-            F[:, i] = self.rffs[i](X)
+        if self.stacked_rffs is not None:
+            F = self.stacked_rffs(X)
+        else:
+            F = np.zeros([X.shape[0], self.n_obj])
+            for i in range(self.n_obj):
+                F[:, i] = self.rffs[i](X)
 
         # Negate objectives that are need to be maximized
         for i, v in enumerate(self.domain.output_variables):
@@ -531,8 +722,5 @@ class TSEMOInternalWrapper(Problem):
         out["F"] = F
 
         # Add constraints if necessary
-        if self.domain.constraints:
-            constraint_res = [
-                X.eval(c.lhs, resolvers=[X]) for c in self.domain.constraints
-            ]
-            out["G"] = [c.tolist()[0] for c in constraint_res]
+        if self.constraints is not None:
+            out["G"] = self.constraints.violation(X)
@@ -0,0 +1,318 @@
+"""Run a matrix of strategies and experiments locally in parallel"""
+
+from summit.run import Runner
+import summit.strategies as strategies_module
+import summit.benchmarks as benchmarks_module
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import argparse
+import itertools
+import json
+import logging
+import pathlib
+import random
+import sys
+import time
+import traceback
+
+__all__ = ["BenchmarkSuite"]
+
+logger = logging.getLogger(__name__)
+
+# Experiments are expensive to create (e.g., emulators load trained models),
+# so each worker process keeps the ones it has already created.
+_WORKER_CACHE = {}
+
+
+class BenchmarkSuite:
+    """Run every combination of strategies, experiments and seeds
+
+    Each combination (a "cell") is run with a :class:`~summit.run.Runner` in a pool
+    of local worker processes. Results are written to a JSON-lines file as soon as
+    each cell finishes, and cells that already completed are skipped when the suite
+    is run again, so a crashed or interrupted suite can be resumed.
+
+    Parameters
+    ----------
+    strategies : list
+        The strategies to benchmark. Each item is the name of a strategy, a strategy
+        class or a dictionary with the keys "name" (name or class of the strategy),
+        and optionally "params" (keyword arguments for the strategy), "transform"
+        (a dictionary with the "name" and "params" of a transform) and "label"
+        (a unique label for the results).
+    experiments : list
+        The experiments to run. Each item is the name of a benchmark in
+        `summit.benchmarks`, an `Experiment` class or a dictionary with the keys
+        "name", and optionally "params" and "label".
+    seeds : list of int
+        The random seeds. Each strategy and experiment combination is repeated once for
+        every seed.
+    results_path : str, optional
+        The JSON-lines file where results are stored. Default is "benchmark_results.jsonl".
+    runner_params : dict, optional
+        Keyword arguments passed to :class:`~summit.run.Runner` (e.g., max_iterations,
+        batch_size).
+
+    Examples
+    --------
+    >>> suite = BenchmarkSuite(
+    ...     strategies=["Random", "LHS"],
+    ...     experiments=[{"name": "DTLZ2", "params": {"num_inputs": 6}}],
+    ...     seeds=[0, 1],
+    ...     results_path="test_results.jsonl",
+    ...     runner_params=dict(max_iterations=2, batch_size=2),
+    ... )
+    >>> summary = suite.run(max_workers=2)
+    >>> summary["complete"]
+    4
+    >>> import os; os.remove("test_results.jsonl")
+
+    """
+
+    def __init__(
+        self,
+        strategies,
+        experiments,
+        seeds,
+        results_path="benchmark_results.jsonl",
+        runner_params=None,
+    ):
+        self.strategies = [_normalize_spec(s) for s in strategies]
+        self.experiments = [_normalize_spec(e) for e in experiments]
+        self.seeds = list(seeds)
+        self.results_path = pathlib.Path(results_path)
+        self.runner_params = runner_params if runner_params is not None else {}
+
+        for specs in [self.strategies, self.experiments]:
+            labels = [spec["label"] for spec in specs]
+            if len(set(labels)) != len(labels):
+                raise ValueError(f"Labels must be unique, but got {labels}.")
+
+    @property
+    def cells(self):
+        """All the (strategy, experiment, seed) combinations"""
+        return [
+            dict(
+                id=_cell_id(strategy, experiment, seed),
+                strategy=strategy,
+                experiment=experiment,
+                seed=seed,
+                runner_params=self.runner_params,
+            )
+            for strategy, experiment, seed in itertools.product(
+                self.strategies, self.experiments, self.seeds
+            )
+        ]
+
+    def completed(self):
+        """Ids of the cells that have already completed successfully"""
+        return {
+            record["id"]
+            for record in self.load_results()
+            if record["status"] == "complete"
+        }
+
+    def run(self, max_workers=None):
+        """Run all cells that have not completed yet
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            The number of worker processes. If 1, cells are run in the current
+            process. Defaults to the number of CPUs.
+
+        Returns
+        -------
+        summary : dict
+            The number of cells that were skipped, completed and failed.
+
+        """
+        completed = self.completed()
+        cells = [cell for cell in self.cells if cell["id"] not in completed]
+        summary = dict(skipped=len(completed), complete=0, failed=0)
+        logger.info(f"Running {len(cells)} cells, skipping {len(completed)}.")
+
+        if self.results_path.parent and not self.results_path.parent.exists():
+            self.results_path.parent.mkdir(parents=True)
+        with open(self.results_path, "a") as f:
+            if max_workers == 1:
+                records = (_run_cell(cell) for cell in cells)
+                self._write_records(f, records, summary)
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    futures = [pool.submit(_run_cell, cell) for cell in cells]
+                    records = (future.result() for future in as_completed(futures))
+                    self._write_records(f, records, summary)
+        return summary
+
+    def _write_records(self, f, records, summary):
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            summary[record["status"]] += 1
+            if record["status"] == "failed":
+                logger.warning(f"Cell {record['id']} failed:\n{record['error']}")
+
+    def load_results(self, status=None):
+        """Load the records from the results file
+
+        If a cell was run several times (e.g., it failed and was resumed),
+        only the latest record is returned.
+
+        Parameters
+        ----------
+        status : str, optional
+            Only return records with this status ("complete" or "failed").
+
+        Returns
+        -------
+        records : list of dict
+            Each record has the id, strategy, experiment, seed, status and time of the cell.
+            Completed cells also have the serialized runner under "runner", which can be
+            loaded with `Runner.from_dict`. Failed cells have the traceback under "error".
+
+        """
+        if not self.results_path.exists():
+            return []
+        records = {}
+        with open(self.results_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partial line left by a crash
+                    continue
+                records[record["id"]] = record
+        records = list(records.values())
+        if status is not None:
+            records = [r for r in records if r["status"] == status]
+        return records
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            strategies=d["strategies"],
+            experiments=d["experiments"],
+            seeds=d["seeds"],
+            results_path=d.get("results_path", "benchmark_results.jsonl"),
+            runner_params=d.get("runner"),
+        )
+
+
+def _normalize_spec(spec):
+    if isinstance(spec, (str, type)):
+        spec = dict(name=spec)
+    else:
+        spec = dict(spec)
+    name = spec["name"] if isinstance(spec["name"], str) else spec["name"].__name__
+    label = name
+    transform = spec.get("transform")
+    if transform is not None:
+        transform_name = transform["name"]
+        if not isinstance(transform_name, str):
+            transform_name = transform_name.__name__
+        label += f"_{transform_name}"
+    spec.setdefault("label", label)
+    spec.setdefault("params", {})
+    return spec
+
+
+def _cell_id(strategy, experiment, seed):
+    return f"{strategy['label']}/{experiment['label']}/{seed}"
+
+
+def _resolve(name, module):
+    if isinstance(name, str):
+        return getattr(module, name)
+    return name
+
+
+def _get_experiment(spec):
+    """Get an experiment from the worker cache or create it"""
+    key = json.dumps(
+        dict(name=_resolve(spec["name"], benchmarks_module).__name__, **spec["params"]),
+        sort_keys=True,
+    )
+    experiment = _WORKER_CACHE.get(key)
+    if experiment is None:
+        experiment_cls = _resolve(spec["name"], benchmarks_module)
+        experiment = experiment_cls(**spec["params"])
+        _WORKER_CACHE[key] = experiment
+    experiment.reset()
+    return experiment
+
+
+def _get_strategy(spec, domain):
+    strategy_cls = _resolve(spec["name"], strategies_module)
+    transform = spec.get("transform")
+    params = dict(spec["params"])
+    if transform is not None:
+        transform_cls = _resolve(transform["name"], strategies_module)
+        params["transform"] = transform_cls(domain, **transform.get("params", {}))
+    return strategy_cls(domain, **params)
+
+
+def _seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    if "torch" in sys.modules:
+        sys.modules["torch"].manual_seed(seed)
+
+
+def _run_cell(cell):
+    """Run one cell of the benchmark matrix and return its record"""
+    record = dict(
+        id=cell["id"],
+        strategy=cell["strategy"]["label"],
+        experiment=cell["experiment"]["label"],
+        seed=cell["seed"],
+    )
+    start = time.time()
+    try:
+        _seed_everything(cell["seed"])
+        experiment = _get_experiment(cell["experiment"])
+        strategy = _get_strategy(cell["strategy"], experiment.domain)
+        r = Runner(strategy=strategy, experiment=experiment, **cell["runner_params"])
+        r.run(save_at_end=False)
+        record.update(status="complete", runner=r.to_dict())
+    except Exception:
+        record.update(status="failed", error=traceback.format_exc())
+    record["time"] = time.time() - start
+    return record
+
+
+def main(args=None):
+    """Command line entry point for running a benchmark suite from a JSON config
+
+    The config file should have the keys "strategies", "experiments", "seeds" and
+    optionally "runner" with the same format as the arguments of `BenchmarkSuite`.
+    """
+    parser = argparse.ArgumentParser(description="Run a summit benchmark suite")
+    parser.add_argument("config", help="JSON file describing the benchmark matrix")
+    parser.add_argument(
+        "--results",
+        default=None,
+        help="JSON-lines file to store results in. Overrides the config file.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Number of worker processes"
+    )
+    args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    if args.results is not None:
+        config["results_path"] = args.results
+    suite = BenchmarkSuite.from_dict(config)
+    summary = suite.run(max_workers=args.workers)
+    print(json.dumps(summary))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
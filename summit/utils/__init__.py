@@ -73,3 +73,74 @@ def listtonumpy(a, copy=True):
     if transform_all:
         a = np.array(a)
     return a
+
+
+def json_diff(old, new):
+    """Compute a compact difference between two JSON-like objects
+
+    Dictionaries are compared key by key and lists that only had items
+    appended (e.g., the data of a DataSet) store just the new items.
+    Anything else that changed is replaced.
+
+    Returns
+    -------
+    diff : dict or None
+        The difference, which can be applied with `json_patch`, or None if
+        the objects are equal.
+
+    Examples
+    --------
+    >>> old = {"a": 1, "b": [1, 2]}
+    >>> new = {"a": 1, "b": [1, 2, 3]}
+    >>> diff = json_diff(old, new)
+    >>> diff
+    {'op': 'patch', 'items': {'b': {'op': 'extend', 'values': [3]}}, 'removed': []}
+    >>> json_patch(old, diff) == new
+    True
+
+    """
+    if type(old) == dict and type(new) == dict:
+        items = {}
+        for k, v in new.items():
+            if k not in old:
+                items[k] = dict(op="replace", value=v)
+            else:
+                d = json_diff(old[k], v)
+                if d is not None:
+                    items[k] = d
+        removed = [k for k in old if k not in new]
+        if not items and not removed:
+            return None
+        return dict(op="patch", items=items, removed=removed)
+    elif type(old) == list and type(new) == list:
+        n = len(old)
+        if len(new) >= n and new[:n] == old:
+            if len(new) == n:
+                return None
+            return dict(op="extend", values=new[n:])
+        return dict(op="replace", value=new)
+    elif type(old) == type(new) and old == new:
+        return None
+    else:
+        return dict(op="replace", value=new)
+
+
+def json_patch(old, diff):
+    """Apply a difference computed by `json_diff`
+
+    The old object is not modified, but parts of it that did not
+    change are shared with the returned object.
+    """
+    if diff is None:
+        return old
+    elif diff["op"] == "replace":
+        return deepcopy(diff["value"])
+    elif diff["op"] == "extend":
+        return old + deepcopy(diff["values"])
+    elif diff["op"] == "patch":
+        new = {k: v for k, v in old.items() if k not in diff["removed"]}
+        for k, d in diff["items"].items():
+            new[k] = json_patch(old.get(k), d)
+        return new
+    else:
+        raise ValueError(f"Unknown diff operation {diff['op']}.")
@@ -0,0 +1,197 @@
+"""Cache of space-filling designs shared between runs and processes"""
+
+from summit import get_summit_config_path
+from summit.utils.lhs import lhs
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import numpy as np
+
+__all__ = ["DesignCache", "get_design_cache"]
+
+logger = logging.getLogger(__name__)
+
+_default_cache = None
+
+
+def get_design_cache():
+    """Return the default design cache in `~/.summit/designs`"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DesignCache()
+    return _default_cache
+
+
+class DesignCache:
+    """An in-memory and on-disk LRU cache of designs in the unit hypercube
+
+    Designs are identified by the parameters used to generate them, including the
+    random seed, so a cached design is exactly the design that would have been
+    generated. Designs are stored as `.npy` files, which are written atomically,
+    so several processes can share the same directory. The most recently used designs
+    are also kept in memory. Designs are always in the unit hypercube, and it is up to
+    the caller to scale them to the bounds of a domain.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path, optional
+        The directory where designs are stored. Defaults to `~/.summit/designs`.
+    max_memory_items : int, optional
+        The number of designs kept in memory. Default is 128.
+    max_disk_items : int, optional
+        The number of designs kept on disk. When this is exceeded, the least
+        recently used designs are removed. Default is 1000.
+
+    Examples
+    --------
+    >>> cache = DesignCache("designs")
+    >>> design = cache.lhs(3, samples=10, criterion="maximin", seed=0)
+    >>> design.shape
+    (10, 3)
+    >>> np.all(cache.lhs(3, samples=10, criterion="maximin", seed=0) == design)
+    True
+    >>> cache.clear()
+
+    """
+
+    def __init__(self, path=None, max_memory_items=128, max_disk_items=1000):
+        if path is None:
+            path = get_summit_config_path() / "designs"
+        self.path = pathlib.Path(path)
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lhs(
+        self,
+        n,
+        samples,
+        criterion=None,
+        iterations=None,
+        seed=0,
+        optimizer=None,
+        n_swaps=None,
+    ):
+        """Get a latin hypercube design
+
+        The arguments are the same as for :func:`~summit.utils.lhs.lhs`, except that
+        the random state is given by an integer seed.
+
+        Returns
+        -------
+        H : np.ndarray
+            A samples-by-n design in the unit hypercube.
+
+        """
+        params = dict(
+            n=n,
+            samples=samples,
+            criterion=criterion,
+            iterations=iterations,
+            optimizer=optimizer,
+            n_swaps=n_swaps,
+        )
+        return self.get(
+            dict(design="lhs", seed=int(seed), **params),
+            lambda: lhs(random_state=np.random.RandomState(seed), **params),
+        )
+
+    def get(self, key, generate):
+        """Get a design from the cache or generate and store it
+
+        Parameters
+        ----------
+        key : dict
+            JSON serializable parameters that identify the design.
+        generate : callable
+            Called without arguments to generate the design if it is not cached.
+
+        Returns
+        -------
+        design : np.ndarray
+            A copy of the design.
+
+        """
+        name = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            design = self._memory.get(name)
+            if design is not None:
+                self._memory.move_to_end(name)
+                return design.copy()
+
+        design = self._load(name)
+        if design is None:
+            design = np.asarray(generate(), dtype=float)
+            self._save(name, design)
+        with self._lock:
+            self._memory[name] = design
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+        return design.copy()
+
+    def clear(self):
+        """Remove all designs from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+        if self.path.exists():
+            for file in self.path.glob("*.npy"):
+                _remove(file)
+            try:
+                self.path.rmdir()
+            except OSError:
+                pass
+
+    def _file(self, name):
+        return self.path / f"{name}.npy"
+
+    def _load(self, name):
+        file = self._file(name)
+        try:
+            design = np.load(file, allow_pickle=False)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        # Mark the design as recently used
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+        return design
+
+    def _save(self, name, design):
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            tmp = self.path / f"{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, design, allow_pickle=False)
+            os.replace(tmp, self._file(name))
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Could not save design to the cache: {e}")
+
+    def _evict(self):
+        files = list(self.path.glob("*.npy"))
+        if len(files) <= self.max_disk_items:
+            return
+        files.sort(key=_mtime)
+        for file in files[: len(files) - self.max_disk_items]:
+            _remove(file)
+
+
+def _mtime(file):
+    try:
+        return file.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _remove(file):
+    try:
+        file.unlink()
+    except OSError:
+        pass
@@ -1,58 +1,89 @@
-import numpy as np
 """
-The lhs code was copied from pyDoE and was originally published by 
+The lhs code was copied from pyDoE and was originally published by
 the following individuals for use with Scilab:
     Copyright (C) 2012 - 2013 - Michael Baudin
     Copyright (C) 2012 - Maria Christopoulou
     Copyright (C) 2010 - 2011 - INRIA - Michael Baudin
     Copyright (C) 2009 - Yann Collette
     Copyright (C) 2009 - CEA - Jean-Marc Martinez
-    
+
     website: forge.scilab.org/index.php/p/scidoe/sourcetree/master/macros
-Much thanks goes to these individuals. It has been converted to Python by 
+Much thanks goes to these individuals. It has been converted to Python by
 Abraham Lee.
 
 """
-def lhs(n, samples=None, criterion=None, iterations=None, random_state=None):
+
+from scipy.spatial.distance import pdist, squareform
+import numpy as np
+
+__all__ = ["lhs", "lhs_chunks"]
+
+
+def lhs(
+    n,
+    samples=None,
+    criterion=None,
+    iterations=None,
+    random_state=None,
+    optimizer=None,
+    n_swaps=None,
+):
     """
     Generate a latin-hypercube design
-    
+
     Parameters
     ----------
     n : int
         The number of factors to generate samples for
-    
+
     Optional
     --------
     samples : int
         The number of samples to generate for each factor (Default: n)
     criterion : str
-        Allowable values are "center" or "c", "maximin" or "m", 
-        "centermaximin" or "cm", and "correlation" or "corr". If no value 
+        Allowable values are "center" or "c", "maximin" or "m",
+        "centermaximin" or "cm", and "correlation" or "corr". If no value
         given, the design is simply randomized.
     iterations : int
         The number of iterations in the maximin and correlations algorithms
         (Default: 5).
-    
+    random_state : np.random.RandomState
+        The random state used to generate the design.
+    optimizer : str
+        Set to "swap" to improve "maximin" and "centermaximin" designs by swapping
+        values within columns, which keeps the design a latin hypercube. Each swap
+        moves the point with the smallest distance to its nearest neighbour, and
+        only the distances to the two swapped points are recomputed.
+        If no value is given, the best of `iterations` random designs is returned.
+    n_swaps : int
+        The number of swaps tried by the "swap" optimizer (Default: twice the
+        number of samples).
+
+    Raises
+    ------
+    ValueError
+        If the optimizer is unknown or is given for a criterion other than
+        "maximin" or "centermaximin".
+
     Returns
     -------
     H : 2d-array
         An n-by-samples design matrix that has been normalized so factor values
         are uniformly spaced between zero and one.
-    
+
     Example
     -------
     >>> import numpy as np
-    
+
     A 3-factor design (defaults to 3 samples)::
-    
+
         >>> lhs(3, random_state=np.random.RandomState(3))
         array([[0.5036092 , 0.73574763, 0.6320977 ],
                [0.70852844, 0.63098232, 0.09696825],
                [0.1835993 , 0.23604927, 0.6838224 ]])
-       
+
     A 4-factor design with 6 samples::
-    
+
         >>> lhs(4, samples=6, random_state=np.random.RandomState(3))
         array([[0.3419112 , 0.54641455, 0.3383127 , 0.59847714],
                [0.88058751, 0.11802464, 0.61270915, 0.4094722 ],
@@ -60,28 +91,28 @@ def lhs(n, samples=None, criterion=None, iterations=None, random_state=None):
                [0.67066365, 0.94885632, 0.90674229, 0.85947796],
                [0.60819067, 0.31604885, 0.04848412, 0.08513793],
                [0.31549116, 0.75980901, 0.70987541, 0.7358502 ]])
-       
+
     A 2-factor design with 5 centered samples::
-    
+
         >>> lhs(2, samples=5, criterion='center', random_state=np.random.RandomState(3))
         array([[0.7, 0.7],
                [0.1, 0.1],
                [0.5, 0.9],
                [0.3, 0.3],
                [0.9, 0.5]])
-       
+
     A 3-factor design with 4 samples where the minimum distance between
     all samples has been maximized::
-    
+
         >>> lhs(3, samples=4, criterion='maximin', random_state=np.random.RandomState(3))
         array([[0.07987376, 0.37639351, 0.92316265],
                [0.25650657, 0.7314332 , 0.12061145],
                [0.55174153, 0.00530644, 0.56933076],
                [0.79401553, 0.9975753 , 0.47950751]])
-       
+
     A 4-factor design with 5 samples where the samples are as uncorrelated
     as possible (within 10 iterations)::
-    
+
         >>> lhs(4, samples=5, criterion='correlation', iterations=10, random_state=np.random.RandomState(3))
         array([[0.72982881, 0.91177082, 0.73525098, 0.71817256],
                [0.37858939, 0.48816197, 0.40597524, 0.10216552],
@@ -94,141 +125,344 @@ def lhs(n, samples=None, criterion=None, iterations=None, random_state=None):
 
     if samples is None:
         samples = n
-    
+
     if criterion is not None:
-        assert criterion.lower() in ('center', 'c', 'maximin', 'm', 
-            'centermaximin', 'cm', 'correlation', 
-            'corr'), 'Invalid value for "criterion": {}'.format(criterion)
+        assert criterion.lower() in (
+            "center",
+            "c",
+            "maximin",
+            "m",
+            "centermaximin",
+            "cm",
+            "correlation",
+            "corr",
+        ), 'Invalid value for "criterion": {}'.format(criterion)
     else:
         H = _lhsclassic(n, samples, random_state)
 
     if criterion is None:
-        criterion = 'center'
-    
+        criterion = "center"
+
     if iterations is None:
         iterations = 5
-        
+
+    if optimizer is not None:
+        if optimizer != "swap":
+            raise ValueError(f"Unknown LHS optimizer {optimizer}.")
+        if H is not None or criterion.lower() not in (
+            "maximin",
+            "m",
+            "centermaximin",
+            "cm",
+        ):
+            raise ValueError(
+                "The swap optimizer can only be used with the maximin and centermaximin criteria."
+            )
+
     if H is None:
-        if criterion.lower() in ('center', 'c'):
+        if criterion.lower() in ("center", "c"):
             H = _lhscentered(n, samples, random_state)
-        elif criterion.lower() in ('maximin', 'm'):
-            H = _lhsmaximin(n, samples, iterations, 'maximin', random_state)
-        elif criterion.lower() in ('centermaximin', 'cm'):
-            H = _lhsmaximin(n, samples, iterations, 'centermaximin', random_state)
-        elif criterion.lower() in ('correlation', 'corr'):
+        elif criterion.lower() in ("maximin", "m", "centermaximin", "cm"):
+            if criterion.lower() in ("maximin", "m"):
+                H = _lhsmaximin(n, samples, iterations, "maximin", random_state)
+            else:
+                H = _lhsmaximin(n, samples, iterations, "centermaximin", random_state)
+            if optimizer == "swap":
+                if n_swaps is None:
+                    n_swaps = 2 * samples
+                H = _maximin_swaps(H, n_swaps, random_state)
+        elif criterion.lower() in ("correlation", "corr"):
             H = _lhscorrelate(n, samples, iterations, random_state)
-    
+
     return H
 
+
+def lhs_chunks(
+    n,
+    samples,
+    chunk_size=10000,
+    criterion=None,
+    random_state=None,
+    start=0,
+    stop=None,
+):
+    """
+    Generate a latin-hypercube design in chunks of rows
+
+    The design is never held in memory. Instead of storing a permutation of the
+    intervals of each factor, the interval of each row is computed with a keyed
+    pseudo-random permutation, and the position within the interval with a keyed
+    hash of the row. All randomness comes from a few keys drawn from `random_state`,
+    so any slice of rows of a design can be generated independently. This lets
+    several workers each generate a disjoint part of the same design.
+
+    Parameters
+    ----------
+    n : int
+        The number of factors to generate samples for
+    samples : int
+        The total number of samples of the design
+    chunk_size : int, optional
+        The maximum number of rows in each chunk (Default: 10000)
+    criterion : str, optional
+        Either "center" or "c" to place points in the centres of the intervals.
+        If no value is given, points are placed randomly within the intervals.
+        Optimized criteria such as "maximin" need the whole design and are
+        not supported.
+    random_state : np.random.RandomState, optional
+        The random state used to draw the keys of the design.
+    start, stop : int, optional
+        Only generate rows `start` to `stop` of the design (Default: all rows)
+
+    Yields
+    ------
+    H : 2d-array
+        Chunks of at most `chunk_size` rows of the samples-by-n design.
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> H = np.concatenate(list(lhs_chunks(2, 100, chunk_size=30, random_state=np.random.RandomState(3))))
+    >>> H.shape
+    (100, 2)
+    >>> np.all(np.sort(np.floor(H * 100), axis=0) == np.arange(100)[:, np.newaxis])
+    True
+
+    """
+    random_state = random_state if random_state else np.random.RandomState()
+    if criterion is not None and criterion.lower() not in ("center", "c"):
+        raise ValueError(
+            f'Criterion "{criterion}" is not supported when generating a design in chunks.'
+        )
+    centered = criterion is not None
+    stop = samples if stop is None else min(stop, samples)
+    keys = random_state.randint(
+        0, np.iinfo(np.int64).max, size=(n, _FEISTEL_ROUNDS + 1), dtype=np.int64
+    ).astype(np.uint64)
+
+    for chunk_start in range(start, stop, chunk_size):
+        rows = np.arange(
+            chunk_start, min(chunk_start + chunk_size, stop), dtype=np.uint64
+        )
+        H = np.empty((rows.shape[0], n))
+        for j in range(n):
+            intervals = _permute(rows, samples, keys[j, :_FEISTEL_ROUNDS])
+            if centered:
+                offset = 0.5
+            else:
+                offset = (_mix(rows ^ keys[j, -1]) >> np.uint64(11)) * 2.0**-53
+            H[:, j] = (intervals + offset) / samples
+        yield H
+
+
 ################################################################################
 
+# Rounds of the Feistel network used to permute the intervals of chunked designs
+_FEISTEL_ROUNDS = 4
+
+
+def _mix(x):
+    """Hash an array of unsigned 64-bit integers (the splitmix64 finalizer)"""
+    x = (x + np.uint64(0x9E3779B97F4A7C15)) * np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def _permute(x, size, keys):
+    """Apply a keyed pseudo-random permutation of range(size) to an array x
+
+    A balanced Feistel network permutes the integers below the smallest power of
+    four that is at least `size`. Results outside of range(size) are permuted
+    again (cycle walking), which takes fewer than four rounds on average.
+    """
+    half = max(1, (int(size - 1).bit_length() + 1) // 2)
+    shift = np.uint64(half)
+    mask = np.uint64((1 << half) - 1)
+
+    def feistel(x):
+        left, right = x >> shift, x & mask
+        for key in keys:
+            left, right = right, left ^ (_mix(right ^ key) & mask)
+        return (left << shift) | right
+
+    x = feistel(x)
+    outside = np.flatnonzero(x >= size)
+    while outside.shape[0] > 0:
+        x[outside] = feistel(x[outside])
+        outside = outside[x[outside] >= size]
+    return x
+
+
+################################################################################
+
+
 def _lhsclassic(n, samples, random_state):
     # Generate the intervals
-    cut = np.linspace(0, 1, samples + 1)    
-    
+    cut = np.linspace(0, 1, samples + 1)
+
     # Fill points uniformly in each interval
     u = random_state.rand(samples, n)
     a = cut[:samples]
-    b = cut[1:samples + 1]
-    rdpoints = np.zeros_like(u)
-    for j in range(n):
-        rdpoints[:, j] = u[:, j]*(b-a) + a
-    
+    b = cut[1 : samples + 1]
+    rdpoints = u * (b - a)[:, np.newaxis] + a[:, np.newaxis]
+
     # Make the random pairings
     H = np.zeros_like(rdpoints)
     for j in range(n):
         order = random_state.permutation(range(samples))
         H[:, j] = rdpoints[order, j]
-    
+
     return H
-    
+
+
 ################################################################################
 
+
 def _lhscentered(n, samples, random_state):
     # Generate the intervals
-    cut = np.linspace(0, 1, samples + 1)    
-    
+    cut = np.linspace(0, 1, samples + 1)
+
     # Fill points uniformly in each interval
     u = random_state.rand(samples, n)
     a = cut[:samples]
-    b = cut[1:samples + 1]
-    _center = (a + b)/2
-    
+    b = cut[1 : samples + 1]
+    _center = (a + b) / 2
+
     # Make the random pairings
     H = np.zeros_like(u)
     for j in range(n):
         H[:, j] = random_state.permutation(_center)
-    
+
     return H
-    
+
+
 ################################################################################
 
-def _lhsmaximin(n, samples, iterations, lhstype, 
-                random_state):
+
+def _lhsmaximin(n, samples, iterations, lhstype, random_state):
     maxdist = 0
-    
+
     # Maximize the minimum distance between points
     for i in range(iterations):
-        if lhstype=='maximin':
+        if lhstype == "maximin":
             Hcandidate = _lhsclassic(n, samples, random_state)
         else:
             Hcandidate = _lhscentered(n, samples, random_state)
-        
+
         d = _pdist(Hcandidate)
-        if maxdist<np.min(d):
+        if maxdist < np.min(d):
             maxdist = np.min(d)
             H = Hcandidate.copy()
-    
+
     return H
 
+
 ################################################################################
 
-def _lhscorrelate(n, samples, iterations,
-                  random_state):
+
+def _lhscorrelate(n, samples, iterations, random_state):
     mincorr = np.inf
-    
+
     # Minimize the components correlation coefficients
     for i in range(iterations):
         # Generate a random LHS
         Hcandidate = _lhsclassic(n, samples, random_state)
         R = np.corrcoef(Hcandidate)
-        if np.max(np.abs(R[R!=1]))<mincorr:
-            mincorr = np.max(np.abs(R-np.eye(R.shape[0])))
+        if np.max(np.abs(R[R != 1])) < mincorr:
+            mincorr = np.max(np.abs(R - np.eye(R.shape[0])))
             # print('new candidate solution found with max,abs corrcoef = {}'.format(mincorr))
             H = Hcandidate.copy()
-    
+
     return H
-    
+
+
 ################################################################################
 
+
 def _pdist(x):
     """
     Calculate the pair-wise point distances of a matrix
-    
+
     Parameters
     ----------
     x : 2d-array
         An m-by-n array of scalars, where there are m points in n dimensions.
-    
+
     Returns
     -------
     d : array
         A 1-by-b array of scalars, where b = m*(m - 1)/2. This array contains
-        all the pair-wise point distances, arranged in the order (1, 0), 
+        all the pair-wise point distances, arranged in the order (1, 0),
         (2, 0), ..., (m-1, 0), (2, 1), ..., (m-1, 1), ..., (m-1, m-2).
-    
-              
+
+
     """
-    
+
     x = np.atleast_2d(x)
-    assert len(x.shape)==2, 'Input array must be 2d-dimensional'
-    
+    assert len(x.shape) == 2, "Input array must be 2d-dimensional"
+
     m, n = x.shape
-    if m<2:
+    if m < 2:
         return []
-    
-    d = []
-    for i in range(m - 1):
-        for j in range(i + 1, m):
-            d.append((sum((x[j, :] - x[i, :])**2))**0.5)
-    return np.array(d)
\ No newline at end of file
+
+    return pdist(x)
+
+
+################################################################################
+
+
+def _maximin_swaps(H, n_swaps, random_state):
+    """Increase the minimum distance of a design by swapping values within columns
+
+    At every step, one coordinate of the point closest to its nearest neighbour is
+    swapped with the same coordinate of a random other point. The swap is kept if
+    both points end up further from their nearest neighbours than the current
+    minimum distance, so the minimum distance never decreases. The squared distance
+    matrix and the distance of every point to its nearest neighbour are cached, and
+    only the rows of the two swapped points are updated.
+
+    """
+    samples, n = H.shape
+    if samples < 3:
+        return H
+    # Points are stored in columns, so distances are sums over short, contiguous rows
+    X = np.ascontiguousarray(H.T)
+    D = squareform(pdist(H, "sqeuclidean"))
+    np.fill_diagonal(D, np.inf)
+    nearest = D.min(axis=1)
+
+    for _ in range(n_swaps):
+        i = int(np.argmin(nearest))
+        k = random_state.randint(n)
+        r = random_state.randint(samples - 1)
+        if r >= i:
+            r += 1
+        X[k, i], X[k, r] = X[k, r], X[k, i]
+        d_i = _squared_distances(X, i)
+        if d_i.min() <= nearest[i]:
+            X[k, i], X[k, r] = X[k, r], X[k, i]
+            continue
+        d_r = _squared_distances(X, r)
+        if d_r.min() <= nearest[i]:
+            X[k, i], X[k, r] = X[k, r], X[k, i]
+            continue
+
+        # Points whose nearest neighbour was i or r need a full update
+        stale = (D[i] == nearest) | (D[r] == nearest)
+        D[i, :] = D[:, i] = d_i
+        D[r, :] = D[:, r] = d_r
+        nearest = np.minimum(nearest, np.minimum(d_i, d_r))
+        stale[[i, r]] = True
+        nearest[stale] = D[stale].min(axis=1)
+    return X.T.copy()
+
+
+def _squared_distances(X, i):
+    """Squared distances from point i to all points in the columns of X"""
+    d = (X[0] - X[0, i]) ** 2
+    for row in X[1:]:
+        d += (row - row[i]) ** 2
+    d[i] = np.inf
+    return d
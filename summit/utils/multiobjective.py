@@ -1,15 +1,29 @@
 from math import log, floor
+import bisect
 import random
 import warnings
 import numpy as np
+from scipy.stats import norm
 
-__all__ = ["pareto_efficient", "hypervolume"]
+__all__ = [
+    "pareto_efficient",
+    "nondominated_sort",
+    "ParetoArchive",
+    "hypervolume",
+    "hypervolume_montecarlo",
+    "hypervolume_improvement",
+    "HypervolumeTracker",
+]
 
 
 def pareto_efficient(data, maximize=True):
     """
     Find the pareto-efficient points
 
+    For two objectives, the points are sorted and swept in O(n log n). For more
+    objectives, Kung's divide-and-conquer algorithm is used. Of several identical
+    points, only the first is returned.
+
     Parameters
     ---------
     data: array-like
@@ -25,40 +39,603 @@ def pareto_efficient(data, maximize=True):
         indices is an array with the indices of the pareto points in the original data array
 
     """
-    original_data = data
-    indices = np.arange(data.shape[0])
+    data = np.asarray(data)
+    mask = _nondominated_mask(-data if maximize else data)
+    indices = np.flatnonzero(mask)
+    return data[indices], indices
+
+
+def nondominated_sort(data, maximize=True):
+    """Rank points by non-dominated sorting
+
+    Points on the pareto front have rank 0. Points that are only dominated by
+    points of rank 0 have rank 1, and so on. For two objectives, all ranks are found
+    in a single O(n log n) sweep. For more objectives, fronts are peeled off
+    one at a time with the same filter as `pareto_efficient`. Identical points
+    have the same rank.
+
+    Parameters
+    ----------
+    data : array-like
+        An (n_points, n_objectives) array
+    maximize : bool, optional
+        Whether the problem is a maximization or minimization problem.
+        Defaults to maximization (i.e,. True)
+
+    Returns
+    -------
+    ranks : np.ndarray
+        The rank of the front that each point belongs to
+
+    Examples
+    --------
+    >>> nondominated_sort(np.array([[1.0, 2.0], [2.0, 1.0], [2.0, 2.0], [3.0, 3.0]]), maximize=False)
+    array([0, 0, 1, 2])
+    >>> nondominated_sort(np.array([[1.0, 1.0], [1.0, 1.0], [2.0, 2.0]]), maximize=False)
+    array([0, 0, 1])
+
+    """
+    data = np.asarray(data, dtype=float)
+    if maximize:
+        data = -data
     n_points = data.shape[0]
-    next_point_index = 0  # Next index in the indices array to search for
-    while next_point_index < len(data):
-        if maximize:
-            nondominated_point_mask = np.any(data > data[next_point_index], axis=1)
-        else:
-            nondominated_point_mask = np.any(data < data[next_point_index], axis=1)
-        nondominated_point_mask[next_point_index] = True
-        indices = indices[nondominated_point_mask]  # Remove dominated points
-        data = data[nondominated_point_mask]
-        next_point_index = np.sum(nondominated_point_mask[:next_point_index]) + 1
-    return data, indices
+    ranks = np.zeros(n_points, dtype=int)
+    if n_points == 0:
+        return ranks
+    if data.shape[1] == 2:
+        # After sorting by the first objective, a point is dominated by a front
+        # if that front already has a point with a lower or equal second objective,
+        # unless that point is identical. The lowest second objective of each front
+        # does not decrease with the rank, and it belongs to the last point added
+        # to the front. Of the fronts with the same lowest second objective, only
+        # the last can have a point identical to the new one.
+        order = np.lexsort((data[:, 1], data[:, 0]))
+        front_minima = []
+        front_x = []
+        for i, x, y in zip(order.tolist(), *data[order].T.tolist()):
+            rank = bisect.bisect_right(front_minima, y)
+            if rank > 0 and front_minima[rank - 1] == y and front_x[rank - 1] == x:
+                rank -= 1
+            if rank == len(front_minima):
+                front_minima.append(y)
+                front_x.append(x)
+            else:
+                front_minima[rank] = y
+                front_x[rank] = x
+            ranks[i] = rank
+        return ranks
+
+    # Peel off the fronts of the unique points, so identical points share a rank
+    unique, inverse = np.unique(data, axis=0, return_inverse=True)
+    unique_ranks = np.zeros(unique.shape[0], dtype=int)
+    remaining = np.arange(unique.shape[0])
+    rank = 0
+    while len(remaining) > 0:
+        mask = _nondominated_mask(unique[remaining])
+        unique_ranks[remaining[mask]] = rank
+        remaining = remaining[~mask]
+        rank += 1
+    return unique_ranks[inverse.ravel()]
+
+
+def _nondominated_mask(data):
+    """Mask of the non-dominated rows of *data* (minimization)"""
+    n_points = data.shape[0]
+    mask = np.zeros(n_points, dtype=bool)
+    if n_points == 0:
+        return mask
+    candidates = np.arange(n_points)
+    if data.shape[1] > 2 and n_points > _KUNG_LEAF_SIZE:
+        # Cheaply remove points that are strictly dominated by one of the points
+        # with the lowest sums, which are all non-dominated. On typical data
+        # this leaves only a small fraction of the points for Kung's algorithm.
+        pivots = data[np.argsort(data.sum(axis=1))[:_N_PIVOTS]]
+        dominated = np.zeros(n_points, dtype=bool)
+        for pivot in pivots:
+            dominated |= np.all(pivot <= data, axis=1) & np.any(pivot < data, axis=1)
+        candidates = np.flatnonzero(~dominated)
+    # Sort lexicographically, so a point can only be dominated by points before it.
+    # The sort is stable, so the first of several identical points is kept.
+    order = candidates[np.lexsort(data[candidates].T[::-1])]
+    sorted_data = data[order]
+    if data.shape[1] == 1:
+        keep = sorted_data[:, 0] == sorted_data[0, 0]
+        keep[1:] = False
+    elif data.shape[1] == 2:
+        y_min = np.minimum.accumulate(sorted_data[:, 1])
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = sorted_data[1:, 1] < y_min[:-1]
+    else:
+        keep = np.zeros(len(order), dtype=bool)
+        keep[_kung(sorted_data, 0, len(order))] = True
+    mask[order[keep]] = True
+    return mask
 
 
-def hypervolume(pointset, ref):
+# Below this size, Kung's algorithm compares all pairs of points directly
+_KUNG_LEAF_SIZE = 64
+# The number of points used to remove dominated points before Kung's algorithm
+_N_PIVOTS = 16
+
+
+def _kung(data, start, stop):
+    """Kung's divide-and-conquer algorithm on lexicographically sorted points
+
+    Returns the positions of the non-dominated points in data[start:stop].
+    """
+    if stop - start <= _KUNG_LEAF_SIZE:
+        block = data[start:stop]
+        weakly_dominates = np.all(block[:, None, :] <= block[None, :, :], axis=2)
+        dominated = np.any(np.triu(weakly_dominates, k=1), axis=0)
+        return start + np.flatnonzero(~dominated)
+    middle = (start + stop) // 2
+    top = _kung(data, start, middle)
+    bottom = _kung(data, middle, stop)
+    # Points in the bottom half cannot dominate points in the top half
+    dominated = _weakly_dominated(data[bottom], data[top])
+    return np.concatenate([top, bottom[~dominated]])
+
+
+def _weakly_dominated(points, front):
+    """Whether each of *points* is weakly dominated by any point of *front*"""
+    dominated = np.zeros(points.shape[0], dtype=bool)
+    if front.shape[0] == 0:
+        return dominated
+    # Compare in chunks to bound memory use
+    chunk_size = max(1, 2**20 // (front.shape[0] * front.shape[1]))
+    for start in range(0, points.shape[0], chunk_size):
+        chunk = points[start : start + chunk_size]
+        dominated[start : start + chunk_size] = np.any(
+            np.all(front[None, :, :] <= chunk[:, None, :], axis=2), axis=1
+        )
+    return dominated
+
+
+class ParetoArchive:
+    """The pareto front of a growing set of points
+
+    Points are inserted in batches. Each batch is filtered on its own and then
+    compared only against the current front, so the cost of an insert depends on
+    the size of the front and not on the number of points inserted so far.
+    The front is stored in contiguous arrays that grow geometrically.
+
+    Every inserted point gets an id, which is its position in the sequence
+    of all points inserted so far.
+
+    Parameters
+    ----------
+    n_objectives : int
+        The number of objectives.
+    maximize : bool, optional
+        Whether the problem is a maximization or minimization problem.
+        Defaults to minimization (i.e., False).
+
+    Examples
+    --------
+    >>> archive = ParetoArchive(2)
+    >>> archive.insert([[1.0, 2.0], [2.0, 1.0]])
+    (array([0, 1]), array([], dtype=int64))
+    >>> archive.insert([[0.5, 0.5], [3.0, 3.0]])
+    (array([2]), array([0, 1]))
+    >>> archive.front
+    array([[0.5, 0.5]])
+
+    """
+
+    def __init__(self, n_objectives, maximize=False):
+        self.n_objectives = n_objectives
+        self.maximize = maximize
+        self.reset()
+
+    def reset(self):
+        """Remove all points"""
+        self._points = np.zeros((16, self.n_objectives))
+        self._ids = np.zeros(16, dtype=int)
+        self._size = 0
+        self.n_points = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def front(self):
+        """The non-dominated points in the order they were inserted"""
+        return self._points[: self._size].copy()
+
+    @property
+    def ids(self):
+        """The ids of the non-dominated points"""
+        return self._ids[: self._size].copy()
+
+    def insert(self, points):
+        """Insert points and update the front
+
+        Parameters
+        ----------
+        points : array-like
+            An (n_points, n_objectives) array of new points.
+
+        Returns
+        -------
+        added, removed : np.ndarray
+            The ids of the new points that joined the front and the ids of the
+            points that were on the front and became dominated.
+
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, self.n_objectives)
+        new_ids = self.n_points + np.arange(points.shape[0])
+        self.n_points += points.shape[0]
+
+        sign = -1.0 if self.maximize else 1.0
+        candidates = sign * points
+        keep = _nondominated_mask(candidates)
+        front = sign * self._points[: self._size]
+        # Identical points already on the front are kept instead of the new ones
+        keep[keep] = ~_weakly_dominated(candidates[keep], front)
+        points, new_ids = points[keep], new_ids[keep]
+        # The remaining candidates are not weakly dominated by the front, so any
+        # front point they weakly dominate is strictly dominated.
+        dominated = _weakly_dominated(front, candidates[keep])
+        removed = self._ids[: self._size][dominated]
+        if np.any(dominated):
+            survivors = np.flatnonzero(~dominated)
+            self._points[: len(survivors)] = self._points[survivors]
+            self._ids[: len(survivors)] = self._ids[survivors]
+            self._size = len(survivors)
+        self._append(points, new_ids)
+        return new_ids, removed
+
+    def _append(self, points, ids):
+        size = self._size + points.shape[0]
+        if size > self._points.shape[0]:
+            capacity = max(size, 2 * self._points.shape[0])
+            buffer = np.zeros((capacity, self.n_objectives))
+            buffer[: self._size] = self._points[: self._size]
+            self._points = buffer
+            id_buffer = np.zeros(capacity, dtype=int)
+            id_buffer[: self._size] = self._ids[: self._size]
+            self._ids = id_buffer
+        self._points[self._size : size] = points
+        self._ids[self._size : size] = ids
+        self._size = size
+
+
+def hypervolume(pointset, ref, method="auto"):
     """Compute the absolute hypervolume of a *pointset* according to the
     reference point *ref*.
+
+    Minimization is assumed, and points that do not dominate the reference are ignored.
+
+    Parameters
+    ----------
+    pointset : array-like
+        An (n_points, n_objectives) array
+    ref : array-like
+        The reference point
+    method : str, optional
+        The algorithm to use:
+
+        * "auto" (default): a sweep for two and three objectives and the
+          recursive algorithm for more objectives.
+        * "sweep": a sort-and-sweep for two objectives or an O(n log n)
+          sweep for three objectives.
+        * "recursive": the dimension-sweep algorithm of Fonseca et al. for any number of
+          objectives. This is the reference implementation.
+        * "montecarlo": a Monte-Carlo estimate (see `hypervolume_montecarlo`),
+          which is useful for five or more objectives.
+
+    Returns
+    -------
+    hv : float
+        The hypervolume
+
+    Examples
+    --------
+    >>> hypervolume(np.array([[1.0, 2.0], [2.0, 1.0]]), [3.0, 3.0])
+    3.0
+
     """
-    ref = np.array(ref)
+    ref = np.array(ref, dtype=float)
+    pointset = np.asarray(pointset, dtype=float)
     # Remove points above reference
-    for i in range(pointset.shape[1]):
-        indices = np.where(pointset[:, i] < ref[i])[0]
-        pointset = pointset[indices, :]
+    pointset = pointset[np.all(pointset < ref, axis=1)]
+    n_objs = pointset.shape[1]
 
+    if method == "auto":
+        method = "sweep" if n_objs in (2, 3) else "recursive"
     if len(pointset) == 0:
-        hv = 0
-    else:
+        return 0
+    elif method == "sweep" and n_objs == 2:
+        return _hypervolume_2d(pointset, ref)
+    elif method == "sweep" and n_objs == 3:
+        return _hypervolume_3d(pointset, ref)
+    elif method == "sweep":
+        raise ValueError("The sweep method only supports two or three objectives.")
+    elif method == "recursive":
         hyper = _HyperVolume(ref)
-        hv = hyper.compute(pointset)
+        return hyper.compute(pointset)
+    elif method == "montecarlo":
+        hv, _ = hypervolume_montecarlo(pointset, ref)
+        return hv
+    else:
+        raise ValueError(f"Unknown hypervolume method {method}.")
+
+
+def _hypervolume_2d(pointset, ref):
+    """Sort-and-sweep hypervolume for two objectives"""
+    order = np.lexsort((pointset[:, 1], pointset[:, 0]))
+    points = pointset[order]
+    # Keep the staircase of points where y strictly decreases
+    y_min = np.minimum.accumulate(points[:, 1])
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = y_min[1:] < y_min[:-1]
+    points = points[keep]
+    widths = np.diff(np.append(points[:, 0], ref[0]))
+    return float(np.sum(widths * (ref[1] - points[:, 1])))
+
+
+def _hypervolume_3d(pointset, ref):
+    """Hypervolume for three objectives by sweeping along the last objective
+
+    The points are added in order of the third objective to a two-dimensional staircase
+    (sorted by the first objective), whose dominated area is updated by only
+    the part that changes. This is the O(n log n) algorithm of Beume et al. (2009),
+    except that the staircase is stored in Python lists.
+
+    """
+    points = pointset[np.argsort(pointset[:, 2], kind="stable")]
+    xs, ys = [], []
+    area = 0.0
+    hv = 0.0
+    z_prev = points[0, 2]
+    ref_x, ref_y = ref[0], ref[1]
+    for x, y, z in points.tolist():
+        hv += area * (z - z_prev)
+        z_prev = z
+        j = bisect.bisect_left(xs, x)
+        # Skip points that are dominated in the first two objectives
+        if j > 0 and ys[j - 1] <= y:
+            continue
+        if j < len(xs) and xs[j] == x and ys[j] <= y:
+            continue
+        # Points in the staircase dominated by the new point are contiguous
+        e = j
+        while e < len(ys) and ys[e] >= y:
+            e += 1
+        x_right = xs[e] if e < len(xs) else ref_x
+        y_old = ys[j - 1] if j > 0 else ref_y
+        x_left = x
+        for k in range(j, e):
+            area += (xs[k] - x_left) * (y_old - y)
+            x_left, y_old = xs[k], ys[k]
+        area += (x_right - x_left) * (y_old - y)
+        xs[j:e] = [x]
+        ys[j:e] = [y]
+    hv += area * (ref[2] - z_prev)
     return hv
 
 
+def hypervolume_montecarlo(
+    pointset, ref, n_samples=100000, confidence=0.95, random_state=None
+):
+    """Estimate the hypervolume by Monte-Carlo sampling
+
+    Samples are drawn uniformly from the box between the ideal point of *pointset*
+    and *ref*, and the hypervolume is estimated from the fraction of samples that are
+    dominated by at least one point. The cost grows linearly with the number of
+    objectives, so this is useful when exact algorithms become too slow (five or more
+    objectives).
+
+    Parameters
+    ----------
+    pointset : array-like
+        An (n_points, n_objectives) array
+    ref : array-like
+        The reference point
+    n_samples : int, optional
+        The number of samples. Default is 100,000.
+    confidence : float, optional
+        The confidence level of the returned interval. Default is 0.95.
+    random_state : int or np.random.RandomState, optional
+        Seed or random state for the samples.
+
+    Returns
+    -------
+    hv, (lower, upper)
+        The estimated hypervolume and a confidence interval from the normal approximation
+        to the binomial distribution.
+
+    """
+    ref = np.array(ref, dtype=float)
+    pointset = np.asarray(pointset, dtype=float)
+    pointset = pointset[np.all(pointset < ref, axis=1)]
+    if len(pointset) == 0:
+        return 0.0, (0.0, 0.0)
+    pointset, _ = pareto_efficient(pointset, maximize=False)
+
+    rng = (
+        random_state
+        if isinstance(random_state, np.random.RandomState)
+        else np.random.RandomState(random_state)
+    )
+    lower = pointset.min(axis=0)
+    box_volume = np.prod(ref - lower)
+    # Check dominance in chunks to bound memory use
+    chunk_size = max(1, 2**22 // (pointset.shape[0] * pointset.shape[1]))
+    dominated = 0
+    for start in range(0, n_samples, chunk_size):
+        n = min(chunk_size, n_samples - start)
+        samples = lower + rng.rand(n, len(ref)) * (ref - lower)
+        is_dominated = np.any(
+            np.all(pointset[None, :, :] <= samples[:, None, :], axis=2), axis=1
+        )
+        dominated += int(np.count_nonzero(is_dominated))
+
+    fraction = dominated / n_samples
+    hv = box_volume * fraction
+    z = norm.ppf(0.5 + confidence / 2)
+    half_width = z * box_volume * np.sqrt(fraction * (1 - fraction) / n_samples)
+    return hv, (max(hv - half_width, 0.0), min(hv + half_width, box_volume))
+
+
+def hypervolume_improvement(candidates, front, ref):
+    """Compute the exclusive hypervolume contribution of each candidate
+
+    The hypervolume improvement of a candidate is the hypervolume gained by adding
+    it to *front*. It is calculated as the volume of the box between the candidate and
+    *ref* minus the hypervolume of the front limited to that box, so the full
+    hypervolume is never recomputed. For two objectives, all candidates are evaluated
+    at once against the staircase of the front.
+
+    Minimization is assumed.
+
+    Parameters
+    ----------
+    candidates : array-like
+        An (n_candidates, n_objectives) array
+    front : array-like
+        An (n_points, n_objectives) array of non-dominated points
+    ref : array-like
+        The reference point
+
+    Returns
+    -------
+    hvi : np.ndarray
+        The hypervolume improvement of each candidate
+
+    Examples
+    --------
+    >>> front = np.array([[1.0, 2.0], [2.0, 1.0]])
+    >>> hypervolume_improvement(np.array([[1.0, 1.0], [2.5, 2.5]]), front, [3.0, 3.0])
+    array([1., 0.])
+
+    """
+    ref = np.array(ref, dtype=float)
+    candidates = np.atleast_2d(np.asarray(candidates, dtype=float))
+    front = np.asarray(front, dtype=float).reshape(-1, len(ref))
+    front = front[np.all(front < ref, axis=1)]
+    hvi = np.zeros(candidates.shape[0])
+
+    # Only candidates that dominate the reference and are not dominated contribute
+    valid = np.all(candidates < ref, axis=1)
+    if front.shape[0] > 0:
+        dominated = np.any(
+            np.all(front[None, :, :] <= candidates[:, None, :], axis=2), axis=1
+        )
+        valid &= ~dominated
+    if not np.any(valid):
+        return hvi
+    c = candidates[valid]
+
+    if front.shape[0] == 0:
+        hvi[valid] = np.prod(ref - c, axis=1)
+    elif len(ref) == 2:
+        # Staircase of the front: y_stair[k] is the lowest y for x in [x_k, x_k+1)
+        front = front[np.argsort(front[:, 0], kind="stable")]
+        x_edges = np.concatenate([[-np.inf], front[:, 0], [ref[0]]])
+        y_stair = np.concatenate([[ref[1]], np.minimum.accumulate(front[:, 1])])
+        left = np.maximum(x_edges[None, :-1], c[:, 0:1])
+        widths = np.clip(x_edges[None, 1:] - left, 0, None)
+        heights = np.clip(y_stair[None, :] - c[:, 1:2], 0, None)
+        hvi[valid] = np.sum(widths * heights, axis=1)
+    else:
+        box_volumes = np.prod(ref - c, axis=1)
+        for i, (candidate, box_volume) in enumerate(zip(c, box_volumes)):
+            limited, _ = pareto_efficient(np.maximum(front, candidate), maximize=False)
+            box_volumes[i] = box_volume - hypervolume(limited, ref)
+        hvi[valid] = box_volumes
+    return np.clip(hvi, 0, None)
+
+
+class HypervolumeTracker:
+    """Track the hypervolume of a set of points as new points are added
+
+    The tracker keeps the current non-dominated set. When new points arrive, only those
+    that are not dominated by the front contribute, and each contribution is calculated
+    from the front limited to the box between the new point and the reference.
+    This means that the cost of an update depends on the size of the front
+    and not on the number of points seen so far.
+
+    Minimization is assumed, so negate any objectives that should be maximized.
+
+    Parameters
+    ----------
+    ref : array-like
+        The reference point for the hypervolume calculation.
+
+    Examples
+    --------
+    >>> tracker = HypervolumeTracker(ref=[1.0, 1.0])
+    >>> tracker.update([[0.5, 0.5]])
+    0.25
+    >>> tracker.update([[0.25, 0.75], [0.75, 0.75]])
+    0.3125
+
+    """
+
+    def __init__(self, ref):
+        self.ref = np.array(ref, dtype=float)
+        self.reset()
+
+    def reset(self):
+        """Remove all points"""
+        self.hypervolume = 0.0
+        self._archive = ParetoArchive(len(self.ref))
+        self.n_points = 0
+
+    @property
+    def front(self):
+        """The current non-dominated points"""
+        return self._archive.front
+
+    def update(self, points):
+        """Add points and return the updated hypervolume
+
+        Parameters
+        ----------
+        points : array-like
+            An (n_points, n_objectives) array of new points.
+
+        Returns
+        -------
+        hypervolume : float
+            The hypervolume of all points added so far.
+
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        self.n_points += points.shape[0]
+        # Only points that dominate the reference contribute
+        points = points[np.all(points < self.ref, axis=1)]
+        for p in points:
+            front = self._archive.front
+            if np.any(np.all(front <= p, axis=1)):
+                continue
+            self.hypervolume += hypervolume_improvement(p, front, self.ref)[0]
+            self._archive.insert(p)
+        return self.hypervolume
+
+    def trajectory(self, points, step=1):
+        """Add points in batches and return the hypervolume after each batch
+
+        Parameters
+        ----------
+        points : array-like
+            An (n_points, n_objectives) array of points in the order they were evaluated.
+        step : int, optional
+            The number of points in each batch. Default is 1.
+
+        Returns
+        -------
+        hypervolumes : np.ndarray
+            The hypervolume after each batch.
+
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        return np.array(
+            [self.update(points[i : i + step]) for i in range(0, points.shape[0], step)]
+        )
+
+
 class _HyperVolume:
     """
     This code is copied from the GA library DEAP.
@@ -149,7 +726,7 @@ class _HyperVolume:
             hvRecursive = self.hvRecursive
             p = sentinel
             q = p.prev[dimIndex]
-            while q.cargo != None:
+            while q.cargo is not None:
                 if q.ignore < dimIndex:
                     q.ignore = 0
                 q = q.prev[dimIndex]
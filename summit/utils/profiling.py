@@ -0,0 +1,188 @@
+"""Lightweight timing and memory spans for finding slow phases of strategies"""
+
+import functools
+import threading
+import time
+import tracemalloc
+
+__all__ = ["Profiler", "span", "get_profiler"]
+
+# The profiler that spans are recorded to. Spans are no-ops when it is None.
+_active = None
+
+
+def get_profiler():
+    """Return the active profiler or None if profiling is not enabled"""
+    return _active
+
+
+class Profiler:
+    """Registry of named spans
+
+    While a profiler is active, every `span` that is entered records its wall time
+    under its name. Spans with the same name are summed, so a span inside a loop
+    gives the total time of the loop body.
+
+    Parameters
+    ----------
+    trace_memory : bool, optional
+        Also record the peak memory allocated inside each span using `tracemalloc`.
+        This slows down allocations considerably, so it is off by default.
+
+    Examples
+    --------
+    >>> with Profiler() as profiler:
+    ...     with span("fit"):
+    ...         pass
+    >>> records = profiler.collect()
+    >>> records["fit"]["calls"]
+    1
+
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._previous = None
+
+    def start(self):
+        """Make this the active profiler"""
+        global _active
+        self._previous = _active
+        _active = self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self):
+        """Stop recording spans and restore the previously active profiler"""
+        global _active
+        _active = self._previous
+        self._previous = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def collect(self, reset=True):
+        """Return the records of all spans
+
+        Parameters
+        ----------
+        reset : bool, optional
+            Clear the records after collecting them. Default is True.
+
+        Returns
+        -------
+        records : dict
+            A dictionary from span names to dictionaries with the total "time"
+            in seconds, the number of "calls" and, if memory is traced, the
+            "peak_memory" in bytes above the memory in use when the span was entered.
+
+        """
+        with self._lock:
+            records = self.records
+            if reset:
+                self.records = {}
+            else:
+                records = {name: dict(r) for name, r in records.items()}
+        return records
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        frame = [time.perf_counter(), None, 0]
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            stack = self._stack()
+            if stack:
+                # Keep the peak of the enclosing span before resetting it
+                stack[-1][2] = max(stack[-1][2], peak)
+            _reset_peak()
+            frame[1] = current
+        self._stack().append(frame)
+
+    def _exit(self, name):
+        stack = self._stack()
+        start, start_memory, child_peak = stack.pop()
+        record_time = time.perf_counter() - start
+        peak_memory = None
+        if start_memory is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+            peak_memory = peak - start_memory
+            if stack:
+                stack[-1][2] = max(stack[-1][2], peak)
+        with self._lock:
+            record = self.records.setdefault(name, dict(time=0.0, calls=0))
+            record["time"] += record_time
+            record["calls"] += 1
+            if peak_memory is not None:
+                record["peak_memory"] = max(record.get("peak_memory", 0), peak_memory)
+
+
+def _reset_peak():
+    # tracemalloc.reset_peak is only available from Python 3.9
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+class span:
+    """Record the time spent in a block of code on the active profiler
+
+    Can be used as a context manager or as a decorator. When no profiler is
+    active, the overhead is a single check.
+
+    Parameters
+    ----------
+    name : str
+        The name of the span, by convention "<Class>.<phase>".
+
+    Examples
+    --------
+    >>> with span("TSEMO.fit_models"):
+    ...     pass
+    >>> @span("Transform.un_transform")
+    ... def un_transform(ds):
+    ...     return ds
+
+    """
+
+    __slots__ = ("name", "_profiler")
+
+    def __init__(self, name):
+        self.name = name
+        self._profiler = None
+
+    def __enter__(self):
+        self._profiler = _active
+        if self._profiler is not None:
+            self._profiler._enter()
+        return self
+
+    def __exit__(self, *args):
+        if self._profiler is not None:
+            self._profiler._exit(self.name)
+            self._profiler = None
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
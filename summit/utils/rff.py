@@ -0,0 +1,242 @@
+"""Sampling and fast evaluation of random Fourier feature (RFF) approximations of GP samples"""
+
+from pyrff.rff import RffApproximation
+from scipy.linalg import cho_solve, solve_triangular
+import numpy as np
+
+__all__ = ["sample_rff", "StackedRFF"]
+
+# Relative jitter added to the diagonal if a Cholesky factorization fails
+_JITTERS = [0.0, 1e-10, 1e-8, 1e-6]
+
+
+def sample_rff(lengthscales, scaling, noise, kernel_nu, X, Y, M):
+    """Sample an approximate function from a GP by spectral sampling
+
+    This is a drop-in replacement for `pyrff.sample_rff` that avoids forming and
+    inverting M x M matrices when it is not needed:
+
+    * If there are fewer observations n than spectral points M, the posterior of
+      the feature weights is sampled in the n x n dual form with Matheron's rule:
+      a prior sample is corrected using the Cholesky factor of
+      :math:`\\Phi^T \\Phi + \\sigma^2 I`. This costs O(M n^2) instead of O(M^3).
+    * Otherwise, the M x M precision matrix is factorized once, and both the
+      posterior mean and the sample are computed with triangular solves.
+
+    If a factorization fails, increasing jitter is added to the diagonal before a
+    `np.linalg.LinAlgError` is raised.
+
+    Parameters
+    ----------
+    lengthscales : array-like
+        The lengthscale of each input dimension (D,).
+    scaling : float
+        The kernel standard deviation (the square root of the kernel variance).
+    noise : float
+        The observation noise variance.
+    kernel_nu : float
+        The degrees of freedom of the spectral density of the kernel: 1, 3 and 5
+        for the Exponential, Matern32 and Matern52 kernels and `np.inf` for the
+        RBF kernel.
+    X : array-like
+        The inputs of the observations (n, D).
+    Y : array-like
+        The observed values (n,).
+    M : int
+        The number of spectral points.
+
+    Returns
+    -------
+    rff : `pyrff.rff.RffApproximation`
+        The sampled function, which can be evaluated on an (?, D) array and saved
+        with `pyrff.save_rffs`.
+
+    Examples
+    --------
+    >>> X = np.random.rand(10, 2)
+    >>> f = sample_rff(np.ones(2), 1.0, 1e-3, np.inf, X, np.sin(X[:, 0]), M=100)
+    >>> f(X).shape
+    (10,)
+
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    Y = np.atleast_1d(np.asarray(Y, dtype=float))
+    n, D = X.shape
+    lengthscales = np.atleast_1d(np.asarray(lengthscales, dtype=float))
+    if Y.shape != (n,):
+        raise ValueError(f"Shapes of X {X.shape} and Y {Y.shape} do not match.")
+    if lengthscales.shape != (D,):
+        raise ValueError(
+            f"Expected {D} lengthscales, but got an array of shape {lengthscales.shape}."
+        )
+    if kernel_nu <= 0:
+        raise ValueError("kernel_nu must be positive.")
+
+    # Spectral points of the kernel (see Bradford et al. (2018), equations 27 and 28)
+    if np.isinf(kernel_nu):
+        W = np.random.normal(size=(M, D)) / lengthscales
+    else:
+        W = np.random.standard_t(kernel_nu, size=(M, D)) / lengthscales
+    B = np.random.uniform(0, 2 * np.pi, size=(M, 1))
+    sqrt_2_alpha_over_m = np.sqrt(2 * scaling**2 / M)
+
+    # Features of the observations (n, M)
+    phi = np.dot(X, W.T)
+    phi += B.T
+    np.cos(phi, out=phi)
+    phi *= sqrt_2_alpha_over_m
+
+    theta = _sample_weights(phi, Y, noise)
+    return RffApproximation(sqrt_2_alpha_over_m, W, B, theta)
+
+
+def _sample_weights(phi, Y, noise):
+    """Sample the feature weights from their posterior given features phi (n, M)"""
+    n, M = phi.shape
+    if n < M:
+        # Matheron's rule: theta = u + phi^T (K + noise I)^-1 (Y - phi u - e) with
+        # a prior sample u ~ N(0, I) and noise e ~ N(0, noise I)
+        L = _cholesky(np.dot(phi, phi.T), noise)
+        u = np.random.normal(size=M)
+        residual = Y - np.dot(phi, u) - np.sqrt(noise) * np.random.normal(size=n)
+        return u + np.dot(phi.T, cho_solve((L, True), residual))
+    else:
+        # The posterior precision is A / noise with A = phi^T phi + noise I = L L^T,
+        # so the mean is A^-1 phi^T Y and sqrt(noise) L^-T z has covariance noise A^-1.
+        L = _cholesky(np.dot(phi.T, phi), noise)
+        mean = cho_solve((L, True), np.dot(phi.T, Y))
+        z = solve_triangular(L, np.random.normal(size=M), lower=True, trans="T")
+        return mean + np.sqrt(noise) * z
+
+
+def _cholesky(A, diagonal):
+    """Lower Cholesky factor of A + diagonal * I
+
+    Increasing jitter is added to the diagonal if the factorization fails.
+    A is modified in place.
+    """
+    diagonal_indices = np.diag_indices_from(A)
+    scale = np.mean(A[diagonal_indices]) + diagonal
+    A[diagonal_indices] += diagonal
+    added = 0.0
+    for jitter in _JITTERS:
+        A[diagonal_indices] += jitter * scale - added
+        added = jitter * scale
+        try:
+            return np.linalg.cholesky(A)
+        except np.linalg.LinAlgError:
+            continue
+    raise np.linalg.LinAlgError(
+        f"Cholesky factorization failed with a relative jitter of {_JITTERS[-1]}."
+    )
+
+
+class StackedRFF:
+    """Evaluate the RFF approximations of several objectives at once
+
+    A sample drawn from a GP by spectral sampling (e.g., with `sample_rff`) is
+    :math:`f(x) = \\sqrt{2\\alpha/M} \\sum_j \\theta_j \\cos(w_j^T x + b_j)`. Evaluating
+    each objective separately repeats the expensive part, the product of the inputs
+    with the spectral points, once per objective. This class stacks the
+    spectral points of all objectives into one matrix, so all objectives are
+    evaluated with a single matrix product followed by a product with a
+    block matrix of the weights.
+
+    The features are computed in bounded-memory chunks of candidates, in a buffer
+    that is reused between calls. This makes it suitable for the inner loop of
+    a genetic algorithm, which evaluates many small populations.
+
+    Parameters
+    ----------
+    rffs : list of `pyrff.rff.RffApproximation`
+        The sampled function of each objective. The functions may have different
+        numbers of spectral points, but must have the same input dimension.
+    dtype : numpy.dtype, optional
+        The precision of the features. `np.float32` roughly halves the evaluation
+        time at the cost of about six significant digits of precision.
+        Default is `np.float64`.
+    chunk_size : int, optional
+        The maximum number of candidates evaluated at once. By default, chunks
+        are chosen so that the feature buffer has at most 2**22 elements.
+
+    Examples
+    --------
+    >>> X = np.random.rand(10, 2)
+    >>> rffs = [
+    ...     sample_rff(
+    ...         lengthscales=np.ones(2), scaling=1.0, noise=1e-3, kernel_nu=np.inf,
+    ...         X=X, Y=np.sin(X[:, i]), M=100,
+    ...     )
+    ...     for i in range(2)
+    ... ]
+    >>> stacked = StackedRFF(rffs)
+    >>> stacked(X).shape
+    (10, 2)
+
+    """
+
+    def __init__(self, rffs, dtype=np.float64, chunk_size=None):
+        self.dtype = np.dtype(dtype)
+        self.n_outputs = len(rffs)
+        self.n_inputs = rffs[0].W.shape[1]
+        sizes = [rff.W.shape[0] for rff in rffs]
+        self.n_features = sum(sizes)
+
+        self.spectral_points = np.ascontiguousarray(
+            np.concatenate([rff.W for rff in rffs]).T, dtype=self.dtype
+        )
+        self.phases = np.concatenate([np.ravel(rff.B) for rff in rffs]).astype(
+            self.dtype
+        )
+        self.coefficients = np.zeros((self.n_features, self.n_outputs), self.dtype)
+        start = 0
+        for i, (rff, size) in enumerate(zip(rffs, sizes)):
+            self.coefficients[start : start + size, i] = (
+                rff.sqrt_2_alpha_over_m * rff.sample_of_theta
+            )
+            start += size
+
+        if chunk_size is None:
+            chunk_size = max(1, 2**22 // self.n_features)
+        self.chunk_size = chunk_size
+        self._features = None
+        self._outputs = None
+
+    def __call__(self, X, out=None):
+        """Evaluate all objectives
+
+        Parameters
+        ----------
+        X : array-like
+            An (n_candidates, n_inputs) array.
+        out : np.ndarray, optional
+            An (n_candidates, n_outputs) array to write the results into.
+
+        Returns
+        -------
+        F : np.ndarray
+            An (n_candidates, n_outputs) array with the value of each objective.
+
+        """
+        X = np.atleast_2d(X)
+        n = X.shape[0]
+        if out is None:
+            out = np.empty((n, self.n_outputs))
+        if n == 0:
+            return out
+        if self._features is None or self._features.shape[0] < min(n, self.chunk_size):
+            rows = min(n, self.chunk_size)
+            self._features = np.empty((rows, self.n_features), self.dtype)
+            self._outputs = np.empty((rows, self.n_outputs), self.dtype)
+
+        for start in range(0, n, self.chunk_size):
+            stop = min(start + self.chunk_size, n)
+            features = self._features[: stop - start]
+            outputs = self._outputs[: stop - start]
+            inputs = X[start:stop].astype(self.dtype, copy=False)
+            np.dot(inputs, self.spectral_points, out=features)
+            features += self.phases
+            np.cos(features, out=features)
+            np.dot(features, self.coefficients, out=outputs)
+            out[start:stop] = outputs
+        return out
@@ -0,0 +1,286 @@
+"""Vectorized sampling of points that satisfy the constraints of a domain"""
+
+from scipy.linalg import null_space
+from scipy.optimize import linprog
+import numpy as np
+
+__all__ = ["ConstrainedSampler", "hit_and_run"]
+
+
+class ConstrainedSampler:
+    """Sample points in the unit hypercube that satisfy constraints
+
+    Points are proposed in batches (e.g., uniformly or from a latin hypercube) and
+    the infeasible ones are rejected. The size of each batch is chosen from an
+    estimate of the acceptance rate, so usually a single batch gives all points.
+    When the acceptance rate is too low, which happens for narrow feasible regions
+    and for equality constraints, points are instead sampled uniformly from the
+    polytope of the linear constraints by hit-and-run. Nonlinear constraints are
+    always handled by rejection.
+
+    Parameters
+    ----------
+    constraints : :class:`~summit.domain.CompiledConstraints`
+        The constraints compiled for points in the unit hypercube (see
+        :meth:`~summit.domain.Domain.compile_constraints`).
+    method : str, optional
+        "rejection", "hit-and-run" or "auto" to choose hit-and-run when the
+        estimated acceptance rate is below `min_acceptance`. Default is "auto".
+    min_acceptance : float, optional
+        The lowest acceptance rate for which rejection is used. Default is 0.05.
+    n_pilot : int, optional
+        The number of uniform points used to estimate the acceptance rate.
+        Default is 1000.
+    n_steps : int, optional
+        The number of hit-and-run steps of each chain. Defaults to
+        `max(50, 10 * n_dims)`.
+    max_batches : int, optional
+        The number of batches after which sampling fails. Default is 20.
+    random_state : np.random.RandomState, optional
+        The random state used for sampling.
+
+    Examples
+    --------
+    >>> from summit.domain import Domain, ContinuousVariable, Constraint
+    >>> domain = Domain()
+    >>> domain += ContinuousVariable("x", "", bounds=[0, 1])
+    >>> domain += ContinuousVariable("y", "", bounds=[0, 1])
+    >>> domain += Constraint("x + y - 0.1")
+    >>> sampler = ConstrainedSampler(domain.compile_constraints())
+    >>> samples = sampler.sample(100)
+    >>> samples.shape, sampler.method
+    ((100, 2), 'hit-and-run')
+    >>> bool(np.all(samples.sum(axis=1) <= 0.1))
+    True
+
+    """
+
+    def __init__(
+        self,
+        constraints,
+        method="auto",
+        min_acceptance=0.05,
+        n_pilot=1000,
+        n_steps=None,
+        max_batches=20,
+        random_state=None,
+    ):
+        if method not in ["auto", "rejection", "hit-and-run"]:
+            raise ValueError(
+                f"Unknown method {method}. Use auto, rejection or hit-and-run."
+            )
+        self.constraints = constraints
+        self.n_dims = len(constraints.columns)
+        self.min_acceptance = min_acceptance
+        self.n_pilot = n_pilot
+        self.n_steps = n_steps
+        self.max_batches = max_batches
+        self._rstate = random_state if random_state else np.random.RandomState()
+        self._acceptance = None
+        self._method = method
+
+    @property
+    def method(self):
+        """The sampling method. The choice for "auto" is made on first use."""
+        if self._method == "auto":
+            if self.acceptance_rate() >= self.min_acceptance:
+                self._method = "rejection"
+            else:
+                self._method = "hit-and-run"
+        return self._method
+
+    def acceptance_rate(self):
+        """Estimate the fraction of uniform points that are feasible"""
+        if self._acceptance is None:
+            pilot = self._rstate.rand(self.n_pilot, self.n_dims)
+            self._acceptance = self.constraints.is_feasible(pilot).mean()
+        return self._acceptance
+
+    def sample(self, n, design=None):
+        """Sample feasible points
+
+        Parameters
+        ----------
+        n : int
+            The number of points.
+        design : callable, optional
+            Called with a number of points m to propose an (m, n_dims) design in the
+            unit hypercube for rejection. Defaults to uniform random points. Not used
+            by hit-and-run.
+
+        Returns
+        -------
+        samples : np.ndarray
+            An (n, n_dims) array of feasible points.
+
+        Raises
+        ------
+        ValueError
+            If the constraints are infeasible or no feasible points are found.
+
+        """
+        if len(self.constraints) == 0:
+            return self._uniform(n) if design is None else design(n)
+
+        if self.method == "rejection":
+            propose = self._uniform if design is None else design
+            check = self.constraints.is_feasible
+            acceptance = self.acceptance_rate()
+        else:
+            # Hit-and-run satisfies the linear constraints by construction
+            propose = self._hit_and_run
+            check = self._check_nonlinear
+            acceptance = 1.0
+        return self._reject(n, propose, check, acceptance)
+
+    def _reject(self, n, propose, check, acceptance):
+        """Propose batches of points until n are feasible"""
+        batches, found = [], 0
+        for _ in range(self.max_batches):
+            if found >= n:
+                break
+            # Oversample slightly so one batch is usually enough
+            m = int(np.ceil(1.2 * (n - found) / max(acceptance, 1e-3))) + 1
+            candidates = propose(m)
+            mask = check(candidates)
+            accepted = candidates[mask][: n - found]
+            batches.append(accepted)
+            found += accepted.shape[0]
+            acceptance = max(mask.mean(), acceptance / 10)
+        if found < n:
+            raise ValueError(
+                f"Only found {found} of {n} feasible points. The feasible region may be empty."
+            )
+        return np.concatenate(batches)[:n]
+
+    def _check_nonlinear(self, Z):
+        mask = np.ones(Z.shape[0], dtype=bool)
+        if self.constraints.nonlinear:
+            G = self.constraints.violation(Z)[:, self.constraints.nonlinear]
+            mask &= (G <= 0).all(axis=1)
+        return mask
+
+    def _uniform(self, n):
+        return self._rstate.rand(n, self.n_dims)
+
+    def _hit_and_run(self, n):
+        c = self.constraints
+        equality = np.array([sense == "==" for sense in c.sense], dtype=bool)
+        # Write inequalities as A z <= b
+        sign = np.array([-1.0 if sense in (">", ">=") else 1.0 for sense in c.sense])
+        A = c.A[~equality] * sign[~equality, None]
+        b = -c.b[~equality] * sign[~equality]
+        return hit_and_run(
+            n,
+            A,
+            b,
+            A_eq=c.A[equality],
+            b_eq=-c.b[equality],
+            n_steps=self.n_steps,
+            random_state=self._rstate,
+        )
+
+
+def hit_and_run(n, A, b, A_eq=None, b_eq=None, n_steps=None, random_state=None):
+    """Sample uniformly from a polytope in the unit hypercube by hit-and-run
+
+    The polytope is {z in [0, 1]^d : A z <= b, A_eq z = b_eq}. Independent chains start
+    at the Chebyshev center of the polytope, and all chains take a step together, so
+    the cost is a few matrix products per step. Steps alternate between random
+    directions and random coordinate directions.
+
+    Parameters
+    ----------
+    n : int
+        The number of points (and chains).
+    A, b : array-like
+        The inequality constraints (m, d) and (m,).
+    A_eq, b_eq : array-like, optional
+        The equality constraints. Points are sampled in the affine subspace where
+        they hold, so they are satisfied up to rounding errors.
+    n_steps : int, optional
+        The number of steps of each chain. Defaults to `max(50, 10 * d)`.
+    random_state : np.random.RandomState, optional
+        The random state used for sampling.
+
+    Returns
+    -------
+    samples : np.ndarray
+        An (n, d) array of points in the polytope.
+
+    Raises
+    ------
+    ValueError
+        If the polytope is empty or has no interior in the subspace of the
+        equality constraints.
+
+    Examples
+    --------
+    >>> samples = hit_and_run(10, A=[[1.0, 1.0]], b=[0.5])
+    >>> samples.shape
+    (10, 2)
+
+    """
+    rstate = random_state if random_state else np.random.RandomState()
+    A = np.atleast_2d(np.asarray(A, dtype=float))
+    b = np.asarray(b, dtype=float).ravel()
+    d = A.shape[1]
+    # Add the bounds of the hypercube
+    A = np.concatenate([A, np.eye(d), -np.eye(d)])
+    b = np.concatenate([b, np.ones(d), np.zeros(d)])
+
+    # Parametrize the subspace of the equality constraints as z = z0 + N w
+    if A_eq is not None and len(A_eq) > 0:
+        A_eq = np.atleast_2d(np.asarray(A_eq, dtype=float))
+        b_eq = np.asarray(b_eq, dtype=float).ravel()
+        z0 = np.linalg.lstsq(A_eq, b_eq, rcond=None)[0]
+        if not np.allclose(A_eq @ z0, b_eq):
+            raise ValueError("The equality constraints are inconsistent.")
+        N = null_space(A_eq)
+        if N.shape[1] == 0:
+            raise ValueError("The equality constraints leave no degrees of freedom.")
+    else:
+        z0, N = np.zeros(d), np.eye(d)
+    A_w = A @ N
+    b_w = b - A @ z0
+
+    # Start from the center of the largest ball in the polytope
+    norms = np.linalg.norm(A_w, axis=1)
+    k = N.shape[1]
+    res = linprog(
+        np.concatenate([np.zeros(k), [-1.0]]),
+        A_ub=np.column_stack([A_w, norms]),
+        b_ub=b_w,
+        bounds=[(None, None)] * k + [(0, None)],
+    )
+    if res.status != 0 or res.x[-1] <= 1e-12:
+        raise ValueError("The constraints have no feasible interior.")
+    center = res.x[:k]
+
+    if n_steps is None:
+        n_steps = max(50, 10 * d)
+    W = np.tile(center, (n, 1))
+    slack = np.tile(b_w - A_w @ center, (n, 1))
+    axes = np.eye(k)
+    for step in range(n_steps):
+        # Alternate random directions with coordinate directions, which mix faster
+        # along the long axes of thin polytopes
+        if step % 2 == 0:
+            directions = rstate.normal(size=(n, k))
+            directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        else:
+            directions = axes[rstate.randint(k, size=n)]
+        rates = directions @ A_w.T
+        # The step t is limited by the constraints with slack - t * rate >= 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            limits = slack / rates
+        upper = np.where(rates > 0, limits, np.inf).min(axis=1)
+        lower = np.where(rates < 0, limits, -np.inf).max(axis=1)
+        t = lower + rstate.rand(n) * (upper - lower)
+        W += t[:, None] * directions
+        slack -= t[:, None] * rates
+        np.maximum(slack, 0, out=slack)
+
+    samples = z0 + W @ N.T
+    np.clip(samples, 0, 1, out=samples)
+    return samples
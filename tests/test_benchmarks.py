@@ -4,12 +4,14 @@ from summit.experiment import Experiment
 from summit.benchmarks import (
     SnarBenchmark,
     DTLZ2,
+    VLMOP2,
     Hartmann3D,
     Himmelblau,
     ThreeHumpCamel,
     ReizmanSuzukiEmulator,
     BaumgartnerCrossCouplingEmulator,
 )
+from summit.domain import Constraint
 from summit.utils.dataset import DataSet
 import numpy as np
 import os
@@ -85,3 +87,107 @@ def test_dltz2_benchmark(num_inputs):
     assert np.isclose(data["y_0"].iloc[0], 0.7071)
     assert np.isclose(data["y_1"].iloc[0], 0.7071)
 
+
+
+@pytest.mark.parametrize("executor", [None, "thread", "process"])
+def test_parallel_run_experiments(executor, num_experiments=4):
+    """Test running a batch of experiments in parallel"""
+    b = SnarBenchmark()
+    columns = [v.name for v in b.domain.input_variables]
+    lower = np.array([v.bounds[0] for v in b.domain.input_variables])
+    upper = np.array([v.bounds[1] for v in b.domain.input_variables])
+    values = lower + np.random.rand(num_experiments, len(columns)) * (upper - lower)
+    ds = DataSet(values, columns=columns)
+    results = b.run_experiments(ds, executor=executor, max_workers=2)
+
+    # Results should come back in the same order as the conditions
+    assert np.allclose(results[columns].to_numpy().astype(float), values)
+    assert b.data.shape[0] == num_experiments
+    assert len(b.extras) == num_experiments
+    assert (b.data["experiment_t"].to_numpy().astype(float) > 0).all()
+
+    # Check against running the experiments one at a time
+    b_seq = SnarBenchmark()
+    for i in range(num_experiments):
+        b_seq.run_experiments(ds.iloc[[i]])
+    outputs = ["sty", "e_factor"]
+    assert np.allclose(
+        results[outputs].to_numpy().astype(float),
+        b_seq.data[outputs].to_numpy().astype(float),
+    )
+
+
+class ConstrainedVLMOP2(VLMOP2):
+    # Run one experiment per call, so the experiment is sent to the process pool
+    _run_batch = Experiment._run_batch
+
+    def _setup_domain(self, nobjs, nvars):
+        domain = super()._setup_domain(nobjs, nvars)
+        return domain + Constraint("x_0*x_1 - 1", "<=")
+
+
+def test_parallel_run_experiments_constrained(num_experiments=4):
+    """Test running experiments in processes after checking constraints"""
+    b = ConstrainedVLMOP2()
+    values = np.random.uniform(-1, 1, size=(num_experiments, 2))
+    ds = DataSet(values, columns=["x_0", "x_1"])
+    assert b.domain.check_constraints(ds).all()
+    results = b.run_experiments(ds, executor="process", max_workers=2)
+    assert np.allclose(results[["x_0", "x_1"]].to_numpy().astype(float), values)
+    assert b.data.shape[0] == num_experiments
+
+
+@pytest.mark.parametrize(
+    "experiment", [DTLZ2, VLMOP2, Himmelblau, Hartmann3D, ThreeHumpCamel]
+)
+def test_run_batch(experiment, num_experiments=10):
+    """Test that vectorized batches match running one row at a time"""
+    b = experiment()
+    columns = [v.name for v in b.domain.input_variables]
+    lower = np.array([v.bounds[0] for v in b.domain.input_variables])
+    upper = np.array([v.bounds[1] for v in b.domain.input_variables])
+    values = lower + np.random.rand(num_experiments, len(columns)) * (upper - lower)
+    ds = DataSet(values, columns=columns)
+    ds[("strategy", "METADATA")] = "test"
+    results = b.run_experiments(ds)
+
+    outputs = [v.name for v in b.domain.output_variables]
+    for i, (_, condition) in enumerate(ds.iterrows()):
+        res, _ = b._run(condition.copy())
+        expected = np.array([float(res[name]) for name in outputs])
+        assert np.allclose(results[outputs].iloc[i].to_numpy().astype(float), expected)
+    assert b.data.shape[0] == num_experiments
+    assert len(b.extras) == num_experiments
+    assert (b.data["strategy"] == "test").all()
+
+
+def test_experiment_data_log(num_batches=50, batch_size=3):
+    """Test that the experiment data grows and serializes correctly"""
+    b = DTLZ2(num_inputs=6, num_objectives=2)
+    columns = [v.name for v in b.domain.input_variables]
+    all_values = []
+    for i in range(num_batches):
+        values = np.random.rand(batch_size, len(columns))
+        ds = DataSet(values, columns=columns)
+        ds[("strategy", "METADATA")] = f"batch_{i}"
+        results = b.run_experiments(ds)
+        assert results.index[0] == i * batch_size
+        all_values.append(values)
+
+    data = b.data
+    assert data is b.data  # cached until new rows are added
+    assert data.shape[0] == num_batches * batch_size
+    assert np.allclose(data[columns].to_numpy(), np.vstack(all_values))
+    assert data["strategy"].iloc[-1] == f"batch_{num_batches-1}"
+
+    # Test serialization
+    d = b.to_dict()
+    new_b = DTLZ2.from_dict(d)
+    assert np.allclose(new_b.data[columns].to_numpy(), np.vstack(all_values))
+    new_b.run_experiments(ds)
+    assert new_b.data.shape[0] == num_batches * batch_size + batch_size
+
+    # Changing the data does not change the stored experiments
+    first = new_b.data.loc[0, (columns[0], "DATA")]
+    new_b.data.loc[0, (columns[0], "DATA")] = 99.0
+    assert new_b._log.to_dataset().loc[0, (columns[0], "DATA")] == first
@@ -1,5 +1,8 @@
 from summit.domain import *
 from summit.utils.dataset import DataSet
+import numpy as np
+import pandas as pd
+import pickle
 import pytest
 
 
@@ -109,6 +112,78 @@ def test_categorical_variable():
     assert all(var.ds) == all(new_var.ds)
 
 
+def test_categorical_variable_cached_arrays():
+    solvent_ds = DataSet(
+        [[5, 81], [-93, 111], [0, 100]],
+        index=["benzene", "toluene", "water"],
+        columns=["melting_point", "boiling_point"],
+    )
+    var = CategoricalVariable(
+        "solvent",
+        "solvent descriptors",
+        levels=["toluene", "benzene"],
+        descriptors=solvent_ds,
+    )
+    assert np.all(var.descriptor_matrix == solvent_ds.data_to_numpy())
+    assert var.descriptor_matrix is var.descriptor_matrix
+    with pytest.raises(ValueError):
+        var.descriptor_matrix[0, 0] = 1.0
+    assert var.descriptor_index == {"benzene": 0, "toluene": 1, "water": 2}
+    lower, upper = var.descriptor_bounds
+    assert np.all(lower == [-93, 81]) and np.all(upper == [5, 111])
+    assert np.all(var.get_descriptors(["water", "benzene"]) == [[0, 100], [5, 81]])
+    with pytest.raises(ValueError):
+        var.get_descriptors(["acetone"])
+
+    assert var.level_index == {"toluene": 0, "benzene": 1}
+    assert np.all(var.one_hot_matrix == np.eye(2))
+    var.add_level("water")
+    assert var.level_index["water"] == 2
+    assert var.one_hot_matrix.shape == (3, 3)
+    var.remove_level("toluene")
+    assert var.level_index == {"benzene": 0, "water": 1}
+
+    # Replacing the descriptors rebuilds the cached arrays
+    var.ds = DataSet([[1.0], [2.0]], index=["benzene", "water"], columns=["polarity"])
+    assert np.all(var.descriptor_matrix == [[1.0], [2.0]])
+    assert var.nearest_levels([[1.8]])[0] == "water"
+
+    with pytest.raises(ValueError):
+        CategoricalVariable("base", "", levels=["DBU", "TEA"]).descriptor_matrix
+
+
+@pytest.mark.parametrize("scaling", [None, "standard", "range"])
+def test_categorical_variable_nearest_levels(scaling):
+    rng = np.random.RandomState(0)
+    # Integer descriptors have many equally close levels
+    descriptors = rng.randint(0, 4, size=(200, 3)).astype(float)
+    solvent_ds = DataSet(
+        descriptors,
+        index=[f"solvent_{i}" for i in range(200)],
+        columns=["a", "b", "c"],
+    )
+    var = CategoricalVariable("solvent", "solvent descriptors", descriptors=solvent_ds)
+    points = rng.randint(0, 4, size=(100, 3)) + rng.choice([0, 0.5], size=(100, 3))
+
+    scale = np.ones(3)
+    if scaling == "standard":
+        scale = descriptors.std(axis=0)
+    elif scaling == "range":
+        scale = descriptors.max(axis=0) - descriptors.min(axis=0)
+    distances = (
+        ((points[:, np.newaxis, :] - descriptors[np.newaxis, :, :]) / scale) ** 2
+    ).sum(axis=2)
+    # The first of the levels that are equally close up to rounding errors
+    closest = distances.min(axis=1, keepdims=True)
+    expected = solvent_ds.index[np.argmax(distances <= closest * (1 + 1e-9), axis=1)]
+    assert np.all(var.nearest_levels(points, scaling=scaling) == expected)
+
+    with pytest.raises(ValueError):
+        var.nearest_levels(points, scaling="unknown")
+    with pytest.raises(ValueError):
+        CategoricalVariable("base", "", levels=["DBU", "TEA"]).nearest_levels(points)
+
+
 def test_constraint():
     for i in ["<", "<=", "==", ">", ">="]:
         c = Constraint("x+y", constraint_type=i)
@@ -117,6 +192,85 @@ def test_constraint():
         c = Constraint("x+y", "*=")
 
 
+def test_constraint_linear_terms():
+    assert Constraint("x+y").linear_terms == ({"x": 1.0, "y": 1.0}, 0.0)
+    assert Constraint("2*x - (y - 3)/2").linear_terms == ({"x": 2.0, "y": -0.5}, 1.5)
+    assert Constraint("-x*3 + 2**2").linear_terms == ({"x": -3.0}, 4.0)
+    for lhs in ["x*y", "x**2", "exp(x)", "1/x"]:
+        assert Constraint(lhs).linear_terms is None
+    assert Constraint("sqrt(x) + y").names == ["x", "y"]
+    with pytest.raises(ValueError):
+        Constraint("x +* y").names
+    with pytest.raises(ValueError):
+        Constraint("open(x)").names
+    with pytest.raises(ValueError):
+        Constraint("x.__class__").names
+
+
+def test_compiled_constraints():
+    domain = Domain()
+    domain += ContinuousVariable("x", "", bounds=[0, 2])
+    domain += ContinuousVariable("x1", "", bounds=[0, 2])
+    domain += ContinuousVariable("y", "", bounds=[0, 1], is_objective=True)
+    domain += Constraint("x + 2*x1 - 3", "<=")
+    domain += Constraint("x*x1 - 0.25", ">=")
+    domain += Constraint("-(x - x1)/2 + 0.5", ">")
+
+    compiled = domain.compile_constraints()
+    assert compiled is domain.compile_constraints()
+    assert compiled.linear == [0, 2] and compiled.nonlinear == [1]
+    assert np.allclose(compiled.A, [[1, 2], [-0.5, 0.5]])
+    assert np.allclose(compiled.b, [-3, 0.5])
+    assert compiled.sense == ["<=", ">"]
+
+    # The same results as evaluating the constraints with pandas
+    X = np.random.uniform(0, 2, size=(1000, 2))
+    ds = DataSet(X, columns=["x", "x1"])
+    lhs = np.column_stack(
+        [pd.eval(c.lhs, resolvers=[ds]).to_numpy() for c in domain.constraints]
+    )
+    mask = np.all(
+        [
+            pd.eval(c.lhs + c.constraint_type + "0", resolvers=[ds]).to_numpy()
+            for c in domain.constraints
+        ],
+        axis=0,
+    )
+    assert np.allclose(compiled.evaluate(X), lhs)
+    assert np.all(compiled.is_feasible(X) == mask)
+    assert np.all(domain.check_constraints(ds) == mask)
+    G = compiled.violation(X)
+    assert np.all((G <= 0).all(axis=1) == mask)
+
+    # Constraints in a space scaled to the unit square
+    scaled = domain.compile_constraints(offset=[0, 0], scale=[2, 2])
+    assert np.allclose(scaled.A, [[2, 4], [-1, 1]])
+    assert len(domain._compiled_constraints) == 1
+    assert np.allclose(scaled.evaluate(X / 2), lhs)
+    assert np.all(scaled.is_feasible(X / 2) == mask)
+
+    with pytest.raises(DomainError):
+        domain.compile_constraints(["x"])
+
+
+
+def test_compiled_constraints_pickle():
+    domain = Domain()
+    domain += ContinuousVariable("x", "", bounds=[0, 2])
+    domain += ContinuousVariable("y", "", bounds=[0, 2])
+    domain += Constraint("x + y - 3", "<=")
+    domain += Constraint("x*y - 0.25", ">=")
+    X = np.random.uniform(0, 2, size=(100, 2))
+    ds = DataSet(X, columns=["x", "y"])
+    mask = domain.check_constraints(ds)
+    compiled = domain.compile_constraints()
+
+    new_domain = pickle.loads(pickle.dumps(domain))
+    assert np.all(new_domain.check_constraints(ds) == mask)
+    new_compiled = pickle.loads(pickle.dumps(compiled))
+    assert np.allclose(new_compiled.evaluate(X), compiled.evaluate(X))
+
+
 def test_domain():
     var1 = ContinuousVariable(
         name="temperature",
@@ -1,12 +1,16 @@
 import pytest
-from summit import NeptuneRunner, Runner, Strategy, Experiment
+from summit import NeptuneRunner, Runner, AsyncRunner, BenchmarkSuite, Strategy, Experiment
+from summit import JSONLinesSink, SQLiteSink
 from summit.strategies import *
 from summit.benchmarks import *
 from summit.domain import *
 from summit.utils.dataset import DataSet
+from summit.utils.profiling import span
 
 import numpy as np
 import os
+import asyncio
+import json
 
 
 @pytest.mark.parametrize("max_iterations", [1, 10])
@@ -78,6 +82,274 @@ def test_runner_unit(max_iterations, batch_size, max_same, max_restarts, runner)
     assert r.experiment.data.shape[0] == int(batch_size * iterations)
 
 
+@pytest.mark.parametrize("num_slots", [1, 3])
+@pytest.mark.parametrize("coroutine", [True, False])
+def test_async_runner(num_slots, coroutine, max_iterations=5):
+    class MockStrategy(Strategy):
+        def __init__(self, domain):
+            super().__init__(domain)
+            self.calls = []
+
+        def suggest_experiments(self, num_experiments=1, prev_res=None, **kwargs):
+            n_prev = len(prev_res) if prev_res is not None else 0
+            self.calls.append((num_experiments, n_prev))
+            values = 0.5 * np.ones([num_experiments, 2])
+            return DataSet(values, columns=["x_1", "x_2"])
+
+        def reset(self):
+            pass
+
+    class MockExperiment(Experiment):
+        def __init__(self):
+            super().__init__(self.create_domain())
+
+        def create_domain(self):
+            domain = Domain()
+            domain += ContinuousVariable("x_1", description="", bounds=[0, 1])
+            domain += ContinuousVariable("x_2", description="", bounds=[0, 1])
+            domain += ContinuousVariable(
+                "y_1", description="", bounds=[0, 1], is_objective=True, maximize=True
+            )
+            return domain
+
+        def _run(self, conditions, **kwargs):
+            conditions[("y_1", "DATA")] = 0.5
+            return conditions, {}
+
+    class MockAsyncExperiment(MockExperiment):
+        async def _run(self, conditions, **kwargs):
+            await asyncio.sleep(0.01)
+            conditions[("y_1", "DATA")] = 0.5
+            return conditions, {}
+
+    exp = MockAsyncExperiment() if coroutine else MockExperiment()
+    strategy = MockStrategy(exp.domain)
+    r = AsyncRunner(
+        strategy=strategy,
+        experiment=exp,
+        num_slots=num_slots,
+        max_iterations=max_iterations,
+    )
+    r.run(save_at_end=False)
+
+    # Results are passed to the strategy at most once
+    assert len(strategy.calls) == max_iterations
+    assert strategy.calls[0] == (num_slots, 0)
+    num_experiments = sum(k for k, _ in strategy.calls)
+    assert sum(n for _, n in strategy.calls) <= num_experiments - strategy.calls[-1][0]
+    assert r.experiment.data.shape[0] == num_experiments
+    assert r.stats["num_experiments"] == num_experiments
+    assert 0 <= r.stats["utilisation"] <= 1
+
+
+def test_benchmark_suite(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    suite = BenchmarkSuite(
+        strategies=["Random", {"name": "LHS", "label": "LHS_maximin"}],
+        experiments=["VLMOP2", {"name": "DTLZ2", "params": {"num_inputs": 6}}],
+        seeds=[0, 1],
+        results_path=results_path,
+        runner_params=dict(max_iterations=2, batch_size=2),
+    )
+    summary = suite.run(max_workers=2)
+    assert summary == dict(skipped=0, complete=8, failed=0)
+
+    # Completed cells should not be run again
+    summary = suite.run(max_workers=2)
+    assert summary == dict(skipped=8, complete=0, failed=0)
+
+    records = suite.load_results(status="complete")
+    assert len(records) == 8
+    r = Runner.from_dict(records[0]["runner"])
+    assert r.experiment.data.shape[0] == 4
+
+    # Failed cells are recorded and rerun on resume
+    suite = BenchmarkSuite(
+        strategies=["Random"],
+        experiments=["NotABenchmark"],
+        seeds=[0],
+        results_path=results_path,
+    )
+    assert suite.run(max_workers=1)["failed"] == 1
+    assert suite.run(max_workers=1)["failed"] == 1
+    assert len(suite.load_results(status="failed")) == 1
+
+
+def test_runner_resume(tmp_path, max_iterations=5, batch_size=2):
+    exp = VLMOP2()
+    r = Runner(
+        strategy=Random(exp.domain),
+        experiment=exp,
+        max_iterations=max_iterations,
+        batch_size=batch_size,
+    )
+    r.run(save_freq=1, save_dir=tmp_path)
+    path = tmp_path / "runner" / str(r.uuid_val)
+    with open(path / "journal.jsonl", "r") as f:
+        lines = f.readlines()
+    assert len(lines) == max_iterations
+
+    # Simulate a crash while writing the third checkpoint
+    with open(path / "journal.jsonl", "w") as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:20])
+
+    r = Runner.resume(path, save_freq=1)
+    assert r.experiment.data.shape[0] == max_iterations * batch_size
+    assert r.experiment.data.iloc[:4].equals(exp.data.iloc[:4])
+    with open(path / "journal.jsonl", "r") as f:
+        lines = f.readlines()
+    assert len(lines) == max_iterations
+    assert [json.loads(line)["iteration"] for line in lines] == list(
+        range(max_iterations)
+    )
+
+
+def test_async_runner_resume(tmp_path, num_slots=2, max_iterations=3):
+    exp = VLMOP2()
+    r = AsyncRunner(
+        strategy=Random(exp.domain),
+        experiment=exp,
+        num_slots=num_slots,
+        max_iterations=max_iterations,
+    )
+    r.run(save_dir=tmp_path)
+    path = tmp_path / "runner" / str(r.uuid_val)
+    assert not list(path.glob("iteration_*.json"))
+    with open(path / "journal.jsonl", "r") as f:
+        lines = f.readlines()
+    assert [json.loads(line)["iteration"] for line in lines] == [max_iterations - 1]
+    n = exp.data.shape[0]
+
+    # Extend the run by two more suggestions
+    with open(path / "header.json", "r") as f:
+        header = json.load(f)
+    header["runner"]["max_iterations"] = max_iterations + 2
+    with open(path / "header.json", "w") as f:
+        json.dump(header, f)
+    r = AsyncRunner.resume(path)
+    assert isinstance(r, AsyncRunner)
+    assert r.stats["num_suggestions"] == max_iterations + 2
+    assert r.experiment.data.shape[0] > n
+    assert r.experiment.data.iloc[:n].equals(exp.data)
+    with open(path / "journal.jsonl", "r") as f:
+        lines = f.readlines()
+    assert [json.loads(line)["iteration"] for line in lines] == [
+        max_iterations - 1,
+        max_iterations + 1,
+    ]
+
+
+@pytest.mark.parametrize("sink", [JSONLinesSink, SQLiteSink])
+def test_runner_metrics(tmp_path, sink, max_iterations=3):
+    metrics = sink(tmp_path / "metrics")
+    exp = VLMOP2()
+    r = Runner(
+        strategy=Random(exp.domain),
+        experiment=exp,
+        max_iterations=max_iterations,
+        batch_size=2,
+        metrics=metrics,
+        hypervolume_ref=[1, 1],
+    )
+    r.run(save_at_end=False)
+    df = metrics.load(run_id=r.uuid_val)
+    names = ["y_0_best", "y_1_best", "hypervolume", "suggest_time", "experiment_time"]
+    for name in names:
+        assert df[df["name"] == name]["iteration"].tolist() == list(
+            range(max_iterations)
+        )
+    assert df[df["name"] == "y_0_best"]["value"].iloc[-1] == exp.data["y_0"].min()
+    runs = metrics.runs()
+    assert runs["run_id"].tolist() == [str(r.uuid_val)]
+    assert runs["params"][0]["strategy"] == "Random"
+    metrics.close()
+
+
+def test_async_runner_metrics(tmp_path, num_slots=2, max_iterations=3):
+    class MockStrategy(Strategy):
+        @span("MockStrategy.suggest_experiments")
+        def suggest_experiments(self, num_experiments=1, prev_res=None, **kwargs):
+            values = np.random.rand(num_experiments, 2)
+            return DataSet(values, columns=["x_0", "x_1"])
+
+        def reset(self):
+            pass
+
+    metrics = JSONLinesSink(tmp_path / "metrics")
+    exp = VLMOP2()
+    r = AsyncRunner(
+        strategy=MockStrategy(exp.domain),
+        experiment=exp,
+        num_slots=num_slots,
+        max_iterations=max_iterations,
+        metrics=metrics,
+        hypervolume_ref=[1, 1],
+        profile=True,
+    )
+    r.run(save_at_end=False)
+    n = exp.data.shape[0]
+    df = metrics.load(run_id=r.uuid_val)
+    names = [
+        "y_0_best",
+        "hypervolume",
+        "experiment_time",
+        "MockStrategy.suggest_experiments_t",
+    ]
+    for name in names:
+        assert sorted(df[df["name"] == name]["iteration"]) == list(range(n))
+    assert df[df["name"] == "y_0_best"]["value"].min() == exp.data["y_0"].min()
+    times = exp.data[("MockStrategy.suggest_experiments_t", "METADATA")]
+    assert np.all(times.to_numpy().astype(float) >= 0)
+    metrics.close()
+
+
+@pytest.mark.parametrize("sink", [JSONLinesSink, SQLiteSink])
+def test_metrics_sink_unwritable(tmp_path, sink):
+    # The parent of the sink is a file, so it cannot be opened
+    (tmp_path / "file").write_text("")
+    metrics = sink(tmp_path / "file" / "metrics")
+    metrics.start_run("run")
+    with pytest.raises(OSError):
+        metrics.flush(block=True)
+    with pytest.raises(OSError):
+        metrics.close()
+
+
+@pytest.mark.parametrize("profile_memory", [False, True])
+def test_runner_profile(profile_memory, max_iterations=3):
+    class MockStrategy(Strategy):
+        @span("MockStrategy.suggest_experiments")
+        def suggest_experiments(self, num_experiments=1, prev_res=None, **kwargs):
+            with span("MockStrategy.sample"):
+                values = np.random.rand(num_experiments, 2)
+            return DataSet(values, columns=["x_0", "x_1"])
+
+        def reset(self):
+            pass
+
+    exp = VLMOP2()
+    r = Runner(
+        strategy=MockStrategy(exp.domain),
+        experiment=exp,
+        max_iterations=max_iterations,
+        batch_size=2,
+        profile=True,
+        profile_memory=profile_memory,
+    )
+    r.run(save_at_end=False)
+    data = r.experiment.data
+    for name in ["MockStrategy.suggest_experiments", "MockStrategy.sample"]:
+        times = data[(f"{name}_t", "METADATA")].to_numpy().astype(float)
+        assert times.shape[0] == 2 * max_iterations
+        assert np.all(times >= 0)
+        assert ((f"{name}_peak_memory", "METADATA") in data.columns) == profile_memory
+    assert (
+        data[("MockStrategy.sample_t", "METADATA")]
+        <= data[("MockStrategy.suggest_experiments_t", "METADATA")]
+    ).all()
+
+
 @pytest.mark.parametrize("strategy", [SOBO, SNOBFIT, GRYFFIN, NelderMead, Random, LHS])
 @pytest.mark.parametrize(
     "experiment",
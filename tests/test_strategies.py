@@ -3,13 +3,35 @@ import pytest
 from summit.benchmarks import *
 from summit.domain import *
 from summit.utils.dataset import DataSet
-from summit.utils.multiobjective import pareto_efficient, hypervolume
+from summit.utils.multiobjective import (
+    pareto_efficient,
+    nondominated_sort,
+    ParetoArchive,
+    hypervolume,
+    hypervolume_montecarlo,
+    hypervolume_improvement,
+    HypervolumeTracker,
+)
+from summit.utils.rff import StackedRFF, sample_rff
+from summit.utils.lhs import lhs, lhs_chunks
+from summit.utils.design_cache import DesignCache
 from summit.strategies import *
+from summit.strategies.factorial_doe import (
+    fullfact,
+    fullfact_chunks,
+    factorial_rank,
+    factorial_unrank,
+)
+from summit import get_summit_config_path
 
 import GPy
+import pyrff
 from fastprogress.fastprogress import progress_bar
 import numpy as np
+import pandas as pd
+from scipy.spatial.distance import pdist
 import os
+import pickle
 import warnings
 import pkg_resources
 
@@ -110,6 +132,99 @@ def test_lhs():
     return results
 
 
+@pytest.mark.parametrize("criterion", ["maximin", "centermaximin"])
+def test_lhs_swap_optimizer(criterion, num_factors=3, num_samples=40):
+    H_random = lhs(
+        num_factors,
+        samples=num_samples,
+        criterion=criterion,
+        random_state=np.random.RandomState(3),
+    )
+    H = lhs(
+        num_factors,
+        samples=num_samples,
+        criterion=criterion,
+        random_state=np.random.RandomState(3),
+        optimizer="swap",
+    )
+    # Still a latin hypercube: one point in every interval of every factor
+    intervals = np.sort(np.floor(H * num_samples), axis=0)
+    assert np.all(intervals == np.arange(num_samples)[:, np.newaxis])
+    # Swaps never decrease the minimum distance
+    assert pdist(H).min() >= pdist(H_random).min()
+
+    with pytest.raises(ValueError):
+        lhs(num_factors, samples=num_samples, criterion=criterion, optimizer="anneal")
+    for other in [None, "center", "correlation"]:
+        with pytest.raises(ValueError):
+            lhs(num_factors, samples=num_samples, criterion=other, optimizer="swap")
+
+
+def test_design_cache(tmp_path):
+    cache = DesignCache(tmp_path, max_memory_items=2, max_disk_items=3)
+    H = cache.lhs(3, samples=10, criterion="maximin", seed=1)
+    expected = lhs(
+        3, samples=10, criterion="maximin", random_state=np.random.RandomState(1)
+    )
+    assert np.all(H == expected)
+    # Hits return copies of the same design
+    H[0, 0] = -1.0
+    assert np.all(cache.lhs(3, samples=10, criterion="maximin", seed=1) == expected)
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+
+    # A second cache on the same directory reads the design from disk
+    other = DesignCache(tmp_path)
+    assert np.all(
+        other.get(
+            dict(
+                design="lhs",
+                seed=1,
+                n=3,
+                samples=10,
+                criterion="maximin",
+                iterations=None,
+                optimizer=None,
+                n_swaps=None,
+            ),
+            lambda: np.zeros((10, 3)),
+        )
+        == expected
+    )
+
+    # Least recently used designs are evicted
+    for seed in range(2, 6):
+        cache.lhs(3, samples=10, criterion="maximin", seed=seed)
+    assert len(cache._memory) == 2
+    assert len(list(tmp_path.glob("*.npy"))) == 3
+
+    # Domain bounds are applied when the design is used
+    domain = Domain()
+    domain += ContinuousVariable(name="temperature", description="", bounds=[50, 100])
+    domain += ContinuousVariable(name="flowrate", description="", bounds=[0.1, 0.5])
+    designs = [
+        LHS(
+            domain, random_state=np.random.RandomState(3), design_cache=cache
+        ).suggest_experiments(5, criterion="maximin")
+        for _ in range(2)
+    ]
+    assert np.all(designs[0].data_to_numpy() == designs[1].data_to_numpy())
+    assert designs[0]["temperature"].between(50, 100).all()
+    assert designs[0]["flowrate"].between(0.1, 0.5).all()
+
+    # Unseeded strategies share one cached design
+    cache.clear()
+    domain += ContinuousVariable(
+        name="yld", description="", bounds=[0, 100], is_objective=True
+    )
+    designs = [
+        TSEMO(domain, design_cache=cache).suggest_experiments(5) for _ in range(2)
+    ]
+    assert np.all(designs[0].data_to_numpy() == designs[1].data_to_numpy())
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+    cache.clear()
+    assert not tmp_path.exists()
+
+
 def test_doe():
     domain = Domain()
     domain += ContinuousVariable(
@@ -140,6 +255,201 @@ def test_doe():
     return experiments
 
 
+def test_fullfact_chunks():
+    levels = [3, 1, 4, 2]
+    design = fullfact(levels)
+    assert design.shape == (24, 4)
+    assert len(np.unique(design, axis=0)) == 24
+    chunks = list(fullfact_chunks(levels, chunk_size=5))
+    assert [len(chunk) for chunk in chunks] == [5, 5, 5, 5, 4]
+    assert np.all(np.concatenate(chunks) == design)
+    # Disjoint slices of the design
+    chunks = [list(fullfact_chunks(levels, start=s, stop=s + 10)) for s in (0, 10, 20)]
+    assert np.all(np.concatenate([c[0] for c in chunks]) == design)
+    # Rank and unrank are inverses
+    assert np.all(factorial_rank(design, levels) == np.arange(24))
+    assert np.all(factorial_unrank([23, 7], levels) == design[[23, 7]])
+    with pytest.raises(ValueError):
+        factorial_rank([[3, 0, 0, 0]], levels)
+
+    domain = Domain()
+    domain += ContinuousVariable(name="temperature", description="", bounds=[50, 100])
+    domain += CategoricalVariable(
+        name="solvent", description="", levels=["water", "ethanol", "toluene"]
+    )
+    strategy = FullFactorial(domain)
+    levels = dict(temperature=[50, 75, 100], solvent=["toluene", "water"])
+    experiments = strategy.suggest_experiments(levels)
+    chunks = list(strategy.iter_experiments(levels, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert experiments.equals(pd.concat(chunks))
+
+
+@pytest.mark.parametrize("criterion", [None, "center"])
+def test_lhs_chunks(criterion, num_factors=3, num_samples=1000):
+    H = np.concatenate(
+        list(
+            lhs_chunks(
+                num_factors,
+                num_samples,
+                chunk_size=300,
+                criterion=criterion,
+                random_state=np.random.RandomState(3),
+            )
+        )
+    )
+    # One point in every interval of every factor
+    intervals = np.sort(np.floor(H * num_samples), axis=0)
+    assert np.all(intervals == np.arange(num_samples)[:, np.newaxis])
+    # Slices generated separately are parts of the same design
+    H_slice = np.concatenate(
+        list(
+            lhs_chunks(
+                num_factors,
+                num_samples,
+                chunk_size=300,
+                criterion=criterion,
+                random_state=np.random.RandomState(3),
+                start=250,
+                stop=500,
+            )
+        )
+    )
+    assert np.all(H_slice == H[250:500])
+    with pytest.raises(ValueError):
+        next(lhs_chunks(num_factors, num_samples, criterion="maximin"))
+
+    domain = Domain()
+    domain += ContinuousVariable(name="temperature", description="", bounds=[50, 100])
+    domain += ContinuousVariable(name="flowrate", description="", bounds=[0.1, 0.5])
+    strategy = LHS(domain, random_state=np.random.RandomState(3))
+    chunks = list(strategy.iter_experiments(10, chunk_size=4, criterion=criterion))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    experiments = pd.concat(chunks)
+    assert list(experiments.index) == list(range(10))
+    assert experiments["temperature"].between(50, 100).all()
+    assert len(np.unique(np.floor((experiments["temperature"] - 50) / 5))) == 10
+
+    strategy = Random(domain, random_state=np.random.RandomState(3))
+    chunks = list(strategy.iter_experiments(10, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert list(pd.concat(chunks).index) == list(range(10))
+
+
+@pytest.mark.parametrize("constraint_sampling", ["auto", "rejection", "hit-and-run"])
+@pytest.mark.parametrize("strategy_class", [Random, LHS])
+def test_constrained_sampling(strategy_class, constraint_sampling, num_experiments=50):
+    domain = Domain()
+    domain += ContinuousVariable(name="temperature", description="", bounds=[50, 100])
+    domain += ContinuousVariable(name="flowrate_a", description="", bounds=[0.1, 0.5])
+    domain += ContinuousVariable(name="flowrate_b", description="", bounds=[0.1, 0.5])
+    domain += CategoricalVariable(name="base", description="", levels=["DBU", "TEA"])
+    domain += Constraint("flowrate_a + flowrate_b - 0.4", "<=")
+    domain += Constraint("temperature - 60", ">=")
+
+    strategy = strategy_class(
+        domain,
+        random_state=np.random.RandomState(3),
+        constraint_sampling=constraint_sampling,
+    )
+    experiments = strategy.suggest_experiments(num_experiments)
+    assert len(experiments) == num_experiments
+    assert domain.check_constraints(experiments).all()
+    assert experiments["temperature"].between(60, 100).all()
+    assert experiments["flowrate_a"].between(0.1, 0.5).all()
+    assert set(experiments["base"].to_numpy().ravel()) <= {"DBU", "TEA"}
+
+    # Strategies with cached samplers can still be pickled
+    new_strategy = pickle.loads(pickle.dumps(strategy))
+    assert domain.check_constraints(new_strategy.suggest_experiments(5)).all()
+
+    # Equality constraints can only be sampled by hit-and-run
+    domain += Constraint("flowrate_a + flowrate_b - 0.3", "==")
+    strategy = strategy_class(domain, random_state=np.random.RandomState(3))
+    experiments = strategy.suggest_experiments(num_experiments)
+    total = experiments["flowrate_a"] + experiments["flowrate_b"]
+    assert np.allclose(total, 0.3)
+    assert strategy._samplers[("temperature", "flowrate_a", "flowrate_b")].method == (
+        "hit-and-run"
+    )
+
+    # Infeasible constraints
+    domain += Constraint("flowrate_a - 0.6", ">=")
+    strategy = strategy_class(domain, random_state=np.random.RandomState(3))
+    with pytest.raises(ValueError):
+        strategy.suggest_experiments(num_experiments)
+
+
+@pytest.mark.parametrize("strategy_class", [Random, LHS])
+def test_constrained_sampling_skips_unsampled(strategy_class):
+    domain = Domain()
+    domain += ContinuousVariable(name="x", description="", bounds=[0, 1])
+    domain += ContinuousVariable(name="y", description="", bounds=[0, 1])
+    domain += ContinuousVariable(
+        name="z", description="", bounds=[0, 1], is_objective=True
+    )
+    domain += Constraint("x - z")
+    domain += Constraint("x - 0.5")
+    strategy = strategy_class(domain, random_state=np.random.RandomState(3))
+    with pytest.warns(UserWarning, match="x - z"):
+        experiments = strategy.suggest_experiments(10)
+    assert len(experiments) == 10
+    assert (experiments["x"] <= 0.5).all()
+
+
+@pytest.mark.parametrize("categorical_method", ["one-hot", "descriptors"])
+@pytest.mark.parametrize("standardize", [False, True])
+def test_transform_plan(categorical_method, standardize, batch_size=3):
+    solvent_ds = DataSet(
+        [[5, 81], [-93, 111], [0, 100]],
+        index=["benzene", "toluene", "water"],
+        columns=["melting_point", "boiling_point"],
+    )
+    domain = Domain()
+    domain += ContinuousVariable(name="temperature", description="", bounds=[50, 100])
+    domain += CategoricalVariable(
+        name="solvent", description="", descriptors=solvent_ds
+    )
+    domain += ContinuousVariable(name="flowrate", description="", bounds=[0.1, 0.5])
+    domain += ContinuousVariable(
+        name="yld", description="", bounds=[0, 100], is_objective=True
+    )
+    random = Random(domain, random_state=np.random.RandomState(0))
+    transform, incremental_transform = Transform(domain), Transform(domain)
+    kwargs = dict(
+        categorical_method=categorical_method,
+        standardize_inputs=standardize,
+        standardize_outputs=standardize,
+    )
+    history = None
+    for i in range(4):
+        batch = random.suggest_experiments(batch_size)
+        batch.index = batch.index + i * batch_size
+        batch["yld", "DATA"] = np.random.rand(batch_size)
+        history = batch if history is None else history.append(batch)
+        inputs, outputs = transform.transform_inputs_outputs(history, **kwargs)
+        new_inputs, new_outputs = incremental_transform.transform_inputs_outputs(
+            history, incremental=True, **kwargs
+        )
+        assert list(new_inputs.columns) == list(inputs.columns)
+        assert list(new_outputs.columns) == list(outputs.columns)
+        assert np.allclose(new_inputs.to_numpy(), inputs.to_numpy().astype(float))
+        assert np.allclose(new_outputs.to_numpy(), outputs.to_numpy().astype(float))
+        assert incremental_transform.output_means == pytest.approx(
+            transform.output_means
+        )
+
+    # Only new rows are transformed, and a different history is not mistaken for them
+    plan = incremental_transform.plan(categorical_method)
+    assert plan._n_rows == len(history)
+    inputs, _ = plan.update(history.iloc[:batch_size])
+    assert np.all(inputs == plan.transform(history.iloc[:batch_size])[0])
+    inputs, _ = plan.update(history.iloc[1:])
+    assert np.all(inputs == plan.transform(history.iloc[1:])[0])
+    incremental_transform.reset()
+    assert plan._n_rows == 0
+
+
 def test_multitosingleobjective_transform():
     class MockStrategy(Strategy):
         def suggest_experiments(self, num_experiments, previous_results):
@@ -886,6 +1196,207 @@ def test_gryffin_hartmann(
         fig, ax = hartmann3D.plot()
 
 
+def _brute_force_nondominated(y):
+    """Non-dominated points of y (minimization), keeping the first of any duplicates"""
+    keep = []
+    for i, p in enumerate(y):
+        dominated = np.any(np.all(y <= p, axis=1) & np.any(y < p, axis=1))
+        duplicate = np.any(np.all(y[:i] == p, axis=1))
+        if not dominated and not duplicate:
+            keep.append(i)
+    return np.array(keep, dtype=int)
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3, 5])
+@pytest.mark.parametrize("discrete", [False, True])
+def test_pareto_efficient(num_objectives, discrete, num_points=300):
+    rng = np.random.default_rng(0)
+    y = rng.random((num_points, num_objectives))
+    if discrete:
+        # Many ties and duplicates
+        y = np.round(4 * y)
+    front, indices = pareto_efficient(y, maximize=False)
+    expected = _brute_force_nondominated(y)
+    assert np.array_equal(indices, expected)
+    assert np.array_equal(front, y[expected])
+    _, indices = pareto_efficient(-y, maximize=True)
+    assert np.array_equal(indices, expected)
+
+    # Non-dominated sorting peels off fronts one at a time, including duplicates
+    ranks = nondominated_sort(y, maximize=False)
+    remaining = np.arange(num_points)
+    rank = 0
+    while len(remaining) > 0:
+        z = y[remaining]
+        dominated = [np.any(np.all(z <= p, axis=1) & np.any(z < p, axis=1)) for p in z]
+        front = remaining[~np.array(dominated)]
+        assert np.all(ranks[front] == rank)
+        remaining = np.setdiff1d(remaining, front)
+        rank += 1
+    assert ranks.max() == rank - 1
+    duplicates = np.array([y[0], y[0], y[0] + 1])
+    assert nondominated_sort(duplicates, maximize=False).tolist() == [0, 0, 1]
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3])
+def test_pareto_archive(num_objectives, num_points=200, step=7):
+    rng = np.random.default_rng(0)
+    y = np.round(10 * rng.random((num_points, num_objectives)))
+    archive = ParetoArchive(num_objectives)
+    front_ids = set()
+    for i in range(0, num_points, step):
+        added, removed = archive.insert(y[i : i + step])
+        assert set(removed) <= front_ids
+        front_ids = (front_ids - set(removed)) | set(added)
+        assert front_ids == set(archive.ids)
+        expected = _brute_force_nondominated(y[: i + step])
+        assert np.array_equal(np.sort(archive.ids), expected)
+        assert np.array_equal(archive.front, y[archive.ids])
+    assert archive.n_points == num_points
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3, 4])
+def test_hypervolume(num_objectives, num_points=100):
+    rng = np.random.default_rng(0)
+    y = rng.random((num_points, num_objectives))
+    y = np.round(y, 2)  # Include ties
+    ref = 0.9 * np.ones(num_objectives)
+    hv = hypervolume(y, ref, method="recursive")
+    assert np.isclose(hypervolume(y, ref), hv)
+    hv_mc, (lower, upper) = hypervolume_montecarlo(y, ref, random_state=0)
+    assert lower <= hv <= upper
+    assert lower <= hv_mc <= upper
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3])
+def test_hypervolume_improvement(num_objectives, num_points=30, num_candidates=50):
+    rng = np.random.default_rng(0)
+    y = rng.random((num_points, num_objectives))
+    candidates = rng.random((num_candidates, num_objectives))
+    ref = np.ones(num_objectives)
+    front, _ = pareto_efficient(y, maximize=False)
+    hvi = hypervolume_improvement(candidates, front, ref)
+    hv = hypervolume(front, ref)
+    for c, hvi_c in zip(candidates, hvi):
+        new_front, _ = pareto_efficient(np.vstack([front, c]), maximize=False)
+        assert np.isclose(hvi_c, hypervolume(new_front, ref) - hv)
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3])
+def test_hypervolume_tracker(num_objectives, num_points=60, step=3):
+    rng = np.random.default_rng(0)
+    y = rng.random((num_points, num_objectives))
+    ref = 0.9 * np.ones(num_objectives)
+    tracker = HypervolumeTracker(ref)
+    hv = tracker.trajectory(y, step=step)
+    for i, hv_i in enumerate(hv):
+        y_pareto, _ = pareto_efficient(y[: (i + 1) * step], maximize=False)
+        assert np.isclose(hv_i, hypervolume(y_pareto, ref))
+    front, _ = pareto_efficient(y[np.all(y < ref, axis=1)], maximize=False)
+    assert tracker.front.shape == front.shape
+    assert tracker.n_points == num_points
+
+
+@pytest.mark.parametrize("kernel_nu", [1, np.inf])
+@pytest.mark.parametrize("num_points,num_spectral_points", [(10, 50), (60, 20)])
+def test_sample_rff(kernel_nu, num_points, num_spectral_points, num_samples=50):
+    np.random.seed(0)
+    X = np.random.rand(num_points, 2)
+    Y = np.sin(3 * X[:, 0]) + np.cos(2 * X[:, 1])
+    noise = 0.05
+    statistics = []
+    for _ in range(num_samples):
+        rff = sample_rff(
+            lengthscales=np.array([0.5, 1.0]),
+            scaling=1.0,
+            noise=noise,
+            kernel_nu=kernel_nu,
+            X=X,
+            Y=Y,
+            M=num_spectral_points,
+        )
+        # The weights should be drawn from N(A^-1 phi^T Y / noise, A^-1)
+        # with A = phi^T phi / noise + I, so the squared Mahalanobis distance
+        # follows a chi-squared distribution with M degrees of freedom.
+        phi = rff.sqrt_2_alpha_over_m * np.cos(X @ rff.W.T + rff.B.T)
+        A = phi.T @ phi / noise + np.eye(num_spectral_points)
+        mean = np.linalg.solve(A, phi.T @ Y / noise)
+        residual = rff.sample_of_theta - mean
+        statistics.append(residual @ A @ residual)
+    expected_std = np.sqrt(2 * num_spectral_points / num_samples)
+    assert abs(np.mean(statistics) - num_spectral_points) < 4 * expected_std
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_stacked_rff(dtype, chunk_size, num_inputs=3, num_points=20):
+    rng = np.random.default_rng(0)
+    X = rng.random((num_points, num_inputs))
+    rffs = [
+        pyrff.sample_rff(
+            lengthscales=np.ones(num_inputs),
+            scaling=1.0,
+            noise=1e-2,
+            kernel_nu=nu,
+            X=X,
+            Y=np.sin(3 * X[:, i]),
+            M=m,
+        )
+        for i, (nu, m) in enumerate([(1, 200), (np.inf, 300)])
+    ]
+    stacked = StackedRFF(rffs, dtype=dtype, chunk_size=chunk_size)
+    candidates = rng.random((50, num_inputs))
+    expected = np.stack([rff(candidates) for rff in rffs], axis=1)
+    rtol = 1e-9 if dtype == np.float64 else 1e-4
+    for _ in range(2):
+        F = stacked(candidates)
+        assert F.shape == (50, 2)
+        assert np.allclose(F, expected, rtol=rtol, atol=rtol)
+
+
+def test_tsemo_warm_start(num_iterations=3):
+    lab = VLMOP2()
+    strategy = TSEMO(
+        lab.domain, warm_start=True, generations=10, pop_size=20, n_spectral_points=100
+    )
+    experiments = strategy.suggest_experiments(10)
+    for i in range(num_iterations):
+        experiments = lab.run_experiments(experiments)
+        experiments = strategy.suggest_experiments(1, experiments, num_restarts=5)
+        assert set(strategy.gp_params.keys()) == {"y_0", "y_1"}
+
+    # Hyperparameters are kept so warm starting continues after loading
+    strategy_2 = TSEMO.from_dict(strategy.to_dict())
+    assert strategy_2.warm_start
+    assert strategy_2.gp_params == strategy.gp_params
+
+
+def test_tsemo_adaptive_spectral_points(num_iterations=2):
+    lab = VLMOP2()
+    strategy = TSEMO(
+        lab.domain,
+        adaptive_spectral_points=True,
+        min_spectral_points=25,
+        n_spectral_points=400,
+        generations=10,
+        pop_size=20,
+    )
+    experiments = strategy.suggest_experiments(10)
+    for i in range(num_iterations):
+        experiments = lab.run_experiments(experiments)
+        previous = dict(strategy.spectral_points)
+        experiments = strategy.suggest_experiments(1, experiments, num_restarts=5)
+        assert set(strategy.spectral_points.keys()) == {"y_0", "y_1"}
+        for name, n_spectral_points in strategy.spectral_points.items():
+            assert 25 <= n_spectral_points <= 400
+            # The number of spectral points never shrinks
+            assert n_spectral_points >= previous.get(name, 25)
+
+    strategy_2 = TSEMO.from_dict(strategy.to_dict())
+    assert strategy_2.adaptive_spectral_points
+    assert strategy_2.spectral_points == strategy.spectral_points
+
+
 def test_tsemo(test_num_improve_iter=2, save=False):
     num_inputs = 2
     num_objectives = 2
@@ -926,6 +1437,10 @@ def test_tsemo(test_num_improve_iter=2, save=False):
             break
     # assert hv > 117.0
 
+    # Spectral samples are passed to NSGA-II in memory unless save_rffs is set
+    tsemo_dir = get_summit_config_path() / "tsemo" / str(strategy.uuid_val)
+    assert not tsemo_dir.exists()
+
 
 @pytest.mark.parametrize(
     "batch_size, max_num_exp, maximize, constraint",